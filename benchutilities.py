@@ -0,0 +1,122 @@
+from bots.common.settings import settings
+from seleniumbot import SeleniumBot, Locator
+from seleniumbot.enums import Driver, WaitEngine
+
+import statistics
+import time
+
+
+def timeit(function, repeat: int = 3) -> tuple[float, object]:
+    """
+    Time a function
+
+    :param function: Function to time
+    :param repeat: Number of runs
+    :return: (median seconds, result of the last run)
+    """
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - start_time)
+    return statistics.median(durations), result
+
+
+def get_bot(driver: str = 'chrome') -> SeleniumBot:
+    """
+    Start a bare bot on the grid for benchmarking
+
+    :param driver: Driver name
+    :return: SeleniumBot
+    """
+    return SeleniumBot(
+        hub_url=settings.HUB_URL,
+        driver=Driver(driver),
+        download_path=settings.DOWNLOAD_DIR,
+    )
+
+
+def benchmark_extraction(url: str, selector: str = '', xpath: str = '', attribute: str = '', driver: str = 'chrome', repeat: int = 3):
+    """
+    Compare per-element extraction (find_elements + one call per element) to the bulk extraction APIs
+
+    :param url: Page to benchmark on
+    :param selector: CSS selector of the elements
+    :param xpath: Xpath of the elements
+    :param attribute: Attribute to extract, extracts text if empty
+    :param driver: Driver name
+    :param repeat: Number of runs
+    """
+    locator = Locator(selector=selector, xpath=xpath)
+    bot = get_bot(driver)
+    try:
+        bot.go_to_url(url)
+
+        def per_element():
+            elements = bot.get_elements(locator)
+            if attribute:
+                return [element.get_attribute(attribute) for element in elements]
+            return [element.text for element in elements]
+
+        def bulk():
+            if attribute:
+                return bot.get_attributes(attribute, locator)
+            return bot.get_texts(locator)
+
+        per_element_time, per_element_result = timeit(per_element, repeat)
+        bulk_time, bulk_result = timeit(bulk, repeat)
+    finally:
+        bot.close()
+
+    matches = len([1 for a, b in zip(per_element_result, bulk_result) if a == b])
+    speedup = per_element_time / bulk_time if bulk_time else 0
+    print(f'''Locator: {locator}
+Elements: {len(per_element_result)}
+--------------------------------------
+Per element: {per_element_time * 1000:.1f} ms
+Bulk: {bulk_time * 1000:.1f} ms
+Speedup: {speedup:.1f}x
+Matching values: {matches}/{len(per_element_result)}''')
+
+
+def benchmark_waits(delay: float = 1.0, driver: str = 'chrome', repeat: int = 5):
+    """
+    Compare the latency of the driver (WebDriverWait polling) and browser wait engines.
+    An element is added to a blank page after `delay` seconds and each engine waits for it
+    to be visible; the overshoot past `delay` is the wait latency.
+
+    :param delay: Seconds before the element appears
+    :param driver: Driver name
+    :param repeat: Number of runs per engine
+    """
+    script = """
+        document.body.innerHTML = '';
+        setTimeout(function () {
+            var el = document.createElement('div');
+            el.id = 'benchmark-target';
+            el.textContent = 'ready';
+            document.body.appendChild(el);
+        }, arguments[0]);
+    """
+    bot = get_bot(driver)
+    latencies = {}
+    try:
+        bot.go_to_url('about:blank')
+        for engine in WaitEngine:
+            bot.wait_engine = engine
+            latencies[engine] = []
+            for _ in range(repeat):
+                bot.driver.execute_script(script, int(delay * 1000))
+                start_time = time.perf_counter()
+                bot.wait_to_be_visible('#benchmark-target')
+                latencies[engine].append(time.perf_counter() - start_time - delay)
+    finally:
+        bot.close()
+
+    lines = [f'{engine.value}: median {statistics.median(values) * 1000:.1f} ms, '
+             f'max {max(values) * 1000:.1f} ms' for engine, values in latencies.items()]
+    print(f'''Element delay: {delay}s, runs: {repeat}
+--------------------------------------
+Wait latency past delay
+''' + '\n'.join(lines))
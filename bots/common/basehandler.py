@@ -1,26 +1,42 @@
-from seleniumbot import SeleniumBot
+from seleniumbot import SeleniumBot, AsyncSeleniumBot
+from seleniumbot.asyncbot import get_executor
+from seleniumbot.changestore import ChangeStore
+from seleniumbot.pagearchive import PageArchive
+from seleniumbot.screenshotwriter import ScreenshotWriter
+from seleniumbot.sessionstore import SessionStore
+from seleniumbot.locator import Locator
+from seleniumbot.locatortimeouts import LocatorTimeouts
 from seleniumbot.proxyfactory import ProxyFactory
 from seleniumbot.proxyserver import ProxyServer
 from seleniumbot.enums import Driver, BotProxy
 
-from bots.common.exceptions import ValidationError
+from bots.common.exceptions import ValidationError, ScrapingError
 from bots.common.parameter import Parameter
 from bots.common.settings import settings
 from bots.common.utils import dictutils, contextutils
 
 from loguru import logger
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor
+from typing import Callable, Optional, Union
 
+import asyncio
+import requests
 import uuid
 import signal
 import sys
+import threading
 import time
 import traceback
 
 
+# Trace id of the handler being created on this thread, see BaseHandler.create_async
+_context = threading.local()
+
+
 class BaseHandler(ABC):
     def __init__(self, 
-                 driver: Driver, 
+                 driver: Union[Driver, list[Driver]], 
                  proxy: BotProxy = None, 
                  config: dict = {}, 
                  params: dict = {}, 
@@ -33,48 +49,125 @@ class BaseHandler(ABC):
         self.driver = driver
         self.proxy = proxy
         self.scraper = None
+        self._async_scraper = None
         self.interrupted = False
 
-        self.trace_id = str(uuid.uuid4())
+        self.trace_id = getattr(_context, 'trace_id', None) or str(uuid.uuid4())
         self.logger = logger
         self.logger = self.logger.bind(trace_id=self.trace_id)
-        self.logger.remove()
-        log_format = '<green>{time}</green> | <level>{level}</level> | <blue>{extra[trace_id]}</blue> | <cyan>{name}</cyan>:<cyan>{line}</cyan> | <level>{message}</level>'
-        self.logger.add(
-            f'{settings.LOG_DIR}/{config.get("id")}.log', 
-            level="INFO", 
-            format=log_format
-        )
-        logger.add(
-            sys.stdout, 
-            format=log_format,
-            colorize=True
-        )
+        self._log_sinks = self.__add_log_sinks()
+
+        try:
+            self.logger.info(f'Starting bot params={params}')
+            proxy_server_url = ''
+            if proxy:
+                self.proxy_factory = ProxyFactory(logger=self.logger)
+                self.proxy_factory.set_proxymesh_username(settings.PROXYMESH_USERNAME)
+                self.proxy_factory.set_proxymesh_password(settings.PROXYMESH_PASSWORD)
+                bot_proxy = self.proxy_factory.get_proxy(proxy)
+                self.proxy_server = ProxyServer(bot_proxy, logger=self.logger, debug=debug)
+                proxy_server_port = self.proxy_server.start()
+                proxy_server_url = f'http://runner:{proxy_server_port}'
+            self.scraper = SeleniumBot(
+                hub_url=settings.HUB_URL,
+                driver=driver,
+                download_path=settings.DOWNLOAD_DIR,
+                proxy=proxy_server_url,
+                window_size=(config.get('width', 1280), config.get('height', 720)),
+                timeout=config.get('timeout', 30),
+                page_timeout=config.get('pageTimeout', 30),
+                disable_proxy_server=True,
+                schedule_sessions=config.get('scheduleSessions', False),
+                queue_timeout=config.get('queueTimeout', 300),
+                hedge_sessions=config.get('hedgeSessions', False),
+                session_stats_path=f'{settings.STORE_DIR}/session_latency.json',
+                pacing=config.get('pacing', 'human'),
+                pacing_distribution=config.get('pacingDistribution', 'uniform'),
+                pacing_scale=config.get('pacingScale', 1.0),
+                wait_engine=config.get('waitEngine', 'driver'),
+                screenshot_writer=ScreenshotWriter(
+                    directory=f'{settings.SCREENSHOT_DIR}/{self.trace_id}',
+                    max_width=config.get('screenshotMaxWidth'),
+                    image_format=config.get('screenshotFormat', 'png'),
+                    quality=config.get('screenshotQuality', 85),
+                    skip_duplicates=config.get('screenshotSkipDuplicates', False),
+                    logger=self.logger
+                ) if config.get('screenshotWriter') else None,
+                download_workers=config.get('downloadWorkers', 4),
+                capture_network=config.get('captureNetwork', False),
+                trace_commands=config.get('traceCommands', False),
+                collect_timings=config.get('collectTimings', False),
+                locator_timeouts=LocatorTimeouts(
+                    path=f'{settings.STORE_DIR}/timeouts/{config.get("id")}.json',
+                    percentile=config.get('timeoutPercentile', 95),
+                    margin=config.get('timeoutMargin', 1.0),
+                    logger=self.logger
+                ) if config.get('adaptiveTimeouts') else None,
+                page_load_strategy=config.get('pageLoadStrategy', 'normal'),
+                navigation_budget=config.get('navigationBudget'),
+                logger=self.logger,
+                debug=debug
+            )
+            self.logger.info(f"{self.scraper.session_timings.get('driver')} driver initialized")
+            if proxy:
+                self.scraper.proxy_rotator = self.rotate_proxy
+            self.session_store = None
+            if settings.SESSION_STORE_KEY:
+                self.session_store = SessionStore(f'{settings.STORE_DIR}/sessions', settings.SESSION_STORE_KEY, logger=self.logger)
+            self.page_archive = None
+            if config.get('archivePages'):
+                self.page_archive = PageArchive(
+                    f'{settings.ARCHIVE_DIR}/{self.trace_id}',
+                    compression=config.get('archiveCompression', 'zlib'),
+                    logger=self.logger
+                )
+            self.change_store = None
+            if config.get('changeDetection'):
+                self.change_store = ChangeStore(f'{settings.STORE_DIR}/changes/{config.get("id")}.sqlite3', logger=self.logger)
+            if threading.current_thread() is threading.main_thread():
+                signal.signal(signal.SIGINT, self.cleanup)
+        except Exception:
+            # keep the failure in the bot log under this trace id, then drop the sinks of this handler
+            self.logger.error(traceback.format_exc())
+            self.__remove_log_sinks()
+            raise
+
+
+
+    @classmethod
+    async def create_async(cls, *args, executor: Executor = None, trace_id: str = None, **kwargs) -> 'BaseHandler':
+        """
+        Initialize a handler without blocking the event loop.
+        Takes the same arguments as the handler.
+
+        :param executor: Executor to run blocking calls on, defaults to the shared executor
+        :param trace_id: Trace id of the run, generated if not given
+        :return: Handler instance
+        """
+        executor = executor or get_executor()
+        loop = asyncio.get_running_loop()
+
+        def create() -> 'BaseHandler':
+            _context.trace_id = trace_id
+            try:
+                return cls(*args, **kwargs)
+            finally:
+                _context.trace_id = None
+
+        handler = await loop.run_in_executor(executor, create)
+        handler._async_scraper = AsyncSeleniumBot(handler.scraper, executor=executor)
+        return handler
+
 
-        self.logger.info(f'Starting bot params={params}')
-        proxy_server_url = ''
-        if proxy:
-            self.proxy_factory = ProxyFactory(logger=self.logger)
-            self.proxy_factory.set_proxymesh_username(settings.PROXYMESH_USERNAME)
-            self.proxy_factory.set_proxymesh_password(settings.PROXYMESH_PASSWORD)
-            bot_proxy = self.proxy_factory.get_proxy(proxy)
-            self.proxy_server = ProxyServer(bot_proxy, logger=self.logger, debug=debug)
-            proxy_server_port = self.proxy_server.start()
-            proxy_server_url = f'http://runner:{proxy_server_port}'
-        self.scraper = SeleniumBot(
-            hub_url=settings.HUB_URL,
-            driver=driver,
-            download_path=settings.DOWNLOAD_DIR,
-            proxy=proxy_server_url,
-            window_size=(config.get('width', 1280), config.get('height', 720)),
-            timeout=config.get('timeout', 30),
-            page_timeout=config.get('pageTimeout', 30),
-            disable_proxy_server=True,
-            logger=self.logger,
-            debug=debug
-        )
-        self.logger.info(f"{driver} driver initialized")
-        signal.signal(signal.SIGINT, self.cleanup)
+
+    @property
+    def async_scraper(self) -> AsyncSeleniumBot:
+        """
+        Awaitable facade over the bot scraper
+        """
+        if self._async_scraper is None:
+            self._async_scraper = AsyncSeleniumBot(self.scraper)
+        return self._async_scraper
 
 
 
@@ -94,6 +187,99 @@ class BaseHandler(ABC):
 
 
 
+    def extract(self, dom=None):
+        """
+        Extract a typed record from the current page with the `extract` schema from config.
+        The schema is compiled once per bot and read in one browser round trip.
+
+        :param dom: the base element, defaults to the document
+        :return: Record model instance
+        """
+        if not (schema := dictutils.get(self.config, 'extract')):
+            raise ScrapingError('No extraction schema in config')
+        return self.scraper.extract(schema, dom=dom)
+
+
+
+    def login(self,
+              account: str,
+              url: str,
+              login: Callable[[SeleniumBot], object],
+              logged_in: Union[str, Locator, Callable[[SeleniumBot], bool]],
+              ) -> bool:
+        """
+        Open `url` logged in as an account, reusing the saved session when it is still valid.
+        Sessions are only saved when SESSION_STORE_KEY is set; `sessionMaxAge` in config limits their age.
+
+        :param account: Account name
+        :param url: Page to open
+        :param login: Function receiving the bot scraper that runs the login flow
+        :param logged_in: CSS selector or Locator only present when logged in, or a function receiving the bot scraper
+        :return: the saved session was reused
+        """
+        if not self.session_store:
+            self.logger.warning('SESSION_STORE_KEY is not set, sessions are not saved')
+        restored = self.scraper.ensure_session(
+            self.session_store, account, url, login, logged_in,
+            max_age=self.config.get('sessionMaxAge'),
+        )
+        self.logger.info(f'Logged in as {account} ({"saved session" if restored else "login flow"})')
+        return restored
+
+
+
+    def page_changed(self, key: str = None, selector: Union[str, Locator] = None, xpath: str = None) -> bool:
+        """
+        Check whether the current page changed since the last successful run, by hashing the text
+        of the region to extract (`changeRegion` in config, defaults to the body).
+        Skip extraction and processing of the page when it did not. Always True without `changeDetection`.
+
+        :param key: Page key, defaults to the current url
+        :param selector: CSS selector or Locator of the region, overrides `changeRegion`
+        :param xpath: Xpath of the region, overrides `changeRegion`
+        :return: changed
+        """
+        if not self.change_store:
+            return True
+        if selector or xpath:
+            locator = Locator.resolve(selector, xpath)
+        else:
+            locator = Locator(selector=self.config.get('changeRegion') or 'body')
+        return self.change_store.has_changed(key or self.scraper.driver.current_url, self.scraper.get_texts(locator))
+
+
+
+    def fetch_if_changed(self, url: str, key: str = None, **kwargs) -> Optional[requests.Response]:
+        """
+        Fetch a url with the scraper http session, conditionally (ETag/Last-Modified) with `changeDetection`
+
+        :param url: Request url
+        :param key: Page key, defaults to the url
+        :return: Response, None if the page did not change since the last successful run
+        """
+        session = self.scraper.http_session(refresh=False)
+        if not self.change_store:
+            response = session.fetch(url, **kwargs)
+            response.raise_for_status()
+            return response
+        return session.fetch_if_changed(url, self.change_store, key=key, **kwargs)
+
+
+
+    def archive_page(self, label: str = None) -> dict:
+        """
+        Archive the current page source under ARCHIVE_DIR/{trace_id}, compressed and deduplicated.
+        Does nothing without `archivePages` in config.
+
+        :param label: Free label, e.g. the step of the bot
+        :return: index entry of the snapshot, None if archiving is off
+        """
+        if not self.page_archive:
+            return None
+        return self.page_archive.add(self.scraper.get_page_source(), url=self.scraper.driver.current_url, label=label)
+
+
+
     def preprocess_data(self):
         """
         Preprocess data.
@@ -111,13 +297,17 @@ class BaseHandler(ABC):
 
 
 
+    async def arun(self) -> dict:
+        """
+        Async bot entry point function.
+        Runs `run` on the executor unless overridden to await `self.async_scraper` calls.
+        """
+        return await self.async_scraper.run(self.run)
+
+
+
     def handle(self) -> dict:
-        data = {
-            'trace_id': self.trace_id,
-            'success': False,
-            'message': '',
-            'data': {}
-        }
+        data = self.__new_result()
         start_time = time.time()
 
         try:
@@ -131,15 +321,146 @@ class BaseHandler(ABC):
             data['success'] = False
             data['message'] = str(e)
         finally:
-            if self.interrupted:
-                data['success'] = False
-                data['message'] = 'Bot run interrupted'
-            if not self.interrupted:
-                self.cleanup()
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-            self.logger.info(f'Elapsed time: {elapsed_time}')
-            self.logger.info(f'Result: {data}')
+            self.__finish(data, start_time)
+        return data
+
+
+
+    async def handle_async(self) -> dict:
+        """
+        Async version of `handle`, awaiting `arun`.
+        Blocking steps run on the executor so one event loop can drive many bots.
+        """
+        data = self.__new_result()
+        start_time = time.time()
+
+        try:
+            await self.async_scraper.run(self.preprocess_data)
+            result = await self.arun() or {}
+            data['success'] = True
+            data['message'] = 'Bot ran successfully'
+            data['data'] = result
+        except Exception as e:
+            self.logger.error(traceback.format_exc())
+            data['success'] = False
+            data['message'] = str(e)
+        finally:
+            await self.async_scraper.run(self.__finish, data, start_time)
+        return data
+
+
+
+    def __new_result(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'success': False,
+            'message': '',
+            'data': {},
+            'session': self.scraper.session_timings,
+        }
+
+
+
+    def __finish(self, data: dict, start_time: float):
+        """
+        Clean up after a run and complete the result
+
+        :param data: Run result
+        :param start_time: Run start time
+        """
+        if self.interrupted:
+            data['success'] = False
+            data['message'] = 'Bot run interrupted'
+        if not self.interrupted:
+            self.cleanup()
+        end_time = time.time()
+        elapsed_time = end_time - start_time
+        data['pacing'] = self.scraper.pacer.get_stats()
+        self.logger.info(f'Elapsed time: {elapsed_time}')
+        self.logger.info(f'Pacing time: {data["pacing"]["seconds"]}')
+        if self.scraper.tracer:
+            data['profile'] = self.scraper.tracer.get_profile()
+            self.logger.info(f'Round trips: {data["profile"]["round_trips"]}, wire time: {data["profile"]["wire_time"]:.2f}s')
+            if self.config.get('traceFile'):
+                trace_path = f'{settings.LOG_DIR}/{self.config.get("id")}-{self.trace_id}.trace.json'
+                self.scraper.tracer.write_chrome_trace(trace_path)
+                self.logger.info(f'Command trace written to {trace_path}')
+        if self.scraper.page_timings:
+            data['timings'] = self.scraper.page_timings.get_summary()
+            for host in data['timings']['hosts']:
+                self.logger.info(f'Resource host {host["host"]}: {host["count"]} requests, {host["duration"]}ms, {host["bytes"]} bytes')
+        if self.page_archive:
+            data['archive'] = self.page_archive.get_stats()
+            self.logger.info(f'Archived {data["archive"]["snapshots"]} pages to {self.page_archive.directory} ({data["archive"]["duplicates"]} duplicates)')
+        if self.change_store:
+            if data['success']:
+                self.change_store.commit(self.trace_id)
+            data['changes'] = self.change_store.get_stats()
+            self.change_store.close()
+            self.logger.info(f'Pages checked: {data["changes"]["checked"]}, skipped: {data["changes"]["skipped"]} ({data["changes"]["skip_ratio"]:.0%})')
+        if self.scraper.navigation_stats['navigations']:
+            data['navigation'] = self.scraper.navigation_stats
+        self.logger.info(f'Result: {data}')
+        self.__remove_log_sinks()
+
+
+
+    def __add_log_sinks(self) -> list[int]:
+        """
+        Add the log file and stdout sinks of this handler.
+        Sinks only take the records of this trace id, so concurrent handlers do not duplicate each other's logs.
+
+        :return: sink ids
+        """
+        try:
+            # loguru default stderr sink
+            logger.remove(0)
+        except ValueError:
+            pass
+        log_format = '<green>{time}</green> | <level>{level}</level> | <blue>{extra[trace_id]}</blue> | <cyan>{name}</cyan>:<cyan>{line}</cyan> | <level>{message}</level>'
+        trace_id = self.trace_id
+
+        def own_records(record) -> bool:
+            return record['extra'].get('trace_id') == trace_id
+
+        return [
+            logger.add(
+                f'{settings.LOG_DIR}/{self.config.get("id")}.log',
+                level="INFO",
+                format=log_format,
+                filter=own_records
+            ),
+            logger.add(
+                sys.stdout,
+                format=log_format,
+                colorize=True,
+                filter=own_records
+            ),
+        ]
+
+
+
+    def __remove_log_sinks(self):
+        for sink_id in self._log_sinks:
+            try:
+                logger.remove(sink_id)
+            except ValueError:
+                pass
+        self._log_sinks = []
+
+
+
+    def rotate_proxy(self) -> bool:
+        """
+        Point the proxy server to another upstream of the bot proxy, cycling through the available ones.
+        Used by SeleniumBot.navigate to retry through another proxy
+
+        :return: rotated, False if no other upstream is available (e.g. a single proxymesh host)
+        """
+        rotated = self.proxy_server.rotate_upstream(self.proxy_factory.get_proxies(self.proxy))
+        if rotated:
+            self.logger.info('Proxy upstream rotated')
+        return rotated
 
 
 
@@ -158,3 +479,29 @@ class BaseHandler(ABC):
             self.scraper.close()
         if self.interrupted:
             sys.exit(0)
+
+
+async def handle_concurrently(handler_class: type[BaseHandler], params_list: list[dict], concurrency: int = 10, debug: bool = False) -> list[dict]:
+    """
+    Run a bot handler once per params on one event loop.
+    At most `concurrency` handlers hold a grid session at once, the rest wait for a free spot.
+
+    :param handler_class: Bot handler class
+    :param params_list: Params of each run
+    :param concurrency: Maximum number of concurrent sessions
+    :param debug: Enable verbose logging
+    :return: list of handle results, in params order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = get_executor(max_workers=concurrency)
+
+    async def handle(params: dict) -> dict:
+        async with semaphore:
+            trace_id = str(uuid.uuid4())
+            try:
+                handler = await handler_class.create_async(params=params, debug=debug, executor=executor, trace_id=trace_id)
+            except Exception as e:
+                return {'trace_id': trace_id, 'success': False, 'message': str(e), 'data': {}}
+            return await handler.handle_async()
+
+    return await asyncio.gather(*(handle(params) for params in params_list))
@@ -9,6 +9,10 @@ class Settings(BaseModel):
     HUB_URL: str = f'http://selenium-hub:{HUB_PORT}/wd/hub'
     LOG_DIR: str = os.getenv('LOG_DIR') or 'temp/logs'
     DOWNLOAD_DIR: str = os.getenv('DOWNLOAD_DIR') or 'temp/downloads'
+    SCREENSHOT_DIR: str = os.getenv('SCREENSHOT_DIR') or 'temp/screenshots'
+    ARCHIVE_DIR: str = os.getenv('ARCHIVE_DIR') or 'temp/archive'
+    STORE_DIR: str = os.getenv('STORE_DIR') or 'temp/store'
+    SESSION_STORE_KEY: str = os.getenv('SESSION_STORE_KEY') or ''
     PROXYMESH_USERNAME: str = os.getenv('PROXYMESH_USERNAME') or ''
     PROXYMESH_PASSWORD: str = os.getenv('PROXYMESH_PASSWORD') or ''
 
@@ -14,6 +14,10 @@ config = {
 
     # Other configs (e.g. selectors, xpaths)
     "mainUrl": "https://whatismyipaddress.com/",
-    "ipV4Xpath": "//p[contains(text(), 'IPv4')]/span[2]",
-    "ipV6Xpath": "//p[contains(text(), 'IPv6')]/span[2]",
+
+    # Extraction schema, see seleniumbot.extraction.ExtractionSchema
+    "extract": {
+        "ipv4": {"xpath": "//p[contains(text(), 'IPv4')]/span[2]", "transform": "trim"},
+        "ipv6": {"xpath": "//p[contains(text(), 'IPv6')]/span[2]", "transform": "trim"},
+    },
 }
@@ -15,18 +15,12 @@ class BotHandler(BaseHandler):
         Bot entry point function.
         """
         main_url = self.config.get('mainUrl')
-        ipv4_xpath = self.config.get('ipV4Xpath')
-        ipv6_xpath = self.config.get('ipV6Xpath')
+        fields = self.config.get('extract')
         self.scraper.go_to_url(main_url)
-        self.scraper.wait_to_be_visible(xpath=ipv4_xpath)
-        self.scraper.wait_to_be_visible(xpath=ipv6_xpath)
-        ipv4 = self.scraper.get_inner_text(xpath=ipv4_xpath)
-        ipv6 = self.scraper.get_inner_text(xpath=ipv6_xpath)
-        result = {
-            'ipv4': ipv4,
-            'ipv6': ipv6
-        }
-        return result
+        self.scraper.wait_to_be_visible(xpath=fields['ipv4']['xpath'])
+        self.scraper.wait_to_be_visible(xpath=fields['ipv6']['xpath'])
+        result = self.extract()
+        return result.model_dump()
 
 
 if __name__ == '__main__':
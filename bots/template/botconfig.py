@@ -16,6 +16,74 @@ config = {
     "timeout": 30,
     "pageTimeout": 30,
 
+    # SeleniumBot.navigate: "eager" returns at DOMContentLoaded so pages can be stopped as soon as
+    # the needed elements are present. navigationBudget caps the seconds all navigations may take
+    "pageLoadStrategy": "normal",
+    "navigationBudget": None,
+
+    # Learn per-locator wait deadlines (timeoutPercentile of past waits x 1.5 + timeoutMargin
+    # seconds, at most timeout) so waits on absent elements give up early
+    "adaptiveTimeouts": False,
+    "timeoutPercentile": 95,
+    "timeoutMargin": 1.0,
+
+    # Wait locally for a free grid slot instead of queueing on the hub
+    "scheduleSessions": False,
+    "queueTimeout": 300,
+
+    # Send a second session request when the grid is slow to start the first one
+    "hedgeSessions": False,
+
+    # Delays between actions: "fast" waits on conditions only, "human" draws
+    # delays from pacingDistribution (uniform, normal, lognormal) times pacingScale
+    "pacing": "human",
+    "pacingDistribution": "uniform",
+    "pacingScale": 1.0,
+
+    # Element waits: "driver" polls with WebDriverWait, "browser" resolves in the page
+    "waitEngine": "driver",
+
+    # screenshotWriter writes saved screenshots in the background to SCREENSHOT_DIR/{trace_id},
+    # otherwise save_screenshot writes them synchronously to the given path.
+    # screenshotMaxWidth downscales wider screenshots, screenshotFormat is png or jpeg (screenshotQuality),
+    # screenshotSkipDuplicates skips (and logs) a screenshot identical to the previous one
+    "screenshotWriter": False,
+    "screenshotSkipDuplicates": False,
+    "screenshotMaxWidth": None,
+    "screenshotFormat": "png",
+    "screenshotQuality": 85,
+
+    # Remote downloads fetched at once by SeleniumBot.download_remote_files
+    "downloadWorkers": 4,
+
+    # Start chrome with the performance log so SeleniumBot.capture_responses reads every response
+    # of the page, not only fetch/XHR calls (those made while a page loads are seen either way on chrome)
+    "captureNetwork": False,
+
+    # Time every WebDriver command and add a round trip profile to the result.
+    # traceFile also writes a Chrome trace (chrome://tracing, Perfetto) to LOG_DIR
+    "traceCommands": False,
+    "traceFile": False,
+
+    # Collect Navigation and Resource Timing after each go_to_url and add a
+    # per run summary (slowest pages, hosts by resource time) to the result
+    "collectTimings": False,
+
+    # Archive page sources (BaseHandler.archive_page) to ARCHIVE_DIR/{trace_id},
+    # deduplicated and compressed with archiveCompression (zlib or lzma)
+    "archivePages": False,
+    "archiveCompression": "zlib",
+
+    # Keep a hash of each page (BaseHandler.page_changed, fetch_if_changed) in STORE_DIR so
+    # pages unchanged since the last successful run can be skipped. changeRegion is the
+    # CSS selector of the content that matters, defaults to the body
+    "changeDetection": False,
+    "changeRegion": None,
+
+    # Seconds a saved login session (BaseHandler.login) stays usable, None to rely on cookie expiry.
+    # Sessions are saved encrypted in STORE_DIR when SESSION_STORE_KEY is set
+    "sessionMaxAge": None,
+
     # See bots.common.parameters.py for available rules
     "parameters": {
         # "age": {
@@ -27,6 +95,11 @@ config = {
         # }
     },
 
+    # Extraction schema read by BaseHandler.extract, see seleniumbot.extraction.ExtractionSchema
+    "extract": {
+        # "title": {"selector": "h1", "transform": "trim"},
+    },
+
     # Other configs (e.g. selectors, xpaths)
 
 }
@@ -1,5 +1,7 @@
+import benchutilities
 import botutilities
 import gridutilities
+import selectorutilities
 import click
 
 
@@ -51,12 +53,46 @@ def deleteallsessions():
     gridutilities.delete_all_sessions()
 
 
+@click.command()
+@click.argument('url')
+@click.option('--selector', '-s', default='', help='CSS selector of the elements')
+@click.option('--xpath', '-x', default='', help='Xpath of the elements')
+@click.option('--attribute', '-a', default='', help='Attribute to extract, extracts text if empty')
+@click.option('--driver', default='chrome', help='Driver to benchmark on')
+@click.option('--repeat', '-r', default=3, help='Number of runs')
+def benchextract(url, **kwargs):
+    benchutilities.benchmark_extraction(url, **kwargs)
+
+
+@click.command()
+@click.option('--delay', default=1.0, help='Seconds before the element appears')
+@click.option('--driver', default='chrome', help='Driver to benchmark on')
+@click.option('--repeat', '-r', default=5, help='Number of runs per engine')
+def benchwaits(**kwargs):
+    benchutilities.benchmark_waits(**kwargs)
+
+
+@click.command()
+@click.argument('id')
+@click.option('--url', '-u', default='', help='Page to analyze, defaults to the bot mainUrl')
+@click.option('--source', '-s', default='', help='Saved page source file to analyze instead of a url')
+@click.option('--driver', default='chrome', help='Driver to time the locators on')
+@click.option('--repeat', '-r', default=5, help='Number of runs per locator')
+@click.option('--slow', default=5.0, help='Milliseconds from which a locator is slow')
+@click.option('--local-only', '-l', is_flag=True, default=False, help='Only time on the parsed page, without a browser')
+def analyzeselectors(id, **kwargs):
+    selectorutilities.analyze_selectors(id, **kwargs)
+
+
 cli.add_command(createbot)
 cli.add_command(runbot)
 cli.add_command(botinfo)
 cli.add_command(getactivesessions)
 cli.add_command(deletesession)
 cli.add_command(deleteallsessions)
+cli.add_command(benchextract)
+cli.add_command(benchwaits)
+cli.add_command(analyzeselectors)
 
 if __name__ == '__main__':
     cli()
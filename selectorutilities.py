@@ -0,0 +1,305 @@
+from benchutilities import get_bot, timeit
+from seleniumbot import Locator
+from seleniumbot.scripts import TIME_LOCATORS
+from seleniumbot.snapshot import DomSnapshot
+
+import importlib
+import re
+import requests
+import statistics
+
+
+XPATH_STEP = re.compile(r'(//?)([\w-]+|\*)((?:\[[^\[\]]*\])*)')
+XPATH_PREDICATE = re.compile(r'\[([^\[\]]*)\]')
+XPATH_ATTRIBUTE = re.compile(r'^@([\w-]+)$')
+XPATH_EQUALS = re.compile(r'''^@([\w-]+)\s*=\s*(['"])([^'"]*)\2$''')
+XPATH_FUNCTION = re.compile(r'''^(contains|starts-with)\(\s*@([\w-]+)\s*,\s*(['"])([^'"]*)\3\s*\)$''')
+XPATH_CLASS = re.compile(r'''^contains\(\s*concat\(\s*(['"]) \1\s*,\s*normalize-space\(\s*@class\s*\)\s*,\s*\1 \1\s*\)\s*,\s*\1 ([\w-]+) \1\s*\)$''')
+CSS_IDENTIFIER = re.compile(r'^[A-Za-z_][\w-]*$')
+LOCATOR_KEYS = ('selector', 'xpath')
+
+
+def collect_locators(config: dict, path: str = '', scope: tuple = ()) -> list[dict]:
+    """
+    Find the locators of a bot config: values of keys ending in Selector or Xpath,
+    and the selector/xpath of extraction schema fields (nested fields are relative to their parent)
+
+    :param config: Bot config or part of it
+    :param path: Key path of `config`
+    :param scope: Parent locators of `config`
+    :return: list of {name, locator, scope, many}
+    """
+    entries = []
+    for key, value in config.items():
+        name = f'{path}.{key}' if path else key
+        if isinstance(value, dict):
+            locator = None
+            if any(isinstance(value.get(locator_key), str) for locator_key in LOCATOR_KEYS):
+                locator = Locator(selector=value.get('selector'), xpath=value.get('xpath'))
+                entries.append({'name': name, 'locator': locator, 'scope': scope, 'many': bool(value.get('many'))})
+            fields = value.get('fields') if locator else value
+            if isinstance(fields, dict):
+                entries += collect_locators(fields, name, scope + (locator,) if locator else scope)
+        elif isinstance(value, str) and value and key.lower().endswith(LOCATOR_KEYS):
+            if key.lower().endswith('xpath'):
+                locator = Locator(xpath=value)
+            else:
+                locator = Locator(selector=value)
+            entries.append({'name': name, 'locator': locator, 'scope': scope, 'many': False})
+    return entries
+
+
+def xpath_to_css(xpath: str) -> str:
+    """
+    Translate an xpath made of tag, attribute, class and position steps to a CSS selector.
+    Text, axis and boolean predicates have no CSS equivalent.
+
+    :param xpath: Element xpath
+    :return: CSS selector, None if the xpath can not be expressed in CSS
+    """
+    xpath = xpath.strip()
+    prefix = ''
+    if xpath.startswith('./') and not xpath.startswith('.//'):
+        prefix = ':scope > '
+    if xpath.startswith('.'):
+        xpath = xpath[1:]
+    parts = []
+    position = 0
+    while position < len(xpath):
+        match = XPATH_STEP.match(xpath, position)
+        if not match:
+            return None
+        axis, tag, predicates = match.groups()
+        if not parts and axis == '/' and not prefix and tag != 'html':
+            return None
+        step = '' if tag == '*' else tag
+        for index, predicate in enumerate(XPATH_PREDICATE.findall(predicates)):
+            for condition in re.split(r'\s+and\s+', predicate.strip()):
+                css = translate_condition(condition.strip(), tag, index == 0)
+                if css is None:
+                    return None
+                step += css
+        if parts:
+            parts.append(' > ' if axis == '/' else ' ')
+        parts.append(step or '*')
+        position = match.end()
+    return prefix + ''.join(parts) if parts else None
+
+
+def translate_condition(condition: str, tag: str, first: bool) -> str:
+    """
+    Translate an xpath predicate condition to CSS
+
+    :param condition: Predicate condition, e.g. @id='main'
+    :param tag: Tag of the step
+    :param first: Whether the predicate is the first of the step
+    :return: CSS, None if the condition has no CSS equivalent
+    """
+    if condition.isdigit() or condition == 'last()':
+        # [n] counts siblings with the same tag only when it is the first predicate
+        if tag == '*' or not first:
+            return None
+        return ':last-of-type' if condition == 'last()' else f':nth-of-type({condition})'
+    if match := XPATH_CLASS.match(condition):
+        return f'.{match.group(2)}'
+    if match := XPATH_ATTRIBUTE.match(condition):
+        return f'[{match.group(1)}]'
+    if match := XPATH_EQUALS.match(condition):
+        name, value = match.group(1), match.group(3)
+        if name == 'id' and CSS_IDENTIFIER.match(value):
+            return f'#{value}'
+        return f'[{name}="{value}"]'
+    if match := XPATH_FUNCTION.match(condition):
+        operator = '*=' if match.group(1) == 'contains' else '^='
+        return f'[{match.group(2)}{operator}"{match.group(4)}"]'
+    return None
+
+
+def get_hints(locator: Locator) -> list[str]:
+    """
+    Spot locator patterns that are slow to evaluate
+
+    :param locator: Locator
+    :return: list of hints
+    """
+    hints = []
+    if not locator.is_xpath:
+        if re.search(r'\[[\w-]+[*$]=', locator.value):
+            hints.append('substring attribute match compares every candidate')
+        return hints
+    if 'text()' in locator.value or re.search(r'contains\(\s*\.', locator.value):
+        hints.append('text predicate reads the text of every candidate, anchor it on an id or class ancestor')
+    if re.match(r'^\.?//\*', locator.value):
+        hints.append('//* visits every element of the document')
+    if locator.value.count('//') > 1:
+        hints.append('several // steps each search a whole subtree')
+    if re.search(r'(preceding|following|ancestor)(-sibling)?::', locator.value):
+        hints.append('reverse and sibling axes have no CSS equivalent')
+    return hints
+
+
+def time_locally(snapshot: DomSnapshot, locator: Locator, scope: tuple, repeat: int = 5) -> dict:
+    """
+    Time a locator on a parsed page
+
+    :param snapshot: Parsed page
+    :param locator: Locator to time
+    :param scope: Parent locators
+    :param repeat: Number of runs
+    :return: dict of median milliseconds, total matches, most matches under one parent, matched elements
+    """
+    roots = [None]
+    for parent in scope:
+        roots = [element for root in roots for element in snapshot.get_elements(parent, dom=root)]
+    try:
+        seconds, matches = timeit(lambda: [snapshot.get_elements(locator, dom=root) for root in roots], repeat)
+    except Exception as e:
+        return {'error': str(e).splitlines()[0]}
+    return {
+        'median': seconds * 1000,
+        'count': sum(len(elements) for elements in matches),
+        'max': max((len(elements) for elements in matches), default=0),
+        'elements': [element for elements in matches for element in elements],
+    }
+
+
+def load_source(bot, source: str):
+    """
+    Load a saved page source into a blank page of the browser
+
+    :param bot: SeleniumBot
+    :param source: Page source
+    """
+    bot.go_to_url('about:blank')
+    bot.driver.execute_script('document.open(); document.write(arguments[0]); document.close();', source)
+
+
+def analyze_selectors(id: str, url: str = '', source: str = '', driver: str = 'chrome', repeat: int = 5, slow: float = 5.0, local_only: bool = False):
+    """
+    Time every locator of a bot config in the browser and on a locally parsed copy of the page.
+    Flags locators that are slow, match nothing or match several elements where one is expected,
+    and suggests a CSS selector for xpaths that have one (only when it matches the same elements).
+
+    :param id: Bot id
+    :param url: Page to analyze, defaults to the config mainUrl
+    :param source: Saved page source file to analyze instead of a url
+    :param driver: Driver name
+    :param repeat: Number of runs per locator
+    :param slow: Milliseconds from which a locator is slow
+    :param local_only: Only time locally, without starting a browser
+    """
+    try:
+        module = importlib.import_module(f'bots.{id}.botconfig')
+        config = getattr(module, 'config')
+    except ModuleNotFoundError:
+        print('Invalid bot id')
+        return
+    entries = collect_locators(config)
+    if not entries:
+        print(f'No locators found in bots/{id}/botconfig.py')
+        return
+    url = url or config.get('mainUrl', '')
+    if not url and not source:
+        print('A url or a page source file is required')
+        return
+    page_source = None
+    if source:
+        with open(source, 'r', encoding='utf-8') as file:
+            page_source = file.read()
+
+    bot = None
+    browser_results = []
+    try:
+        if not local_only:
+            bot = get_bot(driver)
+            if page_source is None:
+                bot.go_to_url(url)
+                page_source = bot.driver.page_source
+            else:
+                load_source(bot, page_source)
+        elif page_source is None:
+            page_source = requests.get(url, timeout=30).text
+        snapshot = DomSnapshot(page_source)
+
+        for entry in entries:
+            entry['local'] = time_locally(snapshot, entry['locator'], entry['scope'], repeat)
+            entry['hints'] = get_hints(entry['locator'])
+            entry['suggestion'] = None
+            if entry['locator'].is_xpath and 'elements' in entry['local']:
+                selector = xpath_to_css(entry['locator'].value)
+                if selector:
+                    suggestion = {'locator': Locator(selector=selector)}
+                    suggestion['local'] = time_locally(snapshot, suggestion['locator'], entry['scope'], repeat)
+                    if suggestion['local'].get('elements') == entry['local']['elements']:
+                        entry['suggestion'] = suggestion
+
+        if bot:
+            timed = []
+            for entry in entries:
+                scope = [list(parent.to_tuple()) for parent in entry['scope']]
+                for locator in (entry['locator'], entry['suggestion'] and entry['suggestion']['locator']):
+                    if locator:
+                        timed.append({'by': locator.by, 'value': locator.value, 'scope': scope})
+            browser_results = bot.driver.execute_script(TIME_LOCATORS, timed, repeat)
+    finally:
+        if bot:
+            bot.close()
+
+    results = iter(browser_results)
+    for entry in entries:
+        entry['browser'] = next(results, None)
+        if entry['suggestion']:
+            entry['suggestion']['browser'] = next(results, None)
+    print_report(entries, source or url, slow)
+
+
+def print_report(entries: list[dict], page: str, slow: float):
+    """
+    Print the analysis of each locator, worst first
+
+    :param entries: Analyzed locators
+    :param page: Analyzed url or file
+    :param slow: Milliseconds from which a locator is slow
+    """
+    def duration(timing: dict) -> str:
+        if not timing:
+            return '-'
+        if 'error' in timing:
+            return f'error: {timing["error"]}'
+        return f'{timing["median"]:.2f} ms'
+
+    def worst(entry: dict) -> float:
+        return max((entry[timing] or {}).get('median', 0) for timing in ('browser', 'local'))
+
+    lines = []
+    flagged = 0
+    for entry in sorted(entries, key=worst, reverse=True):
+        timing = entry['browser'] if entry['browser'] and 'count' in entry['browser'] else entry['local']
+        flags = []
+        if 'error' in entry['local'] or (entry['browser'] and 'error' in entry['browser']):
+            flags.append('invalid')
+        elif timing.get('count') == 0:
+            flags.append('no match')
+        elif not entry['many'] and timing.get('max', 0) > 1:
+            flags.append(f'ambiguous ({timing["max"]} matches)')
+        if worst(entry) >= slow:
+            flags.append('slow')
+        flagged += bool(flags)
+        lines.append(f'{entry["name"]}: {entry["locator"]}')
+        lines.append(f'    matches {timing.get("count", "-")}, browser {duration(entry["browser"])}, local {duration(entry["local"])}')
+        if flags:
+            lines.append(f'    flags: {", ".join(flags)}')
+        for hint in entry['hints']:
+            lines.append(f'    hint: {hint}')
+        if entry['suggestion']:
+            suggestion = entry['suggestion']
+            lines.append(f'    suggest: {suggestion["locator"]} (browser {duration(suggestion.get("browser"))}, local {duration(suggestion["local"])})')
+
+    medians = [entry['browser']['median'] for entry in entries if entry['browser'] and 'median' in entry['browser']]
+    total = f'{sum(medians):.2f} ms in browser' if medians else 'not timed in browser'
+    print(f'''Page: {page}
+Locators: {len(entries)}, flagged: {flagged}, {total}
+--------------------------------------
+''' + '\n'.join(lines))
+    if medians:
+        print(f'Browser median per locator: {statistics.median(medians):.2f} ms')
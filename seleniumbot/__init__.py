@@ -1 +1,3 @@
 from .bot import SeleniumBot
+from .asyncbot import AsyncSeleniumBot
+from .locator import Locator
@@ -0,0 +1,116 @@
+from .bot import SeleniumBot
+
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable
+
+import asyncio
+import threading
+
+
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers: int = 32) -> Executor:
+    """
+    Get the shared executor of a size running blocking SeleniumBot calls.  \n
+    Its size bounds how many WebDriver commands are in flight at once.
+    Callers asking for the same size share one executor.
+
+    :param max_workers: Executor size
+    :return: Executor
+    """
+    with _executor_lock:
+        if max_workers not in _executors:
+            _executors[max_workers] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'seleniumbot-{max_workers}')
+        return _executors[max_workers]
+
+
+class AsyncSeleniumBot:
+    def __init__(self, bot: SeleniumBot, executor: Executor = None) -> None:
+        """
+        Awaitable facade over a SeleniumBot.  \n
+        Every SeleniumBot method is available as a coroutine, e.g. `await bot.go_to_url(url)`.
+        Calls run on a bounded executor and are serialized per bot, since a WebDriver session
+        only handles one command at a time.
+
+        :param bot: SeleniumBot instance
+        :param executor: Executor to run blocking calls on, defaults to the shared executor
+        """
+        self.bot = bot
+        self.executor = executor or get_executor()
+        self._lock = asyncio.Lock()
+
+
+
+    @classmethod
+    async def create(cls, *args, executor: Executor = None, **kwargs) -> 'AsyncSeleniumBot':
+        """
+        Start a SeleniumBot without blocking the event loop.
+        Takes the same arguments as SeleniumBot.
+
+        :param executor: Executor to run blocking calls on, defaults to the shared executor
+        :return: AsyncSeleniumBot
+        """
+        executor = executor or get_executor()
+        loop = asyncio.get_running_loop()
+        bot = await loop.run_in_executor(executor, partial(SeleniumBot, *args, **kwargs))
+        return cls(bot, executor=executor)
+
+
+
+    async def run(self, function: Callable, *args, **kwargs):
+        """
+        Run a blocking function on the executor, serialized with the other calls on this bot
+
+        :param function: Function to run
+        :return: function result
+        """
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            return await loop.run_in_executor(self.executor, partial(function, *args, **kwargs))
+
+
+
+    async def iterate(self, method: str, *args, **kwargs) -> AsyncIterator:
+        """
+        Iterate a SeleniumBot generator method (e.g. scroll_items, scrape_urls) asynchronously
+
+        :param method: SeleniumBot method name
+        :return: AsyncIterator of the generator items
+        """
+        iterator = await self.run(lambda: iter(getattr(self.bot, method)(*args, **kwargs)))
+        done = object()
+        try:
+            while True:
+                item = await self.run(next, iterator, done)
+                if item is done:
+                    return
+                yield item
+        finally:
+            # run the generator's cleanup when the consumer stops early
+            if hasattr(iterator, 'close'):
+                await self.run(iterator.close)
+
+
+
+    async def close(self):
+        """
+        Close the bot
+        """
+        await self.run(self.bot.close)
+
+
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.bot, name)
+        if not callable(attribute):
+            return attribute
+
+        async def method(*args, **kwargs):
+            return await self.run(attribute, *args, **kwargs)
+
+        method.__name__ = name
+        method.__doc__ = attribute.__doc__
+        return method
@@ -7,31 +7,78 @@ from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.alert import Alert
 from selenium.common.exceptions import TimeoutException
 from selenium.common.exceptions import NoAlertPresentException
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.common.exceptions import JavascriptException
+from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import WebDriverException
+from selenium.common.exceptions import InvalidSelectorException
 from selenium.webdriver.remote.webelement import WebElement
 
+from . import scripts
+from .checkpoint import Checkpoint
 from .driverfactory import DriverFactory
+from .downloadmanager import DownloadManager, DownloadError
 from .dummylogger import DummyLogger
-from .enums import Driver
+from .enums import Driver, Pacing, WaitEngine
+from .extraction import ExtractionSchema
+from .httpsession import HttpSession
+from .gridscheduler import GridScheduler
+from .hedging import SessionLatencyTracker
+from .locator import Locator, ElementCache
+from .locatortimeouts import LocatorTimeouts
+from .networkcapture import NetworkCapture
+from .pacing import Pacer
+from .pagetiming import PageTimings
+from .screenshotwriter import ScreenshotWriter
+from .sessionstore import SessionStore
+from .snapshot import DomSnapshot
+from .tracing import CommandTracer
 from .proxyfactory import ProxyFactory
 from .proxyserver import ProxyServer
 
 from datetime import datetime
 from logging import Logger
+from typing import Callable, Iterable, Iterator, Union
+from urllib.parse import urlparse
 
+import json
 import time
-import random
 import signal
+import threading
+import uuid
 
 class SeleniumBot:
+    WAIT_STATES = ('present', 'absent', 'visible', 'invisible', 'clickable', 'selected')
+    WAIT_MODES = ('any', 'all')
+    COOKIE_KEYS = ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry', 'sameSite')
+    FALSE_STRINGS = ('', 'false', '0', 'off', 'no')
+
     def __init__(self, 
                  hub_url: str, 
-                 driver: Driver, 
+                 driver: Union[Driver, list[Driver]], 
                  download_path = 'temp/downloads',
                  page_timeout: int = 30,
                  timeout: int = 30,
                  window_size: tuple[int] = (1280, 720),
                  proxy: str = None,
                  disable_proxy_server: bool = False,
+                 schedule_sessions: bool = False,
+                 queue_timeout: float = 300,
+                 hedge_sessions: bool = False,
+                 session_stats_path: str = None,
+                 cache_elements: bool = True,
+                 pacing: Pacing = Pacing.HUMAN,
+                 pacing_distribution: str = 'uniform',
+                 pacing_scale: float = 1.0,
+                 wait_engine: WaitEngine = WaitEngine.DRIVER,
+                 screenshot_writer: ScreenshotWriter = None,
+                 download_workers: int = 4,
+                 capture_network: bool = False,
+                 trace_commands: bool = False,
+                 collect_timings: bool = False,
+                 locator_timeouts: LocatorTimeouts = None,
+                 page_load_strategy: str = 'normal',
+                 navigation_budget: float = None,
                  logger: Logger = None,
                  debug: bool = False,
                  **kwargs
@@ -40,13 +87,30 @@ class SeleniumBot:
         Initialize a selenium bot instance
 
         :param hub_url: Selenium Grid hub url
-        :param driver: Driver enum
+        :param driver: Driver enum or list of allowed drivers
         :param download_path: Driver download path
         :param page_timeout: Page timeout
         :param timeout: Timeout to wait for elements
         :param window_size: Initial browser window size
         :param proxy: Botproxy enum or proxy url
         :param disable_proxy_server: Disable built-in proxy server
+        :param schedule_sessions: Wait locally for a free grid slot instead of queueing on the hub
+        :param queue_timeout: Seconds to wait for a free grid slot
+        :param hedge_sessions: Send a second session request when the first one is slow
+        :param session_stats_path: Json file to keep session start latencies in
+        :param cache_elements: Reuse located element handles in `with_element` until the next navigation
+        :param pacing: Pacing enum, fast replaces fixed delays with condition waits
+        :param pacing_distribution: Human pacing delay distribution (uniform, normal, lognormal)
+        :param pacing_scale: Human pacing delay multiplier
+        :param wait_engine: WaitEngine enum, browser resolves waits in the page instead of polling
+        :param screenshot_writer: Background writer for saved screenshots
+        :param download_workers: Remote files fetched at once
+        :param capture_network: Start chrome with the performance log, so captured responses include page loads
+        :param trace_commands: Time every WebDriver command, see `tracer`
+        :param collect_timings: Collect the page load timing after each navigation, see `page_timings`
+        :param locator_timeouts: Learn per-locator wait deadlines instead of always waiting `timeout`
+        :param page_load_strategy: normal, eager (driver.get returns at DOMContentLoaded, so `navigate` can stop early) or none
+        :param navigation_budget: Total seconds `navigate` may spend over the bot run
         :param logger: Logger instance
         :param debug: Turn on verbose logging 
 
@@ -57,6 +121,31 @@ class SeleniumBot:
         self.download_path = download_path
         self.logger = logger or DummyLogger()
         self.proxy_server = None
+        self.element_cache = ElementCache(enabled=cache_elements)
+        self.screenshot_writer = screenshot_writer
+        self.extractors = {}
+        self._snapshot = None
+        self.download_workers = download_workers
+        self._download_manager = None
+        self._http_session = None
+        self.page_timings = PageTimings(logger=self.logger) if collect_timings else None
+        self.script_timeout = 30
+        self.timeout = timeout
+        self.page_timeout = page_timeout
+        self.page_load_strategy = page_load_strategy
+        self.navigation_budget = navigation_budget
+        self.navigation_stats = {
+            'navigations': 0,
+            'attempts': 0,
+            'failures': 0,
+            'early_stops': 0,
+            'rotations': 0,
+            'seconds': 0.0,
+        }
+        self.proxy_rotator: Callable[[], bool] = None
+        self.locator_timeouts = locator_timeouts
+        self.wait_engine = WaitEngine(wait_engine)
+        self.pacer = Pacer(pacing, distribution=pacing_distribution, scale=pacing_scale, logger=self.logger)
         if not disable_proxy_server and proxy:
             self.logger.info('Starting bot built-in proxy server')
             proxy_factory = ProxyFactory(logger=self.logger)
@@ -64,14 +153,25 @@ class SeleniumBot:
             proxy_factory.set_proxymesh_password(kwargs.get('proxymesh_password'))
             bot_proxy = proxy_factory.get_proxy(proxy)
             self.proxy_server = ProxyServer(bot_proxy, logger=self.logger, debug=debug)
+            self.proxy_rotator = lambda bot_proxy=proxy: self.proxy_server.rotate_upstream(proxy_factory.get_proxies(bot_proxy))
             proxy_server_port = self.proxy_server.start()
             proxy = f'http://runner:{proxy_server_port}'
+        self.proxy = proxy
         driver_factory = DriverFactory(logger=self.logger, window_size=window_size)
         driver_factory.set_hub_url(hub_url)
-        self.driver = driver_factory.get_driver(driver, proxy=proxy)
+        driver_factory.set_network_log(capture_network)
+        driver_factory.set_page_load_strategy(page_load_strategy)
+        if schedule_sessions:
+            driver_factory.set_scheduler(GridScheduler.for_hub(hub_url, logger=self.logger))
+        if hedge_sessions:
+            driver_factory.set_hedge(True, SessionLatencyTracker(session_stats_path, logger=self.logger))
+        self.driver = driver_factory.get_driver(driver, proxy=proxy, queue_timeout=queue_timeout)
+        self.session_timings = driver_factory.timings
+        self.tracer = CommandTracer(self.driver, logger=self.logger).install() if trace_commands else None
         self.driver.set_page_load_timeout(page_timeout)
         self.driver_wait = WebDriverWait(self.driver, timeout)
-        signal.signal(signal.SIGINT, lambda signum, frame: self.close())
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, lambda signum, frame: self.close())
 
     def close(self):
         """
@@ -80,6 +180,14 @@ class SeleniumBot:
         """
         if self.proxy_server:
             self.proxy_server.stop()
+        if self.screenshot_writer:
+            self.screenshot_writer.close()
+        if self._download_manager:
+            self._download_manager.close()
+        if self._http_session:
+            self._http_session.close()
+        if self.locator_timeouts:
+            self.locator_timeouts.save()
         if hasattr(self, 'driver'):
             self.driver.quit()
 
@@ -92,397 +200,466 @@ class SeleniumBot:
         """
         return dom if dom else self.driver
 
-    def get_element(self, selector: str = None, xpath: str = None, dom=None) -> WebElement:
+    def invalidate_elements(self):
         """
-        Gets an element
+        Drop the cached element handles and page snapshot. Called on navigation, frame and tab switch.
+        """
+        self.element_cache.clear()
+        self._snapshot = None
+
+    def snapshot(self, dom=None, refresh: bool = False) -> DomSnapshot:
+        """
+        Gets a local copy of the page for querying without round trips.
+        The page snapshot is taken in one transfer, parsed on first use and reused until the next navigation.
+
+        :param dom: the base element, to snapshot only its subtree (not reused)
+        :param refresh: Take a new page snapshot
+        :return: DomSnapshot
+        """
+        if dom is not None:
+            return DomSnapshot(dom.get_attribute('outerHTML'))
+        if self._snapshot is None or refresh:
+            self._snapshot = DomSnapshot(self.driver.page_source)
+        return self._snapshot
+
+    def get_element(self, selector: Union[str, Locator] = None, xpath: str = None, dom=None) -> WebElement:
+        """
+        Gets an element. It is always located again, so the handle is never stale;
+        the handle is cached for the actions run through `with_element`.
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         :return: WebElement
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        if selector:
-            criteria = By.CSS_SELECTOR
-            locator = selector
-        else:
-            criteria = By.XPATH
-            locator = xpath
+        locator = Locator.resolve(selector, xpath)
+        element = self.get_el(dom).find_element(*locator.to_tuple())
+        self.element_cache.set(locator, element, dom)
+        return element
 
-        return self.get_el(dom).find_element(criteria, locator)
-
-    def get_elements(self, selector: str = None, xpath: str = None, dom=None) -> list[WebElement]:
+    def get_elements(self, selector: Union[str, Locator] = None, xpath: str = None, dom=None) -> list[WebElement]:
         """
         Gets an element
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         :return: WebElement
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        if selector:
-            criteria = By.CSS_SELECTOR
-            locator = selector
-        else:
-            criteria = By.XPATH
-            locator = xpath
-
-        return self.get_el(dom).find_elements(criteria, locator)
+        locator = Locator.resolve(selector, xpath)
+        return self.get_el(dom).find_elements(*locator.to_tuple())
 
-    def does_element_exist(self, selector: str = None, xpath: str = None, dom=None) -> bool:
+    def does_element_exist(self, selector: Union[str, Locator] = None, xpath: str = None, dom=None) -> bool:
         """
         Checks if selector exists from the DOM or driver
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
-
-        try:
-            self.get_element(**locator, dom=dom)
-            return True
-        except:
+        locator = Locator.resolve(selector, xpath)
+        elements = self.get_el(dom).find_elements(*locator.to_tuple())
+        if not elements:
+            self.element_cache.evict(locator, dom)
             return False
-        
-    def wait_to_be_clickable(self, selector: str = None, xpath: str = None) -> bool:
+        self.element_cache.set(locator, elements[0], dom)
+        return True
+
+    def with_element(self, action, selector: Union[str, Locator] = None, xpath: str = None, dom=None):
         """
-        Wait for an element to be clickable. 
+        Run an action on an element, reusing its cached handle (kept until the next navigation)
+        and locating it again once if the handle went stale.
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param action: Function receiving the WebElement
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
-        :return: clickable
+        :param dom: the base element
+        :return: action result
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        if selector:
-            criteria = By.CSS_SELECTOR
-            locator = selector
-        else:
-            criteria = By.XPATH
-            locator = xpath
-
+        locator = Locator.resolve(selector, xpath)
+        element = self.element_cache.get(locator, dom)
+        if element is None:
+            return action(self.get_element(locator, dom=dom))
         try:
-            self.driver_wait.until(EC.element_to_be_clickable((criteria, locator)))
-            return True
-        except TimeoutException:
-            return False
+            return action(element)
+        except StaleElementReferenceException:
+            self.element_cache.evict(locator, dom)
+            return action(self.get_element(locator, dom=dom))
 
-    def wait_to_be_selectable(self, selector: str = None, xpath: str = None):
+    def get_wait_timeout(self, locator: Locator, state: str) -> float:
         """
-        Wait for an element to be selectable. 
+        Gets the wait deadline of a locator: learned from past waits with `locator_timeouts`, the bot timeout otherwise
+
+        :param locator: Locator waited on
+        :param state: Wait state, e.g. visible
+        :return: timeout in seconds
+        """
+        if not self.locator_timeouts:
+            return self.timeout
+        return self.locator_timeouts.get_timeout(locator, state, self.timeout)
+
+    def __record_wait(self, locator: Locator, state: str, start_time: float, found: bool, timeout: float):
+        if not self.locator_timeouts:
+            return
+        if found:
+            self.locator_timeouts.record(locator, state, time.time() - start_time)
+        else:
+            self.locator_timeouts.record_miss(locator, state, learned=timeout < self.timeout)
+
+    def wait_to_be_clickable(self, selector: Union[str, Locator] = None, xpath: str = None) -> bool:
+        """
+        Wait for an element to be clickable.
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
-        :return: selectable
+        :return: clickable
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        if selector:
-            criteria = By.CSS_SELECTOR
-            locator = selector
+        locator = Locator.resolve(selector, xpath)
+        timeout = self.get_wait_timeout(locator, 'clickable')
+        start_time = time.time()
+        if self.wait_engine == WaitEngine.BROWSER:
+            clickable = self.wait_for((locator, 'clickable'), timeout=timeout) is not None
         else:
-            criteria = By.XPATH
-            locator = xpath
+            try:
+                element = WebDriverWait(self.driver, timeout).until(EC.element_to_be_clickable(locator.to_tuple()))
+                self.element_cache.set(locator, element)
+                clickable = True
+            except TimeoutException:
+                clickable = False
+        self.__record_wait(locator, 'clickable', start_time, clickable, timeout)
+        return clickable
+
+    def wait_to_be_selectable(self, selector: Union[str, Locator] = None, xpath: str = None):
+        """
+        Wait for an element to be selectable.
+        Selector or xpath must be supplied (selector takes precendence)
 
+        :param selector: CSS selector or Locator
+        :param xpath: Element xpath
+        :return: selectable
+        """
+        locator = Locator.resolve(selector, xpath)
+        timeout = self.get_wait_timeout(locator, 'selected')
+        start_time = time.time()
         try:
-            return self.driver_wait.until(EC.element_to_be_selected((criteria, locator)))
+            selectable = WebDriverWait(self.driver, timeout).until(EC.element_located_to_be_selected(locator.to_tuple()))
         except TimeoutException:
-            return None
+            selectable = None
+        self.__record_wait(locator, 'selected', start_time, selectable is not None, timeout)
+        return selectable
 
-    def wait_to_be_visible(self, selector: str = None, xpath: str = None):
+    def wait_to_be_visible(self, selector: Union[str, Locator] = None, xpath: str = None):
         """
-        Wait for an element to be loaded in the page. 
+        Wait for an element to be loaded in the page.
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :return: visible
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        if selector:
-            criteria = By.CSS_SELECTOR
-            locator = selector
+        locator = Locator.resolve(selector, xpath)
+        timeout = self.get_wait_timeout(locator, 'visible')
+        start_time = time.time()
+        if self.wait_engine == WaitEngine.BROWSER:
+            elements = self.wait_for((locator, 'visible'), timeout=timeout)
+            element = elements[0] if elements else None
         else:
-            criteria = By.XPATH
-            locator = xpath
-
-        try:
-            return self.driver_wait.until(EC.visibility_of_element_located((criteria, locator)))
-        except TimeoutException:
-            return None
+            try:
+                element = WebDriverWait(self.driver, timeout).until(EC.visibility_of_element_located(locator.to_tuple()))
+                self.element_cache.set(locator, element)
+            except TimeoutException:
+                element = None
+        self.__record_wait(locator, 'visible', start_time, element is not None, timeout)
+        return element
 
-    def wait_to_be_invisible(self, selector: str = None, xpath: str = None):
+    def wait_to_be_invisible(self, selector: Union[str, Locator] = None, xpath: str = None):
         """
-        Wait for an element to be unloaded in the page. 
+        Wait for an element to be unloaded in the page.
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :return: invisible
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        if selector:
-            criteria = By.CSS_SELECTOR
-            locator = selector
+        locator = Locator.resolve(selector, xpath)
+        timeout = self.get_wait_timeout(locator, 'invisible')
+        start_time = time.time()
+        if self.wait_engine == WaitEngine.BROWSER:
+            elements = self.wait_for((locator, 'invisible'), timeout=timeout)
+            invisible = None if elements is None else (elements[0] or True)
         else:
-            criteria = By.XPATH
-            locator = xpath
-
-        try:
-            return self.driver_wait.until(EC.invisibility_of_element_located((criteria, locator)))
-        except TimeoutException:
+            try:
+                invisible = WebDriverWait(self.driver, timeout).until(EC.invisibility_of_element_located(locator.to_tuple()))
+            except TimeoutException:
+                invisible = None
+        self.__record_wait(locator, 'invisible', start_time, invisible is not None, timeout)
+        return invisible
+
+    def wait_for(self, *conditions: tuple, mode: str = 'any', timeout: float = None) -> list:
+        """
+        Wait in the browser for any or all of several element conditions, in one round trip.
+        Resolves on the first DOM change (or animation frame) where the conditions hold instead of
+        polling from the client.
+
+        States: present, absent, visible, invisible, clickable, selected
+
+        :param conditions: (selector or Locator, state) tuples
+        :param mode: 'any' or 'all'
+        :param timeout: Seconds to wait, defaults to the bot timeout
+        :return: list with the element (or None) of each condition, None on timeout
+        :raises: InvalidSelectorException if a selector or xpath is invalid
+        """
+        if mode not in self.WAIT_MODES:
+            raise Exception(f'Unknown wait mode {mode}, expected one of {self.WAIT_MODES}')
+        locators = []
+        specs = []
+        for selector, state in conditions:
+            if state not in self.WAIT_STATES:
+                raise Exception(f'Unknown wait state {state}, expected one of {self.WAIT_STATES}')
+            locator = Locator.resolve(selector)
+            locators.append(locator)
+            specs.append({'by': locator.by, 'value': locator.value, 'state': state})
+
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.time() + timeout
+        while True:
+            remaining = max(deadline - time.time(), 0)
+            self.ensure_script_timeout(remaining + 10)
+            try:
+                result = self.driver.execute_async_script(scripts.WAIT_FOR, specs, mode, int(remaining * 1000))
+                break
+            except JavascriptException as e:
+                # The document was unloaded while waiting, wait again on the new document
+                if 'unload' not in (e.msg or '').lower():
+                    raise
+                if time.time() >= deadline:
+                    return None
+
+        if result.get('error'):
+            raise InvalidSelectorException(result['error'])
+        if not result.get('ok'):
             return None
+        elements = result.get('elements') or [None] * len(locators)
+        for locator, element in zip(locators, elements):
+            self.element_cache.set(locator, element)
+        return elements
 
-    def fill_input(self, fill_string: str, selector: str = None, xpath: str = None, dom=None):
+    def fill_input(self, fill_string: str, selector: Union[str, Locator] = None, xpath: str = None, dom=None):
         """
         Fills the selector with the string provided. Ths will work for input text boxes.
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
-
-        self.get_element(**locator, dom=dom).send_keys(fill_string)
+        self.with_element(lambda element: element.send_keys(fill_string), selector, xpath, dom)
 
-    def clear_input(self, selector: str = None, xpath: str = None, dom=None):
+    def clear_input(self, selector: Union[str, Locator] = None, xpath: str = None, dom=None):
         """
         Clears the field value. This will work for input text boxes.
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
-
-        self.get_element(**locator, dom=dom).clear()
+        self.with_element(lambda element: element.clear(), selector, xpath, dom)
 
-    def hit_enter_to_input(self, selector: str = None, xpath: str = None, dom=None):
+    def hit_enter_to_input(self, selector: Union[str, Locator] = None, xpath: str = None, dom=None):
         """
-        Hits the enter key for the input field.
+        Hits the enter key for the input field. Cached elements are dropped since it may submit a form.
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
-
-        self.get_element(**locator, dom=dom).send_keys(Keys.RETURN)
+        self.with_element(lambda element: element.send_keys(Keys.RETURN), selector, xpath, dom)
+        self.invalidate_elements()
 
-    def click_element(self, selector: str = None, xpath: str = None, dom=None):
+    def click_element(self, selector: Union[str, Locator] = None, xpath: str = None, dom=None):
         """
-        Clicks an element.
+        Clicks an element. Cached elements are dropped since the click may navigate.
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
-
-        self.get_element(**locator, dom=dom).click()
+        self.with_element(lambda element: element.click(), selector, xpath, dom)
+        self.invalidate_elements()
 
-    def right_click_element(self, selector: str = None, xpath: str = None, dom=None):
+    def right_click_element(self, selector: Union[str, Locator] = None, xpath: str = None, dom=None):
         """
         Right-clicks an element.
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
+        self.with_element(
+            lambda element: ActionChains(self.driver).context_click(element).perform(),
+            selector, xpath, dom
+        )
+        self.pacer.pause(1, 3)
 
-        element = self.get_element(**locator, dom=dom)
-        ActionChains(self.driver).context_click(element).pause(random.randint(1, 3)).perform()
-
-    def control_click_element(self, selector: str = None, xpath: str = None, dom=None):
+    def control_click_element(self, selector: Union[str, Locator] = None, xpath: str = None, dom=None):
         """
         Control + click an element.
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
-
-        element = self.get_element(**locator, dom=dom)
-        ActionChains(self.driver).key_down(Keys.CONTROL).click(element).key_up(Keys.CONTROL).perform()
+        self.with_element(
+            lambda element: ActionChains(self.driver).key_down(Keys.CONTROL).click(element).key_up(Keys.CONTROL).perform(),
+            selector, xpath, dom
+        )
 
-    def set_single_select_value(self, value: str = "", selector: str = None, xpath: str = None, dom=None):
+    def set_single_select_value(self, value: str = "", selector: Union[str, Locator] = None, xpath: str = None, dom=None):
         """
         Sets the dropdown value by option value.
         Selector or xpath must be supplied (selector takes precendence)
 
         :param value: Option value to set
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
-
-        el = self.get_element(**locator, dom=dom)
-        drop_down = Select(el)
-        drop_down.select_by_value(value)
+        self.with_element(lambda element: Select(element).select_by_value(value), selector, xpath, dom)
 
-    def set_single_select_by_label(self, label: str, selector: str = None, xpath: str = None, dom=None):
+    def set_single_select_by_label(self, label: str, selector: Union[str, Locator] = None, xpath: str = None, dom=None):
         """
         Sets the dropdown value by option label.
         Selector or xpath must be supplied (selector takes precendence)
 
         :param label: Option value to set
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
+        locator = Locator.resolve(selector, xpath)
         try:
-            el = self.get_element(**locator, dom=dom)
-            drop_down = Select(el)
-            drop_down.select_by_visible_text(label)
+            self.with_element(lambda element: Select(element).select_by_visible_text(label), locator, dom=dom)
         except Exception as e:
             pass
 
-    def set_multiple_select_by_value(self, values: list[str], selector: str = None, xpath: str = None, dom=None):
+    def set_multiple_select_by_value(self, values: list[str], selector: Union[str, Locator] = None, xpath: str = None, dom=None):
         """
-        Sets the dropdown value by option value.
+        Selects dropdown options by option value, in one round trip. Options already selected stay selected.
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param value: Option value to set
-        :param selector: CSS selector
+        :param values: Option values to select
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
+        locator = Locator.resolve(selector, xpath)
+        self.__fill_fields([self.__form_field(locator, list(values), match='value', additive=True)], dom)
 
-        el = self.get_element(**locator, dom=dom)
-        drop_down = Select(el)
-        for x in values:
-            drop_down.select_by_value(x)
-
-    def set_multiple_select_by_label(self, labels: list[str], selector: str = None, xpath: str = None, dom=None):
+    def set_multiple_select_by_label(self, labels: list[str], selector: Union[str, Locator] = None, xpath: str = None, dom=None):
         """
-        Sets the dropdown value by option value.
+        Selects dropdown options by option label, in one round trip. Options already selected stay selected.
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param value: Option value to set
-        :param selector: CSS selector
+        :param labels: Option labels to select
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
+        locator = Locator.resolve(selector, xpath)
+        self.__fill_fields([self.__form_field(locator, list(labels), match='label', additive=True)], dom)
+
+    def fill_form(self, mapping: dict, dom=None, keystrokes: Iterable[Union[str, Locator]] = ()):
+        """
+        Fills a form in one round trip.
+        Text fields are set with their native value setter followed by input and change events,
+        selects take an option value or label (a list for multiple selects), checkboxes a bool
+        (or a string, where "false", "0", "off", "no" and "" uncheck), and radios the value to pick (or a bool for the matched radio). Fields set to None are skipped.
+        File inputs, contenteditable elements, fields listed in `keystrokes` and inputs that reject
+        the scripted value are filled with real keystrokes instead.
 
-        el = self.get_element(selector, dom)
-        drop_down = Select(el)
-        for x in labels:
-            drop_down.select_by_visible_text(x)
+        :Example:
+
+        >>> bot.fill_form({
+        ...     '#first-name': 'Jane',
+        ...     '#country': 'Canada',
+        ...     '#newsletter': True,
+        ...     'input[name="plan"]': 'pro',
+        ...     Locator(xpath='//input[@type="file"]'): '/tmp/resume.pdf',
+        ... })
+
+        :param mapping: Dict of {CSS selector or Locator: value}
+        :param dom: the base element
+        :param keystrokes: Selectors or Locators of fields to always type into
+        :raises: NoSuchElementException if a field or option is missing
+        """
+        keystrokes = {Locator.resolve(selector) for selector in keystrokes}
+        fields = []
+        for selector, value in mapping.items():
+            if value is None:
+                continue
+            locator = Locator.resolve(selector)
+            fields.append(self.__form_field(locator, value, keys=locator in keystrokes))
+        self.__fill_fields(fields, dom)
+
+    def __form_field(self, locator: Locator, value, match: str = 'auto', additive: bool = False, keys: bool = False) -> tuple[Locator, dict]:
+        if isinstance(value, tuple):
+            value = list(value)
+        if isinstance(value, str):
+            # config values are often strings, "false" or "0" must not check a checkbox
+            checked = value.strip().lower() not in self.FALSE_STRINGS
+        else:
+            checked = bool(value)
+        return locator, {
+            'by': locator.by,
+            'value': locator.value,
+            'data': value,
+            'checked': checked,
+            'match': match,
+            'additive': additive,
+            'keys': keys,
+        }
+
+    def __fill_fields(self, fields: list[tuple[Locator, dict]], dom=None):
+        """
+        Fill form fields with the FILL_FORM script, typing into the fields it hands back
+
+        :param fields: list of (Locator, field spec)
+        :param dom: the base element
+        """
+        if not fields:
+            return
+        results = self.driver.execute_script(scripts.FILL_FORM, [field for _, field in fields], dom)
+        errors = []
+        for (locator, field), result in zip(fields, results):
+            if result['status'] == 'missing':
+                errors.append(f'No element matching {locator}')
+            elif result['status'] == 'option':
+                errors.append(f'No option {result["missing"]!r} in {locator}')
+            elif result['status'] == 'keys':
+                element = result['element']
+                if result['clear']:
+                    element.clear()
+                element.send_keys(str(field['data']))
+        if errors:
+            raise NoSuchElementException('; '.join(errors))
 
     def accept_alert(self):
         """
         Accepts the alert if present
         """
-        time.sleep(1)
+        self.pacer.pause(1)
         try:
-            if EC.alert_is_present:
-                Alert(self.driver).accept()
+            Alert(self.driver).accept()
         except NoAlertPresentException:
             return
 
@@ -493,123 +670,161 @@ class SeleniumBot:
         :return: returns True if there is at least 1
         """
 
-        time.sleep(1)
-        if EC.alert_is_present is not False:
+        self.pacer.pause(1)
+        if EC.alert_is_present()(self.driver) is not False:
             return True
         else:
             return False
 
     def check_for_alert(self):
         """
-        Checks if alert is present
+        Checks if alert is present, waiting up to 3 seconds for one in human pacing
 
         :return: returns True if there is at least 1
         """
 
-        time.sleep(1)
+        if self.pacer.is_fast:
+            return EC.alert_is_present()(self.driver) is not False
+        self.pacer.pause(1)
         try:
             WebDriverWait(self.driver, 3).until(EC.alert_is_present())
             return True
         except TimeoutException:
             return False
 
-    def get_inner_text(self, selector: str = None, xpath: str = None, dom=None) -> str:
+    def get_inner_text(self, selector: Union[str, Locator] = None, xpath: str = None, dom=None) -> str:
         """
         Gets an element text value.
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
+        return self.with_element(lambda element: element.text, selector, xpath, dom)
 
-        return self.get_element(**locator, dom=dom).text
-
-    def get_dropdown_text(self, selector: str = None, xpath: str = None, dom=None) -> str:
+    def get_dropdown_text(self, selector: Union[str, Locator] = None, xpath: str = None, dom=None) -> str:
         """
         Gets the dropdown selected text
         Selector or xpath must be supplied (selector takes precendence)
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
+        return self.with_element(lambda element: Select(element).first_selected_option.text, selector, xpath, dom)
 
-        select = Select(self.get_element(**locator, dom=dom))
-        selected_option = select.first_selected_option
-        return selected_option.text
-    
-    def get_attribute(self, attribute: str, selector: str = None, xpath: str = None, dom=None) -> str:
+    def get_attribute(self, attribute: str, selector: Union[str, Locator] = None, xpath: str = None, dom=None) -> str:
         """
         Gets the src of an element
         Selector or xpath must be supplied (selector takes precendence)
 
         :param attribute: Element attribute to retrieve
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
+        return self.with_element(lambda element: element.get_attribute(attribute), selector, xpath, dom)
+
+    def get_texts(self, selector: Union[str, Locator] = None, xpath: str = None, dom=None) -> list[str]:
+        """
+        Gets the text of every matching element in one round trip.
+        Selector or xpath must be supplied (selector takes precendence)
+
+        :param selector: CSS selector or Locator
+        :param xpath: Element xpath
+        :param dom: the base element, for elements relative to a parent
+        :return: list of texts
+        """
+        return self.__bulk_extract('text', None, selector, xpath, dom)
+
+    def get_attributes(self, attributes: Union[str, list[str]], selector: Union[str, Locator] = None, xpath: str = None, dom=None) -> list:
+        """
+        Gets attributes of every matching element in one round trip.
+        Selector or xpath must be supplied (selector takes precendence)
+
+        :param attributes: Attribute name, or list of attribute names
+        :param selector: CSS selector or Locator
+        :param xpath: Element xpath
+        :param dom: the base element, for elements relative to a parent
+        :return: list of values, or list of {attribute: value} dicts if a list of attributes is given
+        """
+        return self.__bulk_extract('attribute', attributes, selector, xpath, dom)
+
+    def get_properties(self, properties: Union[str, list[str]], selector: Union[str, Locator] = None, xpath: str = None, dom=None) -> list:
+        """
+        Gets DOM properties (e.g. value, checked, href) of every matching element in one round trip.
+        Selector or xpath must be supplied (selector takes precendence)
 
-        return self.get_element(**locator, dom=dom).get_attribute(attribute)
+        :param properties: Property name, or list of property names
+        :param selector: CSS selector or Locator
+        :param xpath: Element xpath
+        :param dom: the base element, for elements relative to a parent
+        :return: list of values, or list of {property: value} dicts if a list of properties is given
+        """
+        return self.__bulk_extract('property', properties, selector, xpath, dom)
+
+    def __bulk_extract(self, kind: str, names, selector=None, xpath=None, dom=None) -> list:
+        locator = Locator.resolve(selector, xpath)
+        if isinstance(names, tuple):
+            names = list(names)
+        return self.driver.execute_script(scripts.BULK_EXTRACT, locator.by, locator.value, dom, kind, names)
+
+    def get_extractor(self, schema: Union[dict, ExtractionSchema]) -> ExtractionSchema:
+        """
+        Gets the compiled extractor of a schema. Extractors are compiled once per bot.
+
+        :param schema: Extraction schema dict or compiled ExtractionSchema
+        :return: ExtractionSchema
+        """
+        if isinstance(schema, ExtractionSchema):
+            return schema
+        key = json.dumps(schema, sort_keys=True)
+        if key not in self.extractors:
+            self.extractors[key] = ExtractionSchema(schema)
+        return self.extractors[key]
 
-    def set_attribute(self, attribute: str, value: str, selector: str = None, xpath: str = None, dom=None):
+    def extract(self, schema: Union[dict, ExtractionSchema], dom=None):
+        """
+        Extracts a typed record from the page in one round trip.
+        See ExtractionSchema for the schema format.
+
+        :param schema: Extraction schema dict or compiled ExtractionSchema
+        :param dom: the base element, defaults to the document
+        :return: Record model instance
+        """
+        extractor = self.get_extractor(schema)
+        return extractor.parse(self.driver.execute_script(extractor.script, dom))
+
+    def set_attribute(self, attribute: str, value: str, selector: Union[str, Locator] = None, xpath: str = None, dom=None):
         """
         Sets an attribute value for an element
         Selector or xpath must be supplied (selector takes precendence)
 
         :param value: Option value to set
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param xpath: Element xpath
         :param dom: the base element
         """
-        if not selector and not xpath:
-            raise Exception("No selector or xpath supplied")
-        
-        locator = {}
-        if selector:
-            locator['selector'] = selector
-        else:
-            locator['xpath'] = xpath
-
-        element = self.get_element(**locator, dom=dom)
-        return self.driver.execute_script("arguments[0].setAttribute('{}','{}')".format(attribute, value), element)
+        return self.with_element(
+            lambda element: self.driver.execute_script("arguments[0].setAttribute(arguments[1], arguments[2])", element, attribute, value),
+            selector, xpath, dom
+        )
 
-    def remove_element_attribute(self, attribute: str, el=None, selector: str = "", dom=None):
+    def remove_element_attribute(self, attribute: str, el=None, selector: Union[str, Locator] = "", dom=None):
         """
-        Synchronously Executes JavaScript in the current window/frame.
+        Removes an attribute from an element
 
-        :param _command: The JavaScript to execute.
-        :param args: Any applicable arguments for your JavaScript.
-        :return:
+        :param attribute: Element attribute to remove
+        :param el: the element, looked up by selector if not supplied
+        :param selector: CSS selector or Locator
+        :param dom: the base element
         """
+        script = "arguments[0].removeAttribute(arguments[1])"
+        if el:
+            return self.driver.execute_script(script, el, attribute)
+        return self.with_element(lambda element: self.driver.execute_script(script, element, attribute), selector, dom=dom)
 
-        element = el if el else self.get_element(selector, dom)
-        return self.driver.execute_script("arguments[0].removeAttribute('{}')".format(attribute), element)
-    
     def get_screen_shot(self) -> str:
         """
         Gets the screen shot of the current view as BASE64
@@ -620,11 +835,15 @@ class SeleniumBot:
 
     def save_screenshot(self, file_name: str):
         """
-        Saves the screenshot as file
+        Saves the screenshot as file.
+        With a screenshot writer the file is written in the background, relative to its directory.
 
         :param file_name:
         """
-        self.driver.get_screenshot_as_file(file_name)
+        if self.screenshot_writer:
+            self.screenshot_writer.submit(self.driver.get_screenshot_as_base64(), file_name)
+        else:
+            self.driver.get_screenshot_as_file(file_name)
 
     def maximize_window(self):
         """
@@ -653,6 +872,7 @@ class SeleniumBot:
 
         :return:
         """
+        self.invalidate_elements()
         self.driver.back()
 
     def go_to_url(self, url: str):
@@ -661,7 +881,277 @@ class SeleniumBot:
 
         :return:
         """
+        self.invalidate_elements()
         self.driver.get(url)
+        if self.page_timings:
+            self.collect_page_timing()
+
+    def navigate(self,
+                 url: str,
+                 ready: Iterable[Union[str, Locator]] = (),
+                 budget: float = None,
+                 attempts: int = 3,
+                 backoff: float = 1.0,
+                 rotate_proxy: bool = False,
+                 ) -> bool:
+        """
+        Go to a url within a time budget, retrying slow or failed loads with exponential backoff.
+        The budget is split across the attempts left, each capped at the page timeout, and is also
+        bounded by what remains of the bot `navigation_budget`.  \n
+        With `ready` locators the page counts as loaded once they are all present and the rest of the
+        load is stopped (window.stop): right away with the eager page load strategy, or when the attempt
+        times out with the normal one. Without them the page must finish loading.
+
+        :param url: Url to go to
+        :param ready: CSS selectors or Locators of the elements the bot needs
+        :param budget: Seconds for every attempt and backoff, defaults to attempts x page timeout
+        :param attempts: Maximum number of attempts
+        :param backoff: Seconds before the first retry, doubled on each retry
+        :param rotate_proxy: Switch the proxy upstream before each retry, see `proxy_rotator`
+        :return: loaded
+        """
+        locators = [Locator.resolve(selector) for selector in ready]
+        budget = budget or attempts * self.page_timeout
+        if self.navigation_budget is not None:
+            budget = min(budget, self.navigation_budget - self.navigation_stats['seconds'])
+        deadline = time.time() + budget
+        start_time = time.time()
+        self.navigation_stats['navigations'] += 1
+        loaded = False
+        try:
+            for attempt in range(attempts):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                if attempt > 0:
+                    delay = min(backoff * 2 ** (attempt - 1), remaining / 2)
+                    self.logger.info(f'Retrying {url} in {delay:.1f}s ({remaining:.1f}s of budget left)')
+                    self.pacer.wait(delay)
+                    if rotate_proxy:
+                        self.__rotate_proxy()
+                    remaining = deadline - time.time()
+                attempt_timeout = min(self.page_timeout, remaining / (attempts - attempt))
+                self.navigation_stats['attempts'] += 1
+                if self.__navigate_once(url, locators, attempt_timeout):
+                    loaded = True
+                    break
+        finally:
+            self.driver.set_page_load_timeout(self.page_timeout)
+            self.navigation_stats['seconds'] += time.time() - start_time
+        if not loaded:
+            self.navigation_stats['failures'] += 1
+            self.logger.warning(f'Unable to load {url} within {budget:.1f}s')
+        elif self.page_timings:
+            self.collect_page_timing()
+        return loaded
+
+    def __navigate_once(self, url: str, locators: list[Locator], timeout: float) -> bool:
+        """
+        Load a url once
+
+        :param url: Url to go to
+        :param locators: Locators of the elements that must be present
+        :param timeout: Seconds for the attempt
+        :return: loaded
+        """
+        start_time = time.time()
+        self.invalidate_elements()
+        self.driver.set_page_load_timeout(max(timeout, 1))
+        try:
+            self.driver.get(url)
+        except TimeoutException:
+            self.driver.execute_script('window.stop();')
+            if locators and self.__are_present(locators):
+                self.navigation_stats['early_stops'] += 1
+                self.logger.info(f'Stopped loading {url} after {time.time() - start_time:.1f}s, required elements are present')
+                return True
+            self.logger.warning(f'Timed out loading {url} after {timeout:.1f}s')
+            return False
+        except WebDriverException as e:
+            self.logger.warning(f'Error loading {url}: {e.msg}')
+            return False
+        if not locators:
+            return True
+        remaining = max(timeout - (time.time() - start_time), 0)
+        try:
+            WebDriverWait(self.driver, remaining).until(lambda driver: self.__are_present(locators))
+        except TimeoutException:
+            self.logger.warning(f'Required elements missing on {url}')
+            return False
+        if self.driver.execute_script('var loading = document.readyState !== "complete"; window.stop(); return loading;'):
+            self.navigation_stats['early_stops'] += 1
+        return True
+
+    def __are_present(self, locators: list[Locator]) -> bool:
+        return all(self.driver.find_elements(*locator.to_tuple()) for locator in locators)
+
+    def __rotate_proxy(self):
+        if not self.proxy_rotator:
+            self.logger.warning('No proxy rotator set, retrying with the same proxy')
+            return
+        try:
+            rotated = self.proxy_rotator()
+        except Exception as e:
+            self.logger.warning(f'Unable to rotate proxy: {e}')
+            return
+        if rotated:
+            self.navigation_stats['rotations'] += 1
+        else:
+            self.logger.warning('No other proxy available, retrying with the same proxy')
+
+    def collect_page_timing(self) -> dict:
+        """
+        Read the Navigation and Resource Timing of the current page in one round trip and add it to `page_timings`
+
+        :return: page timing dict (milliseconds), None if not available
+        """
+        try:
+            timing = self.driver.execute_script(scripts.PAGE_TIMING, self.page_timings.top if self.page_timings else 10)
+        except JavascriptException as e:
+            self.logger.warning(f'Unable to read page timing: {e}')
+            return None
+        if self.page_timings:
+            self.page_timings.record(timing)
+        return timing
+
+    def capture_responses(self, *patterns: str, max_buffer: int = 256) -> NetworkCapture:
+        """
+        Start capturing the responses of urls matching any of the patterns.
+        Read them with `responses()`, which yields dicts of url, status, mime_type and parsed body.
+        Start the capture before navigating to see the requests made while the page loads: Chrome sessions
+        see them from the performance log or a hook run on every new document; other browsers only see
+        requests made after the capture started, on the current document or after the next poll.
+
+        :Example:
+
+        >>> capture = bot.capture_responses(r'/api/products')  # before the page loads
+        >>> bot.go_to_url(url)
+        >>> for response in capture.responses(timeout=5):
+        ...     rows.extend(response['body']['items'])
+
+        :param patterns: Url regular expressions
+        :param max_buffer: Responses kept until read, older ones are dropped
+        :return: started NetworkCapture
+        """
+        return NetworkCapture(self.driver, list(patterns), max_buffer=max_buffer, logger=self.logger).start()
+
+    def http_session(self, refresh: bool = True, max_workers: int = 8, retry_methods: Iterable[str] = None) -> HttpSession:
+        """
+        Gets a pooled HTTP session carrying the browser cookies, user agent and language,
+        routed through the same proxy as the browser. Use it for fetches that do not need a page render,
+        and `export_cookies()` on it to copy cookies it received back into the browser.
+
+        :param refresh: Copy the browser cookies and headers again into an existing session
+        :param max_workers: Concurrent fetches of `fetch_all`, only used when the session is created
+        :param retry_methods: Non-idempotent methods to retry too (e.g. POST), only used when the session is created
+        :return: HttpSession
+        """
+        if self._http_session is None:
+            proxy = self.proxy_server.local_url if self.proxy_server else self.proxy
+            self._http_session = HttpSession(
+                self.driver, proxy=proxy, max_workers=max_workers, timeout=self.timeout,
+                retry_methods=retry_methods, logger=self.logger
+            )
+            refresh = True
+        if refresh:
+            self._http_session.import_browser()
+        return self._http_session
+
+    def get_session_state(self) -> dict:
+        """
+        Gets the browser session state: cookies visible to the current page, localStorage and sessionStorage
+
+        :return: dict of cookies, local_storage and session_storage
+        """
+        state = self.driver.execute_script(scripts.SESSION_STATE)
+        state['cookies'] = self.driver.get_cookies()
+        return state
+
+    def save_session(self, store: SessionStore, account: str, domain: str = None):
+        """
+        Save the browser session state of an account
+
+        :param store: SessionStore
+        :param account: Account name
+        :param domain: Domain the session belongs to, defaults to the current page domain
+        """
+        store.save(account, domain or urlparse(self.driver.current_url).hostname, self.get_session_state())
+
+    def restore_session(self, store: SessionStore, account: str, url: str, max_age: float = None) -> bool:
+        """
+        Restore the saved session state of an account before navigating to a page of its domain.
+        Cookies and storage are set on a small same-origin document (robots.txt), since the browser
+        only accepts them for the origin it is on; navigate to `url` afterwards.
+
+        :param store: SessionStore
+        :param account: Account name
+        :param url: Url the session is restored for
+        :param max_age: Seconds a saved session stays usable
+        :return: a saved session was restored
+        """
+        parsed_url = urlparse(url)
+        state = store.load(account, parsed_url.hostname, max_age=max_age)
+        if not state:
+            return False
+        self.go_to_url(f'{parsed_url.scheme}://{parsed_url.netloc}/robots.txt')
+        restored = 0
+        for cookie in state['cookies']:
+            cookie = {key: value for key, value in cookie.items() if key in self.COOKIE_KEYS}
+            try:
+                self.driver.add_cookie(cookie)
+                restored += 1
+            except WebDriverException as e:
+                # Cookies of other domains (e.g. single sign-on) can not be set from this origin
+                self.logger.debug(f'Unable to restore cookie {cookie.get("name")}: {e}')
+        self.driver.execute_script(scripts.SESSION_RESTORE, state.get('local_storage'), state.get('session_storage'))
+        self.logger.info(f'Restored session of {account} ({restored} cookies)')
+        return True
+
+    def ensure_session(self,
+                       store: SessionStore,
+                       account: str,
+                       url: str,
+                       login: Callable[['SeleniumBot'], object],
+                       logged_in: Union[str, Locator, Callable[['SeleniumBot'], bool]],
+                       max_age: float = None,
+                       timeout: float = 5,
+                       ) -> bool:
+        """
+        Open `url` logged in as an account, restoring its saved session when it is still valid
+        and running the real login flow (then saving the new session) otherwise.
+
+        :param store: SessionStore, None to always log in
+        :param account: Account name
+        :param url: Page to open, used to check the restored session
+        :param login: Function receiving the bot that runs the login flow
+        :param logged_in: CSS selector or Locator only present when logged in, or a function receiving the bot
+        :param max_age: Seconds a saved session stays usable
+        :param timeout: Seconds to wait for the logged in check
+        :return: the saved session was reused
+        """
+        domain = urlparse(url).hostname
+        if store and self.restore_session(store, account, url, max_age=max_age):
+            self.go_to_url(url)
+            if self.__is_logged_in(logged_in, timeout):
+                return True
+            self.logger.info(f'Saved session of {account} is no longer valid, logging in')
+            store.delete(account, domain)
+            self.driver.delete_all_cookies()
+            self.driver.execute_script('window.localStorage.clear(); window.sessionStorage.clear();')
+        login(self)
+        if store:
+            self.save_session(store, account, domain)
+        return False
+
+    def __is_logged_in(self, logged_in: Union[str, Locator, Callable[['SeleniumBot'], bool]], timeout: float) -> bool:
+        if callable(logged_in):
+            return bool(logged_in(self))
+        locator = Locator.resolve(logged_in)
+        try:
+            WebDriverWait(self.driver, timeout).until(EC.presence_of_element_located(locator.to_tuple()))
+            return True
+        except TimeoutException:
+            return False
 
     def switch_tab(self, tab: int):
         """
@@ -670,6 +1160,7 @@ class SeleniumBot:
         :param tab: index of the window or tab in browser
         :return:
         """
+        self.invalidate_elements()
         self.driver.switch_to.window(self.driver.window_handles[tab])
 
     def open_and_switch_tab(self, close_previous: bool = True):
@@ -678,6 +1169,7 @@ class SeleniumBot:
 
         :param close_previous: Close previous tab after switching
         """
+        self.invalidate_elements()
         self.driver.switch_to.new_window("tab")
         self.driver.implicitly_wait(20)
 
@@ -685,15 +1177,219 @@ class SeleniumBot:
         if close_previous:
             self.close_tab()
 
-        time.sleep(random.randint(1, 2))
+        self.pacer.pause(1, 2)
         self.driver.switch_to.window(self.driver.window_handles[-1])
 
+    def scrape_urls(self,
+                    urls: Iterable[str],
+                    harvest: Callable[['SeleniumBot', str], object],
+                    tabs: int = 4,
+                    tab_timeout: float = 30,
+                    poll_interval: float = 0.2,
+                    ) -> Iterator[tuple[str, object]]:
+        """
+        Load urls in up to `tabs` tabs at once and harvest each tab as soon as its page is loaded.
+        Tabs are reused for the next url, and urls are read lazily, so memory stays bounded.
+        A tab still loading after `tab_timeout` is stopped and yields None as its result.  \n
+        With the eager or none page load strategy whichever tab is ready first is harvested first.
+        With normal, any command on a loading tab blocks until it has loaded, so tabs are harvested
+        in the order they were started; they still load in parallel.
+
+        :param urls: Urls to scrape
+        :param harvest: Function receiving the bot (switched to the loaded tab) and the url
+        :param tabs: Number of tabs loading at once
+        :param tab_timeout: Seconds a tab may take to load
+        :param poll_interval: Seconds between ready checks while every tab is loading
+        :return: Iterator of (url, harvest result)
+        """
+        origin = self.driver.current_window_handle
+        urls = iter(urls)
+        idle = []
+        loading = {}
+        blocking = self.page_load_strategy == 'normal'
+        try:
+            while True:
+                while len(loading) < tabs:
+                    url = next(urls, None)
+                    if url is None:
+                        break
+                    if idle:
+                        handle = idle.pop()
+                        self.driver.switch_to.window(handle)
+                    else:
+                        self.driver.switch_to.new_window('tab')
+                        handle = self.driver.current_window_handle
+                    self.driver.execute_script(scripts.TAB_NAVIGATE, url)
+                    loading[handle] = (url, time.time())
+                if not loading:
+                    return
+
+                ready = None
+                # polling a loading tab would block on it, wait on the oldest one only
+                candidates = list(loading.items())[:1] if blocking else list(loading.items())
+                for handle, (url, start_time) in candidates:
+                    self.driver.switch_to.window(handle)
+                    if blocking:
+                        self.driver.set_page_load_timeout(max(tab_timeout - (time.time() - start_time), 1))
+                    if self.__is_tab_ready():
+                        ready = handle
+                        break
+                    if time.time() - start_time > tab_timeout:
+                        self.driver.execute_script('window.stop();')
+                        self.logger.warning(f'Tab timed out loading {url}')
+                        loading.pop(handle)
+                        idle.append(handle)
+                        yield url, None
+                if ready is None:
+                    self.pacer.wait(poll_interval)
+                    continue
+
+                url, _ = loading.pop(ready)
+                self.invalidate_elements()
+                result = harvest(self, url)
+                idle.append(ready)
+                yield url, result
+        finally:
+            if blocking:
+                self.driver.set_page_load_timeout(self.page_timeout)
+            open_handles = self.driver.window_handles
+            for handle in idle + list(loading):
+                if handle == origin or handle not in open_handles:
+                    continue
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            self.driver.switch_to.window(origin)
+            self.invalidate_elements()
+
+    def paginate(self,
+                 next_page: Union[str, Locator],
+                 harvest: Callable[['SeleniumBot', str], object],
+                 start_url: str = None,
+                 max_pages: int = None,
+                 checkpoint: str = None,
+                 page_timeout: float = 30,
+                 poll_interval: float = 0.2,
+                 ) -> Iterator[tuple[int, str, object]]:
+        """
+        Walk "next page" links and yield each page result as it is harvested.
+        When the next control is a link, the next page loads in a second tab while the current one
+        is harvested; other controls (buttons, script links) are clicked once the page is harvested.
+        Pagination ends when the next control is missing or disabled, or links back to a visited page.  \n
+        With a checkpoint file the url of each page is saved once it is loaded, so an interrupted crawl
+        started again resumes from the last page, with `max_pages` counting the pages of earlier runs;
+        the file is removed once the last page is done.
+
+        :param next_page: CSS selector or Locator of the next page control
+        :param harvest: Function receiving the bot (on the page to harvest) and the page url
+        :param start_url: Url of the first page, defaults to the current page
+        :param max_pages: Stop after this many pages
+        :param checkpoint: Json file to save progress in
+        :param page_timeout: Seconds the next page may take to load
+        :param poll_interval: Seconds between ready checks of the prefetched page
+        :return: Iterator of (page number, url, harvest result)
+        """
+        locator = Locator.resolve(next_page)
+        progress = Checkpoint(checkpoint, logger=self.logger)
+        state = progress.load()
+        page = state.get('page', 1)
+        if state.get('url') or start_url:
+            self.go_to_url(state.get('url') or start_url)
+
+        visited = set()
+        # pages harvested so far, including before a resume, so max_pages spans the whole crawl
+        pages = state.get('pages', page - 1)
+        prefetch_tab = None
+        try:
+            while True:
+                url = self.driver.current_url
+                visited.add(url)
+                pages += 1
+                control = self.driver.execute_script(scripts.PAGE_NEXT, locator.by, locator.value)
+                last = not control['found'] or control['disabled'] or (max_pages and pages >= max_pages)
+                next_url = control['href']
+                if not last and next_url in visited:
+                    self.logger.debug(f'Next page links back to {next_url}, stopping')
+                    last = True
+
+                if not last and next_url:
+                    current_tab = self.driver.current_window_handle
+                    if prefetch_tab is None:
+                        self.driver.switch_to.new_window('tab')
+                        prefetch_tab = self.driver.current_window_handle
+                    else:
+                        self.driver.switch_to.window(prefetch_tab)
+                    self.driver.execute_script(scripts.TAB_NAVIGATE, next_url)
+                    self.driver.switch_to.window(current_tab)
+
+                self.invalidate_elements()
+                yield page, url, harvest(self, url)
+                if last:
+                    break
+
+                if next_url:
+                    self.driver.switch_to.window(prefetch_tab)
+                    prefetch_tab = current_tab
+                    self.__wait_tab_ready(next_url, page_timeout, poll_interval)
+                elif not self.__click_next_page(locator, page_timeout):
+                    self.logger.warning(f'Page did not change after clicking {locator}, stopping')
+                    break
+                self.invalidate_elements()
+                page += 1
+                progress.save({'page': page, 'url': self.driver.current_url, 'pages': pages})
+            progress.clear()
+        finally:
+            if prefetch_tab and prefetch_tab in self.driver.window_handles:
+                current_tab = self.driver.current_window_handle
+                self.driver.switch_to.window(prefetch_tab)
+                self.driver.close()
+                self.driver.switch_to.window(current_tab)
+            self.invalidate_elements()
+
+    def __wait_tab_ready(self, url: str, timeout: float, poll_interval: float):
+        """
+        Wait for the current tab to finish loading, stopping it after the timeout
+
+        :param url: Url being loaded, for logging
+        :param timeout: Seconds to wait
+        :param poll_interval: Seconds between ready checks
+        """
+        deadline = time.time() + timeout
+        while not self.__is_tab_ready():
+            if time.time() > deadline:
+                self.driver.execute_script('window.stop();')
+                self.logger.warning(f'Tab timed out loading {url}')
+                return
+            self.pacer.wait(poll_interval)
+
+    def __click_next_page(self, locator: Locator, timeout: float) -> bool:
+        """
+        Click a next page control that is not a plain link and wait for it to be replaced
+
+        :param locator: Next page control locator
+        :param timeout: Seconds to wait for the page to change
+        :return: page changed
+        """
+        element = self.get_element(locator)
+        element.click()
+        try:
+            WebDriverWait(self.driver, timeout).until(EC.staleness_of(element))
+            return True
+        except TimeoutException:
+            return False
+
+    def __is_tab_ready(self) -> bool:
+        try:
+            return bool(self.driver.execute_script(scripts.TAB_READY))
+        except TimeoutException:
+            return False
+
     def close_tab(self):
         """
         Close current window or tab
 
         :return:
         """
+        self.invalidate_elements()
         self.driver.close()
 
     def hit_escape(self):
@@ -713,21 +1409,78 @@ class SeleniumBot:
         """
         SCROLL_PAUSE_TIME = 0.5
 
-        # Get scroll height
-        last_height = self.driver.execute_script("return document.body.scrollHeight")
-
         while True:
-            # Scroll down to bottom
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            # Scroll down to bottom and wait in the browser for the page to grow
+            grew = self.driver.execute_async_script(scripts.SCROLL_TO_BOTTOM, int(SCROLL_PAUSE_TIME * 1000))
+            if not grew:
+                break
 
-            # Wait to load page
-            time.sleep(SCROLL_PAUSE_TIME)
+            # Wait between scrolls
+            self.pacer.pause(SCROLL_PAUSE_TIME)
+
+    def scroll_items(self,
+                     selector: Union[str, Locator] = None,
+                     xpath: str = None,
+                     max_items: int = None,
+                     max_time: float = None,
+                     stall_limit: int = 2,
+                     step_timeout: float = 5,
+                     idle_time: float = 0.5,
+                     ) -> Iterator[WebElement]:
+        """
+        Scroll an infinite feed and yield matching elements as they appear.
+        Each step scrolls to the bottom and waits in the browser until no fetch/XHR is in flight and
+        the DOM has been quiet for `idle_time`, so items can be processed while scrolling continues.
+        A step only waits up to `step_timeout` while requests are in flight, so a stalled feed ends quickly.
+        Selector or xpath must be supplied (selector takes precendence)
 
-            # Calculate new scroll height and compare with last scroll height
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                break
-            last_height = new_height
+        :param selector: CSS selector or Locator of the feed items
+        :param xpath: Element xpath of the feed items
+        :param max_items: Stop after this many items
+        :param max_time: Stop after this many seconds
+        :param stall_limit: Stop after this many steps in a row without new items
+        :param step_timeout: Seconds a step may wait for in-flight requests
+        :param idle_time: Seconds without requests in flight or DOM changes after which a step is done
+        :return: Iterator of WebElement
+        """
+        locator = Locator.resolve(selector, xpath)
+        seen_key = f'__seleniumbot_seen_{uuid.uuid4().hex}'
+        start_time = time.time()
+        count = 0
+        stalls = 0
+        scroll = False
+        while True:
+            timeout = step_timeout
+            if max_time:
+                timeout = min(timeout, max(max_time - (time.time() - start_time), 0))
+            self.ensure_script_timeout(timeout + 10)
+            items = self.driver.execute_async_script(
+                scripts.SCROLL_STEP, locator.by, locator.value, seen_key, scroll, int(idle_time * 1000), int(timeout * 1000)
+            )
+            if scroll:
+                stalls = 0 if items else stalls + 1
+            scroll = True
+
+            for item in items:
+                yield item
+                count += 1
+                if max_items and count >= max_items:
+                    return
+            if stalls >= stall_limit:
+                self.logger.debug(f'No new items after {stalls} scrolls, stopping')
+                return
+            if max_time and time.time() - start_time >= max_time:
+                return
+
+    def ensure_script_timeout(self, timeout: float):
+        """
+        Raise the async script timeout if it is lower than needed
+
+        :param timeout: Seconds the next async script may take
+        """
+        if timeout > self.script_timeout:
+            self.driver.set_script_timeout(timeout)
+            self.script_timeout = timeout
 
     def refresh(self):
         """
@@ -735,6 +1488,7 @@ class SeleniumBot:
 
         :return:
         """
+        self.invalidate_elements()
         self.driver.refresh()
 
     def execute_script(self, _command: str, *args):
@@ -748,23 +1502,27 @@ class SeleniumBot:
 
         return self.driver.execute_script(_command, args)
 
-    def go_to_iframe(self, iframe):
+    def go_to_iframe(self, iframe: Union[str, Locator]):
         """
         Focus on the iframe to access elements inside it
 
-        :param iframe: xpath of the iframe
+        :param iframe: xpath or Locator of the iframe
         :return:
         """
-        self.driver.switch_to.frame(self.get_element_by_xpath(iframe))
+        element = self.get_element(xpath=iframe)
+        self.invalidate_elements()
+        self.driver.switch_to.frame(element)
 
-    def go_to_iframe_selector(self, iframe):
+    def go_to_iframe_selector(self, iframe: Union[str, Locator]):
         """
         Focus on the iframe to access elements inside it
 
-        :param iframe: selector of the iframe
+        :param iframe: selector or Locator of the iframe
         :return:
         """
-        self.driver.switch_to.frame(self.get_element(iframe))
+        element = self.get_element(iframe)
+        self.invalidate_elements()
+        self.driver.switch_to.frame(element)
 
     def get_current_url(self) -> str:
         """
@@ -795,10 +1553,9 @@ class SeleniumBot:
 
         """
 
-        self.resize_window()
         current_datetime = datetime.strftime(datetime.now(), "%m-%d-%Y-%H-%M-%S")
         file_name = "{}.png".format(current_datetime)
-        self.driver.get_screenshot_as_file(file_name)
+        self.save_screenshot(file_name)
 
     def save_screenshot_by_time_id(self, _id: str):
         """
@@ -808,10 +1565,9 @@ class SeleniumBot:
         :return:
         """
 
-        self.resize_window()
         current_datetime = datetime.strftime(datetime.now(), "%m-%d-%Y-%H-%M-%S")
         file_name = "{}-{}.png".format(_id, current_datetime)
-        self.driver.get_screenshot_as_file(file_name)
+        self.save_screenshot(file_name)
 
     def get_page_source(self):
         """
@@ -821,31 +1577,32 @@ class SeleniumBot:
         """
         return self.driver.page_source
 
-    def is_visible(self, selector: str, dom=None):
+    def is_visible(self, selector: Union[str, Locator], dom=None):
         """
         Checks if the element is visible or not
 
-        :param selector:
-        :param dom:
+        :param selector: CSS selector or Locator
+        :param dom: the base element
         :return:
         """
-        return self.get_element(selector, dom).is_displayed()
+        return self.with_element(lambda element: element.is_displayed(), selector, dom=dom)
 
 
-    def control_hit_enter_selector(self, selector: str, dom=None):
+    def control_hit_enter_selector(self, selector: Union[str, Locator], dom=None):
         """
         Control + hit enter the selector
 
-        :param selector: CSS selector
+        :param selector: CSS selector or Locator
         :param dom: the base element to find the CSS selector
         """
-        self.get_element(selector, dom).send_keys(Keys.CONTROL + Keys.RETURN)
+        self.with_element(lambda element: element.send_keys(Keys.CONTROL + Keys.RETURN), selector, dom=dom)
 
     def go_to_default_frame(self):
         """
         Come out of all the frames and switch the focus at the page
         :return:
         """
+        self.invalidate_elements()
         self.driver.switch_to.default_content()
 
     def scroll_to_top(self):
@@ -871,18 +1628,39 @@ class SeleniumBot:
         :return: dict of files
         """
         return self.driver.get_downloadable_files()
-    
-    def download_remote_file(self, remote_file: str, directory: str = None):
+
+    @property
+    def download_manager(self) -> DownloadManager:
+        """
+        Download manager of the session, started on first use
         """
-        Download a file from remote webdriver
+        if self._download_manager is None:
+            self._download_manager = DownloadManager(self.driver, self.download_path, max_workers=self.download_workers, logger=self.logger)
+        return self._download_manager
+
+    def download_remote_file(self, remote_file: str, directory: str = None, checksum: str = None) -> dict:
+        """
+        Download a file from remote webdriver, streamed to disk in chunks
 
         :param remote_file: Remote file name
         :param directory: Target directory, default to driver download location
+        :param checksum: Expected sha256 hex digest
+        :return: dict of name, path, size, sha256 and seconds
+        """
+        return self.download_manager.fetch(remote_file, checksum=checksum, directory=directory)
+
+    def download_remote_files(self, remote_files: list[str], directory: str = None, timeout: int = 30, checksums: dict = None) -> dict:
+        """
+        Wait for files to be downloaded and fetch them concurrently, each one as soon as it is ready
+
+        :param remote_files: Remote file names
+        :param directory: Target directory, default to driver download location
+        :param timeout: Seconds to wait for every file to be downloaded
+        :param checksums: Dict of {file name: expected sha256 hex digest}
+        :return: dict of {file name: download result}
         """
-        if not directory:
-            directory = self.download_path
-        return self.driver.download_file(remote_file, directory)
-    
+        return self.download_manager.download(remote_files, timeout=timeout, checksums=checksums, directory=directory)
+
     def wait_file_to_be_downloadad(self, file_name: str, timeout: int = 30):
         """
         Wait to for file to be downloaded
@@ -890,4 +1668,8 @@ class SeleniumBot:
         :param file_name: File name
         :param timeout: Download timeout
         """
-        WebDriverWait(self.driver, timeout).until(lambda d: file_name in d.get_downloadable_files())
+        try:
+            for _ in self.download_manager.wait_for_files([file_name], timeout):
+                pass
+        except DownloadError as e:
+            raise TimeoutException(str(e))
@@ -0,0 +1,205 @@
+from logging import Logger
+
+from .dummylogger import DummyLogger
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class ChangeStore:
+    def __init__(self, path: str, logger: Logger = None) -> None:
+        """
+        Sqlite store of content hashes and HTTP validators (ETag, Last-Modified) per page key,
+        used to skip pages that have not changed since the last run.  \n
+        Checks are kept pending until `commit`, so a run that fails before processing the changed
+        pages sees them as changed again on the next run.
+
+        :param path: Sqlite database file
+        :param logger: Logger instance
+        """
+        self.path = path
+        self.logger = logger or DummyLogger()
+        self.pending = {}
+        self.stats = {'checked': 0, 'new': 0, 'changed': 0, 'unchanged': 0, 'not_modified': 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    key TEXT PRIMARY KEY,
+                    digest TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    checked_at REAL,
+                    changed_at REAL
+                )
+            """)
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    finished_at REAL,
+                    checked INTEGER,
+                    skipped INTEGER,
+                    skip_ratio REAL
+                )
+            """)
+
+
+
+    def get(self, key: str) -> dict:
+        """
+        Get what is stored about a page
+
+        :param key: Page key, e.g. its url
+        :return: dict of digest, etag, last_modified, checked_at and changed_at, None if the page is new
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT * FROM pages WHERE key = ?', (key,)).fetchone()
+        return dict(row) if row else None
+
+
+
+    def get_conditional_headers(self, key: str) -> dict:
+        """
+        Get the If-None-Match and If-Modified-Since headers of a page
+
+        :param key: Page key
+        :return: headers, empty if the page has no validators
+        """
+        page = self.get(key) or {}
+        headers = {}
+        if page.get('etag'):
+            headers['If-None-Match'] = page['etag']
+        if page.get('last_modified'):
+            headers['If-Modified-Since'] = page['last_modified']
+        return headers
+
+
+
+    def has_changed(self, key: str, content, etag: str = None, last_modified: str = None) -> bool:
+        """
+        Compare content to the stored hash of a page
+
+        :param key: Page key
+        :param content: Page or region content: str, bytes, or a json serializable value
+        :param etag: ETag response header
+        :param last_modified: Last-Modified response header
+        :return: the page is new or its content changed
+        """
+        digest = self.digest(content)
+        page = self.get(key)
+        changed = page is None or page['digest'] != digest
+        with self._lock:
+            self.stats['checked'] += 1
+            if page is None:
+                self.stats['new'] += 1
+            self.stats['changed' if changed else 'unchanged'] += 1
+            self.pending[key] = (digest, etag, last_modified, changed)
+        if not changed:
+            self.logger.debug(f'Unchanged content: {key}')
+        return changed
+
+
+
+    def not_modified(self, key: str):
+        """
+        Record a 304 Not Modified response for a page
+
+        :param key: Page key
+        """
+        with self._lock:
+            self.stats['checked'] += 1
+            self.stats['not_modified'] += 1
+            self.pending[key] = (None, None, None, False)
+        self.logger.debug(f'Not modified: {key}')
+
+
+
+    def commit(self, run_id: str = None):
+        """
+        Save the pending checks, and the skip ratio of the run
+
+        :param run_id: Run id, e.g. the trace id, to keep the run stats
+        """
+        now = time.time()
+        with self._lock:
+            pending, self.pending = self.pending, {}
+            stats = self.get_stats()
+            with self._connection:
+                self._connection.executemany("""
+                    INSERT INTO pages (key, digest, etag, last_modified, checked_at, changed_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        digest = COALESCE(excluded.digest, digest),
+                        etag = COALESCE(excluded.etag, etag),
+                        last_modified = COALESCE(excluded.last_modified, last_modified),
+                        checked_at = excluded.checked_at,
+                        changed_at = COALESCE(excluded.changed_at, changed_at)
+                """, [
+                    (key, digest, etag, last_modified, now, now if changed else None)
+                    for key, (digest, etag, last_modified, changed) in pending.items()
+                ])
+                if run_id:
+                    self._connection.execute(
+                        'INSERT OR REPLACE INTO runs (run_id, finished_at, checked, skipped, skip_ratio) VALUES (?, ?, ?, ?, ?)',
+                        (run_id, now, stats['checked'], stats['skipped'], stats['skip_ratio']),
+                    )
+        self.logger.info(f'Saved {len(pending)} page checks, skip ratio {stats["skip_ratio"]:.0%}')
+
+
+
+    def get_stats(self) -> dict:
+        """
+        Get the checks of this run
+
+        :return: dict of checked, new, changed, unchanged, not_modified, skipped and skip_ratio
+        """
+        stats = dict(self.stats)
+        stats['skipped'] = stats['unchanged'] + stats['not_modified']
+        stats['skip_ratio'] = stats['skipped'] / stats['checked'] if stats['checked'] else 0.0
+        return stats
+
+
+
+    def get_runs(self, limit: int = 10) -> list[dict]:
+        """
+        Get the stats of the last runs
+
+        :param limit: Number of runs
+        :return: list of {run_id, finished_at, checked, skipped, skip_ratio}, latest first
+        """
+        with self._lock:
+            rows = self._connection.execute('SELECT * FROM runs ORDER BY finished_at DESC LIMIT ?', (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+
+
+    def close(self):
+        """
+        Close the database, pending checks are dropped
+        """
+        self._connection.close()
+
+
+
+    @staticmethod
+    def digest(content) -> str:
+        """
+        Hash content
+
+        :param content: str, bytes, or a json serializable value
+        :return: sha256 hex digest
+        """
+        if hasattr(content, 'model_dump'):
+            content = content.model_dump()
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        elif not isinstance(content, bytes):
+            content = json.dumps(content, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(content).hexdigest()
@@ -0,0 +1,66 @@
+from logging import Logger
+
+from .dummylogger import DummyLogger
+
+import json
+import os
+
+
+class Checkpoint:
+    def __init__(self, path: str = None, logger: Logger = None) -> None:
+        """
+        Small json state file that lets an interrupted crawl resume where it stopped.  \n
+        Without a path every operation is a no-op, so callers do not need to check.
+
+        :param path: Json file path
+        :param logger: Logger instance
+        """
+        self.path = path
+        self.logger = logger or DummyLogger()
+
+
+
+    def load(self) -> dict:
+        """
+        Load the saved state
+
+        :return: state dict, empty if there is none
+        """
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as file:
+                state = json.load(file)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f'Unable to load checkpoint {self.path}: {e}')
+            return {}
+        self.logger.info(f'Resuming from checkpoint {self.path}: {state}')
+        return state
+
+
+
+    def save(self, state: dict):
+        """
+        Save the state, replacing the file atomically so a crash never leaves half a checkpoint
+
+        :param state: Json serializable state
+        """
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = f'{self.path}.tmp'
+            with open(temp_path, 'w') as file:
+                json.dump(state, file)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f'Unable to save checkpoint {self.path}: {e}')
+
+
+
+    def clear(self):
+        """
+        Remove the saved state, once the crawl is complete
+        """
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,314 @@
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from .dummylogger import DummyLogger
+
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from logging import Logger
+from typing import Iterator
+from urllib.parse import urlparse
+
+import base64
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import zipfile
+import requests
+
+
+class DownloadError(Exception):
+    """
+    Raised when a managed download can not be retrieved or fails its checksum
+    """
+
+
+class DownloadManager:
+    CONTENTS_KEY = b'"contents"'
+
+
+    def __init__(self,
+                 driver: WebDriver,
+                 directory: str,
+                 max_workers: int = 4,
+                 chunk_size: int = 1024 * 1024,
+                 poll_interval: float = 0.1,
+                 max_poll_interval: float = 2.0,
+                 logger: Logger = None,
+                 ) -> None:
+        """
+        Retrieve files downloaded on the grid node.  \n
+        Files are fetched concurrently and streamed to disk in chunks instead of being decoded in memory,
+        and each file is fetched as soon as it shows up in the node download directory.
+
+        :param driver: Remote driver with downloads enabled
+        :param directory: Directory files are written to
+        :param max_workers: Files fetched at once
+        :param chunk_size: Bytes read and written at a time
+        :param poll_interval: Initial seconds between download directory checks
+        :param max_poll_interval: Longest seconds between download directory checks
+        :param logger: Logger instance
+        """
+        self.driver = driver
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.logger = logger or DummyLogger()
+        self.stats = {
+            'files': 0,
+            'bytes': 0,
+            'seconds': 0.0,
+        }
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='download')
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+
+
+
+    @property
+    def files_url(self) -> str:
+        """
+        Url of the session managed downloads endpoint
+        """
+        return f'{self.driver.command_executor._url.rstrip("/")}/session/{self.driver.session_id}/se/files'
+
+
+
+    def get_downloadable_files(self) -> list[str]:
+        """
+        Get the names of the files in the node download directory
+
+        :return: list of file names
+        """
+        if 'se:downloadsEnabled' not in self.driver.capabilities:
+            raise WebDriverException('You must enable downloads in order to work with downloadable files.')
+        return self.driver.get_downloadable_files()
+
+
+
+    def wait_for_files(self, file_names: list[str], timeout: float = 30) -> Iterator[str]:
+        """
+        Yield each file name as soon as the file shows up in the node download directory.  \n
+        Polling starts fast, backs off while nothing changes and speeds up again when a file appears.
+
+        :param file_names: File names to wait for
+        :param timeout: Seconds to wait for every file
+        :return: Iterator of file names, in the order they appear
+        :raises: DownloadError if a file is missing at the timeout
+        """
+        pending = set(file_names)
+        deadline = time.time() + timeout
+        interval = self.poll_interval
+        while pending:
+            available = set(self.get_downloadable_files())
+            found = pending & available
+            for file_name in [name for name in file_names if name in found]:
+                pending.discard(file_name)
+                yield file_name
+            if not pending:
+                return
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise DownloadError(f'Timed out waiting for downloads: {sorted(pending)}')
+            interval = self.poll_interval if found else min(interval * 1.5, self.max_poll_interval)
+            time.sleep(min(interval, remaining))
+
+
+
+    def submit(self, file_name: str, checksum: str = None, directory: str = None) -> Future:
+        """
+        Fetch a file in the background
+
+        :param file_name: Remote file name
+        :param checksum: Expected sha256 hex digest
+        :param directory: Target directory, defaults to the manager directory
+        :return: Future of the download result
+        """
+        return self._executor.submit(self.fetch, file_name, checksum, directory)
+
+
+
+    def download(self, file_names: list[str], timeout: float = 30, checksums: dict = None, directory: str = None) -> dict:
+        """
+        Wait for files and fetch each one as soon as it is ready
+
+        :param file_names: Remote file names
+        :param timeout: Seconds to wait for every file to show up
+        :param checksums: Dict of {file name: expected sha256 hex digest}
+        :param directory: Target directory, defaults to the manager directory
+        :return: dict of {file name: download result}
+        """
+        return {result['name']: result for result in self.iter_downloads(file_names, timeout, checksums, directory)}
+
+
+
+    def iter_downloads(self, file_names: list[str], timeout: float = 30, checksums: dict = None, directory: str = None) -> Iterator[dict]:
+        """
+        Wait for files and fetch each one as soon as it is ready, yielding results as fetches complete
+
+        :param file_names: Remote file names
+        :param timeout: Seconds to wait for every file to show up
+        :param checksums: Dict of {file name: expected sha256 hex digest}
+        :param directory: Target directory, defaults to the manager directory
+        :return: Iterator of download results
+        """
+        checksums = checksums or {}
+        futures = []
+        timeout_error = None
+        try:
+            for file_name in self.wait_for_files(file_names, timeout):
+                futures.append(self.submit(file_name, checksums.get(file_name), directory))
+        except DownloadError as e:
+            # Files that did show up are still collected before the timeout is raised
+            timeout_error = e
+        for future in as_completed(futures):
+            yield future.result()
+        if timeout_error:
+            raise timeout_error
+
+
+
+    def fetch(self, file_name: str, checksum: str = None, directory: str = None) -> dict:
+        """
+        Fetch a file, streaming the base64 payload to a temporary archive and extracting it in chunks
+
+        :param file_name: Remote file name
+        :param checksum: Expected sha256 hex digest
+        :param directory: Target directory, defaults to the manager directory
+        :return: dict of name, path, size, sha256 and seconds
+        :raises: DownloadError if the file can not be retrieved or the checksum does not match
+        """
+        start = time.time()
+        directory = directory or self.directory
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.TemporaryFile(dir=directory) as archive:
+            self.__stream_archive(file_name, archive)
+            archive.seek(0)
+            path, size, digest = self.__extract(file_name, archive, directory)
+
+        if checksum and checksum.lower() != digest:
+            os.remove(path)
+            raise DownloadError(f'Checksum mismatch for {file_name}: expected {checksum}, got {digest}')
+
+        seconds = time.time() - start
+        with self._lock:
+            self.stats['files'] += 1
+            self.stats['bytes'] += size
+            self.stats['seconds'] += seconds
+        self.logger.info(f'Downloaded {file_name} ({size} bytes) in {seconds:.2f}s')
+        return {
+            'name': file_name,
+            'path': path,
+            'size': size,
+            'sha256': digest,
+            'seconds': seconds,
+        }
+
+
+
+    def close(self):
+        """
+        Wait for running fetches and release the connection pool
+        """
+        self._executor.shutdown(wait=True)
+        self._session.close()
+
+
+
+    def __stream_archive(self, file_name: str, archive):
+        """
+        Write the zip archive returned by the node to a file, decoding the base64 contents as they arrive
+
+        :param file_name: Remote file name
+        :param archive: Writable binary file
+        """
+        url = self.files_url
+        headers = self.driver.command_executor.get_remote_connection_headers(urlparse(url), keep_alive=True)
+        try:
+            response = self._session.post(url, json={'name': file_name}, headers=headers, stream=True, timeout=(10, 300))
+        except requests.exceptions.RequestException as e:
+            raise DownloadError(f'Unable to fetch {file_name}: {e}')
+        with response:
+            if response.status_code != 200:
+                raise DownloadError(f'Unable to fetch {file_name}: HTTP {response.status_code} {response.text[:200]}')
+            buffer = b''
+            pending = b''
+            in_contents = False
+            finished = False
+            for chunk in response.iter_content(self.chunk_size):
+                if finished:
+                    continue
+                if not in_contents:
+                    buffer += chunk
+                    start = self.__find_contents(buffer)
+                    if start is None:
+                        # Keep enough of the buffer to match a key split across chunks
+                        buffer = buffer[-64:]
+                        continue
+                    in_contents = True
+                    chunk = buffer[start:]
+                    buffer = b''
+                end = chunk.find(b'"')
+                if end != -1:
+                    chunk = chunk[:end]
+                    finished = True
+                # The payload is plain base64; drop json escaped slashes
+                pending += chunk.replace(b'\\', b'')
+                usable = len(pending) - len(pending) % 4
+                archive.write(base64.b64decode(pending[:usable]))
+                pending = pending[usable:]
+            if not finished:
+                raise DownloadError(f'Unable to fetch {file_name}: truncated response')
+            if pending:
+                archive.write(base64.b64decode(pending + b'=' * (-len(pending) % 4)))
+
+
+
+    def __find_contents(self, buffer: bytes) -> int:
+        """
+        Find the start of the contents string value in the response
+
+        :param buffer: Response bytes read so far
+        :return: offset of the first base64 character, or None if not read yet
+        """
+        key = buffer.find(self.CONTENTS_KEY)
+        if key == -1:
+            return None
+        quote = buffer.find(b'"', key + len(self.CONTENTS_KEY))
+        if quote == -1:
+            return None
+        return quote + 1
+
+
+
+    def __extract(self, file_name: str, archive, directory: str) -> tuple[str, int, str]:
+        """
+        Extract the downloaded file from the node archive in chunks
+
+        :param file_name: Remote file name
+        :param archive: Readable binary zip file
+        :param directory: Target directory
+        :return: path, size and sha256 hex digest
+        """
+        try:
+            zip_file = zipfile.ZipFile(archive)
+        except zipfile.BadZipFile as e:
+            raise DownloadError(f'Unable to extract {file_name}: {e}')
+        with zip_file:
+            members = [info for info in zip_file.infolist() if not info.is_dir()]
+            if not members:
+                raise DownloadError(f'Unable to extract {file_name}: empty archive')
+            member = next((info for info in members if os.path.basename(info.filename) == file_name), members[0])
+            path = os.path.join(directory, os.path.basename(member.filename))
+            part_path = f'{path}.part'
+            digest = hashlib.sha256()
+            size = 0
+            with zip_file.open(member) as source, open(part_path, 'wb') as target:
+                while chunk := source.read(self.chunk_size):
+                    digest.update(chunk)
+                    target.write(chunk)
+                    size += len(chunk)
+            os.replace(part_path, path)
+        return path, size, digest.hexdigest()
@@ -3,11 +3,18 @@ from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 from selenium.webdriver.firefox.options import Options as FireFoxOptions
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from logging import Logger
+from typing import Union
 
 from .dummylogger import DummyLogger
 from .enums import Driver
+from .gridscheduler import GridScheduler
+from .hedging import SessionLatencyTracker
 from .utils import stringutil
 
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import time
+
 
 class DriverFactory:
     HUB_URL = ''
@@ -17,10 +24,39 @@ class DriverFactory:
                  hub_url: str = 'http://selenium-hub:4444/wd/hub', 
                  window_size: tuple[int] = (1280, 720),
                  logger: Logger = None,
+                 scheduler: GridScheduler = None,
+                 hedge: bool = False,
+                 hedge_delay: float = 10,
+                 hedge_percentile: float = 90,
+                 latency_tracker: SessionLatencyTracker = None,
+                 network_log: bool = False,
+                 page_load_strategy: str = 'normal',
                  ) -> None:
+        """
+        Initialize a driver factory
+
+        :param hub_url: Selenium Grid hub url
+        :param window_size: Initial browser window size
+        :param logger: Logger instance
+        :param scheduler: Scheduler to wait for a free grid slot with
+        :param hedge: Send a second session request when the first one is slow
+        :param hedge_delay: Seconds before hedging while there is not enough latency history
+        :param hedge_percentile: Latency percentile used as hedge delay
+        :param latency_tracker: Session start latency history
+        :param network_log: Enable the chrome performance log, read by NetworkCapture
+        :param page_load_strategy: normal (wait for load), eager (wait for DOMContentLoaded) or none
+        """
         self.HUB_URL = hub_url
         self.window_size = window_size
         self.logger = logger or DummyLogger()
+        self.scheduler = scheduler
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedge_percentile = hedge_percentile
+        self.latency_tracker = latency_tracker or SessionLatencyTracker(logger=self.logger)
+        self.network_log = network_log
+        self.page_load_strategy = page_load_strategy
+        self.timings = {}
 
 
 
@@ -34,10 +70,206 @@ class DriverFactory:
         
 
 
-    def get_driver(self, driver: Driver, proxy: str = None) -> webdriver.Remote:
+    def set_scheduler(self, scheduler: GridScheduler):
+        """
+        Set grid scheduler
+
+        :param scheduler: Scheduler to wait for a free grid slot with
+        """
+        self.scheduler = scheduler
+
+
+
+    def set_hedge(self, hedge: bool, latency_tracker: SessionLatencyTracker = None):
+        """
+        Enable or disable hedged session creation
+
+        :param hedge: Send a second session request when the first one is slow
+        :param latency_tracker: Session start latency history
+        """
+        self.hedge = hedge
+        if latency_tracker:
+            self.latency_tracker = latency_tracker
+
+
+
+    def set_network_log(self, network_log: bool):
+        """
+        Enable or disable the chrome performance log
+
+        :param network_log: Enable the chrome performance log, read by NetworkCapture
+        """
+        self.network_log = network_log
+
+
+
+    def set_page_load_strategy(self, page_load_strategy: str):
+        """
+        Set the page load strategy
+
+        :param page_load_strategy: normal (wait for load), eager (wait for DOMContentLoaded) or none
+        """
+        self.page_load_strategy = page_load_strategy
+
+
+
+    def get_driver(self, driver: Union[Driver, list[Driver]], proxy: str = None, queue_timeout: float = 300) -> webdriver.Remote:
+        """
+        Start a remote session.  \n
+        With a scheduler set, the session is only requested once the grid has a free slot
+        and the queue wait is reported separately from the session start time in `timings`.  \n
+        In hedged mode a second request is sent once the first one is slower than the
+        `hedge_percentile` of past start latencies; the first session up is kept and the other is quit.
+        With a scheduler the hedge request holds its own slot until the losing session is quit.
+
+        :param driver: Driver enum or list of allowed drivers
+        :param proxy: Proxy url
+        :param queue_timeout: Seconds to wait for a free slot when a scheduler is set
+        :return: webdriver.Remote
+        :raises: GridCapacityError if no slot frees up before the queue timeout
+        """
+        drivers = list(driver) if isinstance(driver, (list, tuple)) else [driver]
+        queue_wait = 0.0
+        if self.scheduler:
+            driver, queue_wait = self.scheduler.acquire(drivers, timeout=queue_timeout)
+        else:
+            driver = drivers[0]
+
         self.logger.info(f'Connecting to {self.HUB_URL}')
         if proxy:
             self.logger.info(f'Using proxy: {proxy}')
+        start_time = time.time()
+        try:
+            if self.hedge:
+                remote, hedged, hedge_won = self.__initialize_hedged(driver, proxy=proxy)
+            else:
+                remote = self.__initialize_timed(driver, proxy=proxy)
+                hedged = hedge_won = False
+        finally:
+            if self.scheduler:
+                self.scheduler.release(driver)
+        session_start = time.time() - start_time
+        self.latency_tracker.record_session(hedged=hedged, hedge_won=hedge_won)
+        self.latency_tracker.save()
+
+        self.timings = {
+            'driver': driver.value,
+            'queue_wait': queue_wait,
+            'session_start': session_start,
+            'hedged': hedged,
+            'hedge_won': hedge_won,
+        }
+        self.logger.info(f'Session started in {session_start:.2f}s (queue wait {queue_wait:.2f}s)')
+        if self.hedge:
+            self.timings['hedge_stats'] = self.latency_tracker.get_stats()
+            self.logger.info(f'Hedge stats: {self.timings["hedge_stats"]}')
+        return remote
+
+
+
+    def __initialize_timed(self, driver: Driver, proxy: str = None) -> webdriver.Remote:
+        start_time = time.time()
+        remote = self.__initialize(driver, proxy=proxy)
+        self.latency_tracker.record(time.time() - start_time)
+        return remote
+
+
+
+    def __initialize_hedged(self, driver: Driver, proxy: str = None) -> tuple[webdriver.Remote, bool, bool]:
+        """
+        Race a primary and, once it is late, a hedge session request
+
+        :param driver: Driver enum
+        :param proxy: Proxy url
+        :return: (remote, hedge request sent, hedge request won)
+        """
+        executor = ThreadPoolExecutor(max_workers=2)
+        primary = executor.submit(self.__initialize_timed, driver, proxy)
+        futures = [primary]
+        delay = self.latency_tracker.percentile(self.hedge_percentile)
+        if delay is None:
+            delay = self.hedge_delay
+        done, _ = wait([primary], timeout=delay)
+        hedge_reserved = False
+        if not done and self.__reserve_hedge(driver):
+            hedge_reserved = self.scheduler is not None
+            self.logger.info(f'Session not started after {delay:.2f}s, sending hedge request')
+            futures.append(executor.submit(self.__initialize_timed, driver, proxy))
+        executor.shutdown(wait=False)
+        release = driver if hedge_reserved else None
+
+        winner = None
+        error = None
+        pending = set(futures)
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                elif winner is None:
+                    winner = future
+                else:
+                    self.__discard_loser(future)
+        if winner is None:
+            if release:
+                self.scheduler.release(release)
+            raise error
+
+        finish_time = time.time()
+        hedge_won = winner is not primary
+        for future in pending:
+            # the extra slot is held until the losing request is done and its session quit
+            future.add_done_callback(
+                lambda loser: self.__discard_loser(loser, finish_time if hedge_won else None, release=release)
+            )
+        if not pending and release:
+            self.scheduler.release(release)
+        return winner.result(), len(futures) > 1, hedge_won
+
+
+
+    def __reserve_hedge(self, driver: Driver) -> bool:
+        """
+        Reserve a grid slot for a hedge request
+
+        :param driver: Driver enum
+        :return: the hedge request may be sent
+        """
+        if not self.scheduler:
+            return True
+        return self.scheduler.try_acquire(driver)
+
+
+
+    def __discard_loser(self, loser: Future, winner_finish_time: float = None, release: Driver = None):
+        """
+        Quit the session of a request that lost the race
+
+        :param loser: Losing request future
+        :param winner_finish_time: Time the winning hedge finished, to record the time saved
+        :param release: Driver of the hedge slot to release once the session is quit
+        """
+        try:
+            if loser.exception() is not None:
+                return
+            if winner_finish_time is not None:
+                self.latency_tracker.record_saving(time.time() - winner_finish_time)
+                self.latency_tracker.save()
+            remote = loser.result()
+            if remote is None:
+                return
+            try:
+                remote.quit()
+                self.logger.info('Quit hedged session that lost the race')
+            except Exception as e:
+                self.logger.warning(f'Unable to quit hedged session: {e}')
+        finally:
+            if release:
+                self.scheduler.release(release)
+
+
+
+    def __initialize(self, driver: Driver, proxy: str = None) -> webdriver.Remote:
         if driver == Driver.CHROME:
             return self.__initialize_chrome(proxy=proxy)
         elif driver == Driver.FIREFOX:
@@ -48,6 +280,7 @@ class DriverFactory:
     def __initialize_firefox(self, proxy: str = None) -> webdriver.Remote:
         options = FireFoxOptions()
         options.enable_downloads = True
+        options.page_load_strategy = self.page_load_strategy
         options.add_argument(f'--width={self.window_size[0]}')
         options.add_argument(f'--height={self.window_size[1]}')
         options.set_preference('network.negotiate-auth.allow-proxies', True)
@@ -82,6 +315,7 @@ class DriverFactory:
     def __initialize_chrome(self, proxy: str = None) -> webdriver.Remote:
         options = ChromeOptions()
         options.enable_downloads = True
+        options.page_load_strategy = self.page_load_strategy
         options.add_argument(f'--window-size={self.window_size[0]},{self.window_size[1]}')
         options.add_argument('--no-sandbox')
         options.add_argument('--enable-javascript')
@@ -92,6 +326,9 @@ class DriverFactory:
         if proxy:
             options.add_argument(f'--proxy-server=http={proxy};https={proxy}')
 
+        if self.network_log:
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
         driver = webdriver.Remote(command_executor=self.HUB_URL, options=options)
         return driver
     
\ No newline at end of file
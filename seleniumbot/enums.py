@@ -33,3 +33,13 @@ class BotProxy(Enum):
     PROXYMESH_OPEN = 'proxymesh-open'
     PROXYMESH_WORLD = 'proxymesh-world'
     PROXYMESH_US = 'proxymesh-us'
+
+
+class WaitEngine(Enum):
+    DRIVER = 'driver'
+    BROWSER = 'browser'
+
+
+class Pacing(Enum):
+    FAST = 'fast'
+    HUMAN = 'human'
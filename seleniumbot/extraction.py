@@ -0,0 +1,246 @@
+from pydantic import BaseModel, create_model
+
+from .scripts import FIND_ELEMENTS
+
+from typing import Any, Optional
+
+import json
+
+
+class SchemaError(Exception):
+    """
+    Raised for an invalid extraction schema
+    """
+
+
+class ExtractionSchema:
+    """
+    Declarative extraction schema compiled into a single JavaScript extractor.  \n
+    A schema maps field names to field specs:
+
+    - **selector** / **xpath**: Locator of the field, relative to the parent field. Defaults to the parent itself.
+    - **attribute**: Read an attribute instead of the text.
+    - **property**: Read a DOM property instead of the text, keeping its JS type (objects are read as strings).
+    - **many**: Read every match as a list instead of the first match.
+    - **fields**: Nested schema, read relative to each match.
+    - **regex**: Keep the first group (or the whole match) of a regular expression.
+    - **transform**: Transform or list of transforms: trim, collapse, lower, upper, int, float, bool.
+    - **type**: Record field type: str, int, float or bool. Defaults to the type of the last transform,
+      or any for a property without a typed transform.
+
+    :Example:
+
+    >>> schema = ExtractionSchema({
+    ...     "title": {"selector": "h1", "transform": "trim"},
+    ...     "rows": {"selector": "table tr", "many": True, "fields": {
+    ...         "name": {"selector": "td:nth-child(1)"},
+    ...         "price": {"selector": "td:nth-child(2)", "regex": "[0-9.]+", "transform": "float"},
+    ...         "selected": {"selector": "input[type=checkbox]", "property": "checked"},
+    ...     }},
+    ...     "sections": {"selector": "main", "property": "childElementCount", "type": "int"},
+    ... })
+    """
+
+    TRANSFORMS = ('trim', 'collapse', 'lower', 'upper', 'int', 'float', 'bool')
+    TYPES = {'str': str, 'int': int, 'float': float, 'bool': bool}
+    FIELD_KEYS = ('selector', 'xpath', 'attribute', 'property', 'many', 'fields', 'regex', 'transform', 'type')
+
+    RUNTIME = FIND_ELEMENTS + """
+function first(by, value, root) {
+    if (!by) {
+        return root;
+    }
+    if (by === 'xpath') {
+        return document.evaluate(value, root, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    return root.querySelector(value);
+}
+function many(by, value, root) {
+    return by ? find(by, value, root) : [root];
+}
+function property(el, name) {
+    var value = el[name];
+    if (value === undefined || typeof value === 'function') {
+        return null;
+    }
+    if (value !== null && typeof value === 'object') {
+        return String(value);
+    }
+    return value;
+}
+function transform(value, regex, transforms) {
+    if (value === null || value === undefined) {
+        return null;
+    }
+    if (!regex && !transforms.length) {
+        return value;
+    }
+    value = String(value);
+    if (regex) {
+        var match = value.match(new RegExp(regex));
+        if (!match) {
+            return null;
+        }
+        value = match.length > 1 ? match[1] : match[0];
+    }
+    for (var i = 0; i < transforms.length; i++) {
+        switch (transforms[i]) {
+            case 'trim': value = value.trim(); break;
+            case 'collapse': value = value.replace(/\\s+/g, ' ').trim(); break;
+            case 'lower': value = value.toLowerCase(); break;
+            case 'upper': value = value.toUpperCase(); break;
+            case 'int': value = parseInt(value.replace(/[^0-9+-]/g, ''), 10); value = isNaN(value) ? null : value; break;
+            case 'float': value = parseFloat(value.replace(/[^0-9.eE+-]/g, '')); value = isNaN(value) ? null : value; break;
+            case 'bool': value = value.trim().length > 0; break;
+        }
+        if (value === null) {
+            return null;
+        }
+    }
+    return value;
+}
+"""
+
+
+    def __init__(self, schema: dict, name: str = 'Record') -> None:
+        """
+        Compile an extraction schema
+
+        :param schema: Dict of {field name: field spec}
+        :param name: Record model name
+        :raises: SchemaError if the schema is invalid
+        """
+        if not isinstance(schema, dict) or not schema:
+            raise SchemaError('Extraction schema must be a non-empty dict')
+        self.schema = schema
+        self.name = name
+        self._functions = []
+        entry = self.__compile_object(schema, name)
+        self.script = f'{self.RUNTIME}\n' + '\n'.join(self._functions) + f'\nreturn {entry}(arguments[0] || document);'
+        self.model = self.__build_model(schema, name)
+
+
+
+    def parse(self, raw: dict) -> BaseModel:
+        """
+        Convert the extractor output to a typed record
+
+        :param raw: Dict returned by the extractor script
+        :return: Record model instance
+        """
+        return self.model.model_validate(raw)
+
+
+
+    def __compile_object(self, schema: dict, path: str) -> str:
+        """
+        Compile a schema into a JS function reading every field relative to a root element
+
+        :param schema: Dict of {field name: field spec}
+        :param path: Field path, for error messages
+        :return: JS function name
+        """
+        entries = []
+        for field_name, spec in schema.items():
+            function = self.__compile_field(spec, f'{path}.{field_name}')
+            entries.append(f'{json.dumps(field_name)}: {function}(root)')
+        return self.__add_function('return {' + ', '.join(entries) + '};')
+
+
+
+    def __compile_field(self, spec: dict, path: str) -> str:
+        """
+        Compile a field spec into a JS function
+
+        :param spec: Field spec
+        :param path: Field path, for error messages
+        :return: JS function name
+        """
+        if not isinstance(spec, dict):
+            raise SchemaError(f'{path}: field spec must be a dict')
+        unknown = set(spec) - set(self.FIELD_KEYS)
+        if unknown:
+            raise SchemaError(f'{path}: unknown keys {sorted(unknown)}')
+
+        if spec.get('selector'):
+            by, value = 'css selector', spec['selector']
+        elif spec.get('xpath'):
+            by, value = 'xpath', spec['xpath']
+        else:
+            by, value = None, None
+
+        if spec.get('fields'):
+            read = f'{self.__compile_object(spec["fields"], path)}(el)'
+        else:
+            if spec.get('attribute'):
+                read = f'el.getAttribute({json.dumps(spec["attribute"])})'
+            elif spec.get('property'):
+                read = f'property(el, {json.dumps(spec["property"])})'
+            else:
+                read = 'textOf(el)'
+            transforms = self.__get_transforms(spec, path)
+            read = f'transform({read}, {json.dumps(spec.get("regex"))}, {json.dumps(transforms)})'
+
+        locate = f'{json.dumps(by)}, {json.dumps(value)}, root'
+        if spec.get('many'):
+            body = f'return many({locate}).map(function (el) {{ return {read}; }});'
+        else:
+            body = f'var el = first({locate}); return el ? {read} : null;'
+        return self.__add_function(body)
+
+
+
+    def __add_function(self, body: str) -> str:
+        name = f'f{len(self._functions)}'
+        self._functions.append(f'function {name}(root) {{ {body} }}')
+        return name
+
+
+
+    def __get_transforms(self, spec: dict, path: str) -> list[str]:
+        transforms = spec.get('transform') or []
+        if isinstance(transforms, str):
+            transforms = [transforms]
+        for transform in transforms:
+            if transform not in self.TRANSFORMS:
+                raise SchemaError(f'{path}: unknown transform {transform}, expected one of {self.TRANSFORMS}')
+        return list(transforms)
+
+
+
+    def __build_model(self, schema: dict, name: str) -> type[BaseModel]:
+        """
+        Build the pydantic record model of a schema
+
+        :param schema: Dict of {field name: field spec}
+        :param name: Model name
+        :return: Model class
+        """
+        fields = {}
+        for field_name, spec in schema.items():
+            if spec.get('fields'):
+                field_type = self.__build_model(spec['fields'], f'{name}_{field_name}')
+            else:
+                field_type = self.__get_type(spec, f'{name}.{field_name}')
+            if spec.get('many'):
+                fields[field_name] = (list[Optional[field_type]], [])
+            else:
+                fields[field_name] = (Optional[field_type], None)
+        return create_model(name, **fields)
+
+
+
+    def __get_type(self, spec: dict, path: str) -> type:
+        type_name = spec.get('type')
+        if not type_name:
+            transforms = self.__get_transforms(spec, path)
+            if spec.get('property') and not spec.get('regex') and not transforms:
+                # untransformed properties keep their JS type, e.g. checked (bool) or childElementCount (int)
+                return Any
+            type_name = 'str'
+            for transform in transforms:
+                if transform in self.TYPES:
+                    type_name = transform
+        if type_name not in self.TYPES:
+            raise SchemaError(f'{path}: unknown type {type_name}, expected one of {tuple(self.TYPES)}')
+        return self.TYPES[type_name]
@@ -0,0 +1,234 @@
+from logging import Logger
+
+from .dummylogger import DummyLogger
+from .enums import Driver
+
+from collections import deque
+
+import itertools
+import threading
+import time
+import requests
+
+
+class GridCapacityError(Exception):
+    """
+    Raised when no grid slot frees up before the local queue deadline
+    """
+
+
+class GridScheduler:
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+
+    def __init__(self,
+                 hub_url: str,
+                 status_ttl: float = 2.0,
+                 poll_interval: float = 1.0,
+                 logger: Logger = None,
+                 ) -> None:
+        """
+        Schedule session requests against the free slots reported by the grid `/status`.  \n
+        Requests are queued locally in arrival order instead of in the hub queue.
+
+        :param hub_url: Selenium grid hub url
+        :param status_ttl: Seconds a fetched `/status` stays valid
+        :param poll_interval: Seconds between capacity checks while queued
+        :param logger: Logger instance
+        """
+        self.hub_url = hub_url
+        self.status_ttl = status_ttl
+        self.poll_interval = poll_interval
+        self.logger = logger or DummyLogger()
+        self._status = None
+        self._status_time = 0.0
+        self._reserved = {}
+        self._tickets = itertools.count()
+        self._waiting = deque()
+        self._condition = threading.Condition()
+        self._status_lock = threading.Lock()
+
+
+
+    @classmethod
+    def for_hub(cls, hub_url: str, **kwargs) -> 'GridScheduler':
+        """
+        Get the shared scheduler of a hub so every bot in the process queues in the same line
+
+        :param hub_url: Selenium grid hub url
+        :return: GridScheduler
+        """
+        with cls._instances_lock:
+            if hub_url not in cls._instances:
+                cls._instances[hub_url] = cls(hub_url, **kwargs)
+            return cls._instances[hub_url]
+
+
+
+    def get_status(self, refresh: bool = False) -> dict:
+        """
+        Get the grid status, cached for `status_ttl` seconds.
+        Only one caller at a time fetches it, the others get the fetched status.
+
+        :param refresh: Ignore the cached status
+        :return: status value dict or None if the hub is unreachable
+        """
+        with self._status_lock:
+            if not refresh and self._status is not None and time.time() - self._status_time < self.status_ttl:
+                return self._status
+            try:
+                response = requests.get(f'{self.hub_url}/status', timeout=5)
+                self._status = response.json()['value']
+            except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+                self.logger.warning(f'Unable to read grid status: {e}')
+                self._status = None
+            self._status_time = time.time()
+            return self._status
+
+
+
+    def get_free_slots(self) -> dict:
+        """
+        Count the free slots per browser, minus the slots already granted locally
+
+        :return: dict of {Driver: free slots} or None if the hub is unreachable
+        """
+        status = self.get_status()
+        with self._condition:
+            return self.__count_free_slots(status)
+
+
+
+    def acquire(self, drivers: list[Driver], timeout: float = 300) -> tuple[Driver, float]:
+        """
+        Wait in the local queue until one of the drivers has a free slot.  \n
+        The driver with the most free slots is picked. Call `release` once the session request is done.
+        The grid status is fetched outside the queue lock, so a slow hub never blocks `release`.
+
+        :param drivers: Allowed drivers, in order of preference
+        :param timeout: Seconds to wait in the queue
+        :return: (picked driver, seconds spent in queue)
+        :raises: GridCapacityError if no slot frees up before the deadline, or the grid status stays unavailable
+        """
+        start_time = time.time()
+        deadline = start_time + timeout
+        ticket = next(self._tickets)
+        with self._condition:
+            self._waiting.append(ticket)
+        status_missing = False
+        try:
+            while True:
+                with self._condition:
+                    first = self._waiting[0] == ticket
+                status = self.get_status() if first else None
+                with self._condition:
+                    if first:
+                        status_missing = status is None
+                        driver = self.__pick_driver(drivers, status)
+                        if driver:
+                            self._waiting.popleft()
+                            self._reserved[driver] = self._reserved.get(driver, 0) + 1
+                            queue_wait = time.time() - start_time
+                            self.logger.info(f'Granted {driver.value} slot after {queue_wait:.2f}s in queue')
+                            return driver, queue_wait
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        reason = 'grid status unavailable' if status_missing else 'no free slot'
+                        raise GridCapacityError(
+                            f'No {"/".join(driver.value for driver in drivers)} slot granted after {timeout}s in queue ({reason})'
+                        )
+                    self._condition.wait(min(self.poll_interval, remaining))
+        finally:
+            with self._condition:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                self._condition.notify_all()
+
+
+
+    def try_acquire(self, driver: Driver) -> bool:
+        """
+        Reserve a slot without waiting, e.g. for a hedge request.
+        Fails when bots are queued, so an extra request never jumps the queue. Call `release` once done.
+
+        :param driver: Driver enum
+        :return: reserved
+        """
+        status = self.get_status()
+        with self._condition:
+            if self._waiting or self.__pick_driver([driver], status) is None:
+                return False
+            self._reserved[driver] = self._reserved.get(driver, 0) + 1
+            return True
+
+
+
+    def release(self, driver: Driver):
+        """
+        Drop the local reservation of a granted slot.  \n
+        The cached status is invalidated so the new session shows up on the next check.
+
+        :param driver: Driver returned by `acquire`
+        """
+        with self._condition:
+            self._reserved[driver] = max(self._reserved.get(driver, 0) - 1, 0)
+            self._status_time = 0.0
+            self._condition.notify_all()
+
+
+
+    def __count_free_slots(self, status: dict) -> dict:
+        """
+        Count the free slots per browser in a grid status, minus the slots already granted locally.
+        Must be called holding `_condition`.
+
+        :param status: Grid status value
+        :return: dict of {Driver: free slots} or None without status
+        """
+        if status is None:
+            return None
+
+        free_slots = {driver: 0 for driver in Driver}
+        total_capacity = 0
+        for node in status.get('nodes', []):
+            if node.get('availability', 'UP') != 'UP':
+                continue
+            slots = node.get('slots', [])
+            active = len([slot for slot in slots if slot.get('session')])
+            capacity = node.get('maxSessions', len(slots)) - active
+            if capacity <= 0:
+                continue
+            total_capacity += capacity
+            idle = {}
+            for slot in slots:
+                if slot.get('session'):
+                    continue
+                browser = slot.get('stereotype', {}).get('browserName', '')
+                idle[browser] = idle.get(browser, 0) + 1
+            for driver in Driver:
+                free_slots[driver] += min(idle.get(driver.value, 0), capacity)
+
+        total_capacity -= sum(self._reserved.values())
+        for driver in Driver:
+            free_slots[driver] = max(min(free_slots[driver] - self._reserved.get(driver, 0), total_capacity), 0)
+        return free_slots
+
+
+
+    def __pick_driver(self, drivers: list[Driver], status: dict) -> Driver:
+        """
+        Pick the allowed driver with the most free slots.
+        Must be called holding `_condition`.
+
+        :param drivers: Allowed drivers, in order of preference
+        :param status: Grid status value
+        :return: Driver or None if every allowed driver is full or the status is unavailable
+        """
+        free_slots = self.__count_free_slots(status)
+        if free_slots is None:
+            return None
+        best = max(drivers, key=lambda driver: free_slots.get(driver, 0))
+        if free_slots.get(best, 0) <= 0:
+            return None
+        return best
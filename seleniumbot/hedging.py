@@ -0,0 +1,142 @@
+from logging import Logger
+
+from .dummylogger import DummyLogger
+
+from collections import deque
+
+import json
+import math
+import os
+import threading
+
+
+class SessionLatencyTracker:
+    def __init__(self, path: str = None, max_samples: int = 200, logger: Logger = None) -> None:
+        """
+        Keep a rolling window of session start latencies and hedging outcomes.  \n
+        When a path is given the history is loaded from and saved to a json file, so the
+        hedge delay carries over between bot runs.
+
+        :param path: Json file to persist the history to
+        :param max_samples: Number of latency samples to keep
+        :param logger: Logger instance
+        """
+        self.path = path
+        self.logger = logger or DummyLogger()
+        self.samples = deque(maxlen=max_samples)
+        self.stats = {
+            'sessions': 0,
+            'hedges': 0,
+            'hedge_wins': 0,
+            'saved_seconds': 0.0,
+        }
+        self._lock = threading.Lock()
+        self.load()
+
+
+
+    def load(self):
+        """
+        Load the history from the json file, if any
+        """
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as file:
+                history = json.load(file)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f'Unable to load session latency history: {e}')
+            return
+        self.samples.extend(history.get('samples', []))
+        self.stats.update(history.get('stats', {}))
+
+
+
+    def save(self):
+        """
+        Save the history to the json file, if any
+        """
+        if not self.path:
+            return
+        with self._lock:
+            history = {
+                'samples': list(self.samples),
+                'stats': dict(self.stats),
+            }
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'w') as file:
+                json.dump(history, file)
+        except OSError as e:
+            self.logger.warning(f'Unable to save session latency history: {e}')
+
+
+
+    def record(self, seconds: float):
+        """
+        Record the start latency of a single session request
+
+        :param seconds: Seconds the request took
+        """
+        with self._lock:
+            self.samples.append(seconds)
+
+
+
+    def record_session(self, hedged: bool = False, hedge_won: bool = False):
+        """
+        Record the outcome of a `get_driver` call
+
+        :param hedged: A hedge request was sent
+        :param hedge_won: The hedge request finished first
+        """
+        with self._lock:
+            self.stats['sessions'] += 1
+            if hedged:
+                self.stats['hedges'] += 1
+            if hedge_won:
+                self.stats['hedge_wins'] += 1
+
+
+
+    def record_saving(self, seconds: float):
+        """
+        Record how much sooner a winning hedge finished than the primary request
+
+        :param seconds: Seconds saved
+        """
+        with self._lock:
+            self.stats['saved_seconds'] += seconds
+
+
+
+    def percentile(self, pct: float, min_samples: int = 10) -> float:
+        """
+        Get a percentile of the recorded latencies
+
+        :param pct: Percentile (0-100)
+        :param min_samples: Minimum samples needed for a meaningful value
+        :return: latency in seconds or None if there are not enough samples
+        """
+        with self._lock:
+            samples = sorted(self.samples)
+        if len(samples) < min_samples:
+            return None
+        index = min(math.ceil(pct / 100 * len(samples)) - 1, len(samples) - 1)
+        return samples[max(index, 0)]
+
+
+
+    def get_stats(self) -> dict:
+        """
+        Get hedging stats for tuning the hedge delay
+
+        :return: dict of {sessions, hedges, hedge_wins, saved_seconds, hedge_rate, win_rate, p50, p90}
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        stats['hedge_rate'] = stats['hedges'] / stats['sessions'] if stats['sessions'] else 0.0
+        stats['win_rate'] = stats['hedge_wins'] / stats['hedges'] if stats['hedges'] else 0.0
+        stats['p50'] = self.percentile(50)
+        stats['p90'] = self.percentile(90)
+        return stats
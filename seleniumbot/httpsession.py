@@ -0,0 +1,226 @@
+from requests.adapters import HTTPAdapter
+from selenium.webdriver.remote.webdriver import WebDriver
+from urllib3.util.retry import Retry
+
+from .changestore import ChangeStore
+from .dummylogger import DummyLogger
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from logging import Logger
+from typing import Iterable, Iterator, Optional
+from urllib.parse import urlparse
+
+import itertools
+import requests
+
+
+class HttpSession:
+    PARSERS = ('json', 'text', 'response')
+
+
+    def __init__(self,
+                 driver: WebDriver,
+                 proxy: str = None,
+                 max_workers: int = 8,
+                 timeout: float = 30,
+                 retries: int = 2,
+                 retry_methods: Iterable[str] = None,
+                 logger: Logger = None,
+                 ) -> None:
+        """
+        Plain HTTP session carrying the browser identity, for fetches that do not need a page render.  \n
+        Cookies, user agent and accept language are copied from the browser with `import_browser`,
+        requests go through the same proxy as the browser, and connections are pooled per host.
+
+        :param driver: Remote driver to copy the session from
+        :param proxy: Proxy url, e.g. the bot ProxyServer local url
+        :param max_workers: Concurrent fetches, also the connection pool size
+        :param timeout: Request timeout in seconds
+        :param retries: Retries of failed connections and 429/5xx responses
+        :param retry_methods: Extra methods to retry on top of urllib3's idempotent ones, e.g. POST
+            when the endpoint is safe to call twice
+        :param logger: Logger instance
+        """
+        self.driver = driver
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.logger = logger or DummyLogger()
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {method.upper() for method in retry_methods or ()},
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if proxy:
+            self.session.proxies = {'http': proxy, 'https': proxy}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='http')
+
+
+
+    def import_browser(self) -> 'HttpSession':
+        """
+        Copy the browser cookies of the current domain, user agent, accept language and referer
+
+        :return: self
+        """
+        identity = self.driver.execute_script(
+            'return {userAgent: navigator.userAgent, languages: navigator.languages || [navigator.language]};'
+        )
+        self.session.headers['User-Agent'] = identity['userAgent']
+        if identity['languages']:
+            self.session.headers['Accept-Language'] = self.__accept_language(identity['languages'])
+        self.session.headers['Referer'] = self.driver.current_url
+
+        cookies = self.driver.get_cookies()
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie['name'],
+                cookie['value'],
+                domain=cookie.get('domain', ''),
+                path=cookie.get('path', '/'),
+                secure=cookie.get('secure', False),
+                expires=cookie.get('expiry'),
+                rest={'HttpOnly': None} if cookie.get('httpOnly') else {},
+            )
+        self.logger.info(f'Imported {len(cookies)} browser cookies into http session')
+        return self
+
+
+
+    def export_cookies(self) -> int:
+        """
+        Copy the session cookies back into the browser.
+        The browser only accepts cookies of the domain it is on, others are skipped.
+
+        :return: number of cookies set
+        """
+        host = urlparse(self.driver.current_url).hostname or ''
+        exported = 0
+        for cookie in self.session.cookies:
+            domain = cookie.domain.lstrip('.')
+            if not host or not (host == domain or host.endswith(f'.{domain}')):
+                continue
+            browser_cookie = {
+                'name': cookie.name,
+                'value': cookie.value,
+                'path': cookie.path or '/',
+                'secure': bool(cookie.secure),
+            }
+            if cookie.domain_specified:
+                browser_cookie['domain'] = cookie.domain
+            if cookie.expires:
+                browser_cookie['expiry'] = int(cookie.expires)
+            self.driver.add_cookie(browser_cookie)
+            exported += 1
+        self.logger.info(f'Exported {exported} http session cookies to the browser')
+        return exported
+
+
+
+    def fetch(self, url: str, method: str = 'GET', **kwargs) -> requests.Response:
+        """
+        Send a request with the session
+
+        :param url: Request url
+        :param method: HTTP method
+        :return: Response
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+
+
+    def fetch_if_changed(self, url: str, change_store: ChangeStore, key: str = None, method: str = 'GET', **kwargs) -> Optional[requests.Response]:
+        """
+        Send a conditional request with the ETag/Last-Modified stored for the page,
+        and compare the body hash when the server ignores them
+
+        :param url: Request url
+        :param change_store: Store of the page hashes and validators
+        :param key: Page key, defaults to the url
+        :param method: HTTP method
+        :return: Response, None if the page did not change
+        :raises: requests.HTTPError for an error status
+        """
+        key = key or url
+        kwargs['headers'] = {**(kwargs.get('headers') or {}), **change_store.get_conditional_headers(key)}
+        response = self.fetch(url, method, **kwargs)
+        if response.status_code == 304:
+            change_store.not_modified(key)
+            return None
+        response.raise_for_status()
+        if not change_store.has_changed(key, response.content, response.headers.get('ETag'), response.headers.get('Last-Modified')):
+            return None
+        return response
+
+
+
+    def fetch_all(self, urls: Iterable[str], method: str = 'GET', parse: str = 'json', **kwargs) -> Iterator[tuple[str, object]]:
+        """
+        Fetch urls concurrently, yielding results as requests complete.
+        Urls are read lazily and at most `max_workers` requests are in flight.
+        A failed request (connection error, error status or unparsable body) yields None.
+
+        :param urls: Request urls
+        :param method: HTTP method
+        :param parse: json, text or response
+        :return: Iterator of (url, result)
+        """
+        if parse not in self.PARSERS:
+            raise Exception(f'Unknown parser {parse}, expected one of {self.PARSERS}')
+        urls = iter(urls)
+        futures = {}
+        for url in itertools.islice(urls, self.max_workers):
+            futures[self._executor.submit(self.__fetch_parsed, url, method, parse, kwargs)] = url
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = futures.pop(future)
+                yield url, future.result()
+                for next_url in itertools.islice(urls, 1):
+                    futures[self._executor.submit(self.__fetch_parsed, next_url, method, parse, kwargs)] = next_url
+
+
+
+    def close(self):
+        """
+        Wait for running fetches and release the connection pool
+        """
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+
+
+    def __fetch_parsed(self, url: str, method: str, parse: str, kwargs: dict):
+        try:
+            response = self.fetch(url, method, **kwargs)
+            response.raise_for_status()
+            if parse == 'json':
+                return response.json()
+            if parse == 'text':
+                return response.text
+            return response
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.logger.warning(f'Unable to fetch {url}: {e}')
+            return None
+
+
+
+    @staticmethod
+    def __accept_language(languages: list[str]) -> str:
+        """
+        Build an Accept-Language header with decreasing quality values, like the browser sends
+
+        :param languages: navigator.languages
+        :return: header value
+        """
+        values = []
+        for index, language in enumerate(languages[:10]):
+            quality = round(1 - index * 0.1, 1)
+            values.append(language if index == 0 else f'{language};q={quality}')
+        return ','.join(values)
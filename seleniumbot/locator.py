@@ -0,0 +1,148 @@
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webelement import WebElement
+
+
+class Locator:
+    """
+    A reusable CSS selector or xpath.  \n
+    Accepted by every SeleniumBot method that takes a selector or an xpath.
+    """
+    __slots__ = ('by', 'value')
+
+
+    def __init__(self, selector: str = None, xpath: str = None) -> None:
+        """
+        Selector or xpath must be supplied (selector takes precendence)
+
+        :param selector: CSS selector
+        :param xpath: Element xpath
+        """
+        if not selector and not xpath:
+            raise Exception("No selector or xpath supplied")
+
+        if selector:
+            self.by = By.CSS_SELECTOR
+            self.value = selector
+        else:
+            self.by = By.XPATH
+            self.value = xpath
+
+
+
+    @classmethod
+    def resolve(cls, selector=None, xpath=None) -> 'Locator':
+        """
+        Get a locator from the selector/xpath arguments of a SeleniumBot method
+
+        :param selector: CSS selector or Locator
+        :param xpath: Element xpath or Locator
+        :return: Locator
+        """
+        if isinstance(selector, Locator):
+            return selector
+        if isinstance(xpath, Locator):
+            return xpath
+        return cls(selector=selector, xpath=xpath)
+
+
+
+    @property
+    def is_xpath(self) -> bool:
+        return self.by == By.XPATH
+
+
+
+    def to_tuple(self) -> tuple[str, str]:
+        """
+        Get the (By, value) pair used by find_element and expected conditions
+
+        :return: (criteria, locator)
+        """
+        return self.by, self.value
+
+
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Locator) and self.to_tuple() == other.to_tuple()
+
+
+
+    def __hash__(self) -> int:
+        return hash(self.to_tuple())
+
+
+
+    def __repr__(self) -> str:
+        if self.is_xpath:
+            return f'Locator(xpath={self.value!r})'
+        return f'Locator(selector={self.value!r})'
+
+
+class ElementCache:
+    def __init__(self, enabled: bool = True) -> None:
+        """
+        Element handles of already located elements, keyed by locator and base element.  \n
+        Must be cleared on navigation, frame or tab switch.
+
+        :param enabled: Cache element handles
+        """
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._elements = {}
+
+
+
+    def get(self, locator: Locator, dom: WebElement = None) -> WebElement:
+        """
+        Get a cached element handle
+
+        :param locator: Element locator
+        :param dom: the base element
+        :return: WebElement or None if not cached
+        """
+        if not self.enabled:
+            return None
+        element = self._elements.get(self.__key(locator, dom))
+        if element is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return element
+
+
+
+    def set(self, locator: Locator, element: WebElement, dom: WebElement = None):
+        """
+        Cache an element handle
+
+        :param locator: Element locator
+        :param element: Located element
+        :param dom: the base element
+        """
+        if self.enabled and isinstance(element, WebElement):
+            self._elements[self.__key(locator, dom)] = element
+
+
+
+    def evict(self, locator: Locator, dom: WebElement = None):
+        """
+        Drop a cached element handle
+
+        :param locator: Element locator
+        :param dom: the base element
+        """
+        self._elements.pop(self.__key(locator, dom), None)
+
+
+
+    def clear(self):
+        """
+        Drop every cached element handle
+        """
+        self._elements.clear()
+
+
+
+    def __key(self, locator: Locator, dom: WebElement = None) -> tuple:
+        return locator, dom.id if isinstance(dom, WebElement) else None
@@ -0,0 +1,195 @@
+from logging import Logger
+
+from .dummylogger import DummyLogger
+from .locator import Locator
+
+from collections import deque
+
+import json
+import math
+import os
+import threading
+
+
+class LocatorTimeouts:
+    def __init__(self,
+                 path: str = None,
+                 percentile: float = 95,
+                 factor: float = 1.5,
+                 margin: float = 1.0,
+                 min_timeout: float = 2.0,
+                 min_samples: int = 5,
+                 max_samples: int = 100,
+                 logger: Logger = None,
+                 ) -> None:
+        """
+        Learn how long each locator takes to reach a wait state, and derive per-locator wait deadlines.  \n
+        The deadline of a locator is its `percentile` wait time times `factor` plus `margin` seconds,
+        never below `min_timeout` nor above the default timeout. Locators with fewer than `min_samples`
+        successful waits use the default timeout. With a path the history is kept in a json file,
+        so deadlines carry over between runs.  \n
+        A wait that times out at a learned deadline may be a page that got slower, so the locator
+        waits the default timeout until its next success. A success slower than the learned deadline
+        drops the older samples, and the deadline is learned again from the new ones.
+
+        :param path: Json file to persist the history to
+        :param percentile: Percentile (0-100) of the observed wait times
+        :param factor: Multiplier applied to the percentile
+        :param margin: Seconds added to the deadline
+        :param min_timeout: Shortest deadline in seconds
+        :param min_samples: Successful waits needed before the deadline is learned
+        :param max_samples: Wait times kept per locator
+        :param logger: Logger instance
+        """
+        self.path = path
+        self.percentile = percentile
+        self.factor = factor
+        self.margin = margin
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.logger = logger or DummyLogger()
+        self.samples = {}
+        self.misses = {}
+        self.streaks = {}
+        self._lock = threading.Lock()
+        self.load()
+
+
+
+    def load(self):
+        """
+        Load the history from the json file, if any
+        """
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as file:
+                history = json.load(file)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f'Unable to load locator timeouts: {e}')
+            return
+        for key, samples in history.get('samples', {}).items():
+            self.samples[key] = deque(samples, maxlen=self.max_samples)
+        self.misses.update(history.get('misses', {}))
+        self.streaks.update(history.get('streaks', {}))
+
+
+
+    def save(self):
+        """
+        Save the history to the json file, if any
+        """
+        if not self.path:
+            return
+        with self._lock:
+            history = {
+                'samples': {key: list(samples) for key, samples in self.samples.items()},
+                'misses': dict(self.misses),
+                'streaks': dict(self.streaks),
+            }
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'w') as file:
+                json.dump(history, file)
+        except OSError as e:
+            self.logger.warning(f'Unable to save locator timeouts: {e}')
+
+
+
+    def get_timeout(self, locator: Locator, state: str, default: float) -> float:
+        """
+        Get the wait deadline of a locator
+
+        :param locator: Locator waited on
+        :param state: Wait state, e.g. visible
+        :param default: Timeout used until enough waits are recorded, and upper bound
+        :return: timeout in seconds
+        """
+        key = self.__key(locator, state)
+        with self._lock:
+            if self.streaks.get(key):
+                return default
+            timeout = self.__learn(self.samples.get(key, ()))
+        if timeout is None:
+            return default
+        return min(timeout, default)
+
+
+
+    def record(self, locator: Locator, state: str, seconds: float):
+        """
+        Record a successful wait
+
+        :param locator: Locator waited on
+        :param state: Wait state, e.g. visible
+        :param seconds: Seconds the wait took
+        """
+        key = self.__key(locator, state)
+        with self._lock:
+            learned = self.__learn(self.samples.get(key, ()))
+            if key not in self.samples or (learned is not None and seconds > learned):
+                # the locator got slower than its history, learn again from recent waits
+                self.samples[key] = deque(maxlen=self.max_samples)
+            self.samples[key].append(round(seconds, 3))
+            self.streaks.pop(key, None)
+
+
+
+    def record_miss(self, locator: Locator, state: str, learned: bool = False):
+        """
+        Record a wait that timed out.
+        After a miss at a learned deadline the locator waits the default timeout until its next success;
+        a miss at the default timeout means the element was absent, and the learned deadline applies again.
+
+        :param locator: Locator waited on
+        :param state: Wait state, e.g. visible
+        :param learned: The wait used a learned deadline shorter than the default timeout
+        """
+        key = self.__key(locator, state)
+        with self._lock:
+            self.misses[key] = self.misses.get(key, 0) + 1
+            if learned:
+                self.streaks[key] = self.streaks.get(key, 0) + 1
+            else:
+                self.streaks.pop(key, None)
+
+
+
+    def get_stats(self) -> dict:
+        """
+        Get the learned deadlines
+
+        :return: dict of {state:locator: {samples, misses, timeout}}, timeout is None while the default applies
+        """
+        with self._lock:
+            keys = set(self.samples) | set(self.misses)
+            return {
+                key: {
+                    'samples': len(self.samples.get(key, ())),
+                    'misses': self.misses.get(key, 0),
+                    'timeout': None if self.streaks.get(key) else self.__learn(self.samples.get(key, ())),
+                }
+                for key in sorted(keys)
+            }
+
+
+
+    def __learn(self, samples) -> float:
+        """
+        Derive a deadline from wait times
+
+        :param samples: Successful wait times in seconds
+        :return: deadline in seconds, None with fewer than `min_samples` samples
+        """
+        samples = sorted(samples)
+        if len(samples) < self.min_samples:
+            return None
+        index = min(math.ceil(self.percentile / 100 * len(samples)) - 1, len(samples) - 1)
+        return max(samples[max(index, 0)] * self.factor + self.margin, self.min_timeout)
+
+
+
+    @staticmethod
+    def __key(locator: Locator, state: str) -> str:
+        return f'{state}:{locator.by}={locator.value}'
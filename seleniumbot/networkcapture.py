@@ -0,0 +1,327 @@
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from . import scripts
+from .dummylogger import DummyLogger
+
+from collections import OrderedDict, deque
+from logging import Logger
+from typing import Iterator, Pattern, Union
+
+import base64
+import json
+import re
+import time
+
+
+class NetworkCapture:
+    MODES = ('performance', 'page')
+    CDP_COMMAND = 'executeCdpCommand'
+    MAX_PENDING = 1000
+
+
+    def __init__(self,
+                 driver: WebDriver,
+                 patterns: list[Union[str, Pattern]],
+                 max_buffer: int = 256,
+                 poll_interval: float = 0.2,
+                 mode: str = None,
+                 logger: Logger = None,
+                 ) -> None:
+        """
+        Capture the responses of urls matching any of the patterns, with their parsed bodies.  \n
+        Chrome sessions started with the performance log read responses from the log and fetch
+        bodies over CDP, which sees every request of the page including the ones made while loading.
+        Other sessions wrap fetch and XMLHttpRequest in the page. On Chrome the hook is also registered
+        over CDP to run at the start of every new document, so requests made while a page loads are seen
+        when the capture is started before navigating. Elsewhere the hook only sees requests made after it
+        is installed, and is reinstalled on the next poll after a navigation.  \n
+        At most `max_buffer` responses are kept; older ones are dropped when nobody reads them.
+
+        :param driver: Remote driver
+        :param patterns: Url regular expressions
+        :param max_buffer: Captured responses kept until read
+        :param poll_interval: Seconds between polls while waiting for responses
+        :param mode: performance or page, defaults to performance when the session has the performance log
+        :param logger: Logger instance
+        """
+        self.driver = driver
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        self.max_buffer = max_buffer
+        self.poll_interval = poll_interval
+        self.logger = logger or DummyLogger()
+        self.mode = mode or ('performance' if self.__has_performance_log() else 'page')
+        if self.mode not in self.MODES:
+            raise Exception(f'Unknown capture mode {self.mode}, expected one of {self.MODES}')
+        self.stats = {
+            'captured': 0,
+            'dropped': 0,
+            'failed': 0,
+        }
+        self._buffer = deque()
+        self._pending = OrderedDict()
+        self._started = False
+        self._document_hook = None
+
+
+
+    def start(self) -> 'NetworkCapture':
+        """
+        Start capturing. Responses received before the capture starts are ignored.
+
+        :return: self
+        """
+        if self.mode == 'performance':
+            self.__ensure_cdp_command()
+            try:
+                self.driver.get_log('performance')
+            except WebDriverException as e:
+                self.logger.warning(f'Performance log not available, capturing in the page: {e}')
+                self.mode = 'page'
+        if self.mode == 'page':
+            self.__install_document_hook()
+            self.__install_hook()
+        self._started = True
+        return self
+
+
+
+    def stop(self):
+        """
+        Stop capturing and drop the unread responses
+        """
+        self._started = False
+        self._buffer.clear()
+        self._pending.clear()
+        if self._document_hook:
+            try:
+                self.driver.execute(self.CDP_COMMAND, {
+                    'cmd': 'Page.removeScriptToEvaluateOnNewDocument',
+                    'params': {'identifier': self._document_hook},
+                })
+            except WebDriverException as e:
+                self.logger.debug(f'Unable to remove the network hook from new documents: {e}')
+            self._document_hook = None
+        self.logger.info(f'Network capture stats: {self.stats}')
+
+
+
+    def poll(self) -> int:
+        """
+        Collect the responses received since the last poll
+
+        :return: number of new responses
+        """
+        if not self._started:
+            self.start()
+        if self.mode == 'performance':
+            responses = self.__poll_performance_log()
+        else:
+            responses = self.__poll_page()
+        for response in responses:
+            self.__keep(response)
+        return len(responses)
+
+
+
+    def get_responses(self) -> list[dict]:
+        """
+        Poll and return every unread response
+
+        :return: list of responses
+        """
+        self.poll()
+        responses = list(self._buffer)
+        self._buffer.clear()
+        return responses
+
+
+
+    def responses(self, timeout: float = 10, count: int = None) -> Iterator[dict]:
+        """
+        Iterate captured responses as they arrive.  \n
+        Each response is a dict of url, status, mime_type and body; json bodies are parsed,
+        others are text (or None when the body is not available).
+
+        :param timeout: Stop after this many seconds without a new response
+        :param count: Stop after this many responses
+        :return: Iterator of responses
+        """
+        yielded = 0
+        deadline = time.time() + timeout
+        while count is None or yielded < count:
+            if not self._buffer:
+                self.poll()
+            if self._buffer:
+                yield self._buffer.popleft()
+                yielded += 1
+                deadline = time.time() + timeout
+                continue
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            time.sleep(min(self.poll_interval, remaining))
+
+
+
+    def __enter__(self) -> 'NetworkCapture':
+        return self.start()
+
+
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+
+    def __matches(self, url: str) -> bool:
+        return any(pattern.search(url) for pattern in self.patterns)
+
+
+
+    def __keep(self, response: dict):
+        if len(self._buffer) >= self.max_buffer:
+            self._buffer.popleft()
+            self.stats['dropped'] += 1
+        self._buffer.append(response)
+        self.stats['captured'] += 1
+
+
+
+    def __has_performance_log(self) -> bool:
+        capabilities = self.driver.capabilities
+        if capabilities.get('browserName') != 'chrome':
+            return False
+        prefs = capabilities.get('goog:loggingPrefs') or {}
+        # Chromedriver does not echo logging prefs in every version, trust the session when absent
+        return not prefs or prefs.get('performance') is not None
+
+
+
+    def __ensure_cdp_command(self):
+        commands = self.driver.command_executor._commands
+        if self.CDP_COMMAND not in commands:
+            commands[self.CDP_COMMAND] = ('POST', '/session/$sessionId/goog/cdp/execute')
+
+
+
+    def __poll_performance_log(self) -> list[dict]:
+        """
+        Read the performance log and fetch the bodies of matching responses that finished loading
+
+        :return: list of responses
+        """
+        responses = []
+        for entry in self.driver.get_log('performance'):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method')
+            params = message.get('params', {})
+            if method == 'Network.responseReceived':
+                response = params.get('response', {})
+                if not self.__matches(response.get('url', '')):
+                    continue
+                self._pending[params['requestId']] = {
+                    'url': response.get('url'),
+                    'status': response.get('status'),
+                    'mime_type': response.get('mimeType', ''),
+                }
+                if len(self._pending) > self.MAX_PENDING:
+                    self._pending.popitem(last=False)
+            elif method == 'Network.loadingFinished' and params.get('requestId') in self._pending:
+                response = self._pending.pop(params['requestId'])
+                response['body'] = self.__parse_body(self.__get_response_body(params['requestId']), response['mime_type'])
+                responses.append(response)
+            elif method == 'Network.loadingFailed':
+                self._pending.pop(params.get('requestId'), None)
+        return responses
+
+
+
+    def __get_response_body(self, request_id: str) -> str:
+        try:
+            result = self.driver.execute(self.CDP_COMMAND, {
+                'cmd': 'Network.getResponseBody',
+                'params': {'requestId': request_id},
+            })['value']
+        except WebDriverException as e:
+            # Bodies of redirects and evicted resources are not available
+            self.stats['failed'] += 1
+            self.logger.debug(f'Unable to get response body of {request_id}: {e}')
+            return None
+        body = result.get('body')
+        if result.get('base64Encoded') and body is not None:
+            body = base64.b64decode(body).decode('utf-8', errors='replace')
+        return body
+
+
+
+    def __install_document_hook(self):
+        """
+        Register the page hook to run before any page script of every new document (Chrome only),
+        so the requests made while a page loads are captured too
+        """
+        if self._document_hook or self.driver.capabilities.get('browserName') != 'chrome':
+            return
+        self.__ensure_cdp_command()
+        arguments = json.dumps([[pattern.pattern for pattern in self.patterns], self.max_buffer])
+        try:
+            result = self.driver.execute(self.CDP_COMMAND, {
+                'cmd': 'Page.addScriptToEvaluateOnNewDocument',
+                'params': {'source': f'(function () {{ {scripts.NETWORK_HOOK} }}).apply(window, {arguments});'},
+            })['value']
+        except WebDriverException as e:
+            self.logger.warning(f'Unable to hook new documents, page load requests are not captured: {e}')
+            return
+        self._document_hook = result.get('identifier')
+
+
+
+    def __install_hook(self) -> bool:
+        return self.driver.execute_script(scripts.NETWORK_HOOK, [pattern.pattern for pattern in self.patterns], self.max_buffer)
+
+
+
+    def __poll_page(self) -> list[dict]:
+        """
+        Drain the page buffer, reinstalling the hook when the document changed
+
+        :return: list of responses
+        """
+        drained = self.driver.execute_script(scripts.NETWORK_DRAIN)
+        if not drained['installed']:
+            self.__install_hook()
+        self.stats['dropped'] += drained['dropped']
+        responses = []
+        for item in drained['responses']:
+            if not self.__matches(item['url']):
+                continue
+            responses.append({
+                'url': item['url'],
+                'status': item['status'],
+                'mime_type': item['mimeType'],
+                'body': self.__parse_body(item['body'], item['mimeType']),
+            })
+        return responses
+
+
+
+    @staticmethod
+    def __parse_body(body: str, mime_type: str):
+        """
+        Parse json bodies, leave others as text
+
+        :param body: Response body
+        :param mime_type: Response mime type
+        :return: parsed body
+        """
+        if body is None:
+            return None
+        if 'json' in (mime_type or '') or body.lstrip()[:1] in ('{', '['):
+            try:
+                return json.loads(body)
+            except ValueError:
+                pass
+        return body
@@ -0,0 +1,134 @@
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+from logging import Logger
+from typing import Callable, Union
+
+from .dummylogger import DummyLogger
+from .enums import Pacing
+
+import random
+import time
+
+
+class Pacer:
+    DISTRIBUTIONS = ('uniform', 'normal', 'lognormal')
+
+
+    def __init__(self,
+                 mode: Pacing = Pacing.HUMAN,
+                 distribution: Union[str, Callable[[float, float], float]] = 'uniform',
+                 scale: float = 1.0,
+                 poll_frequency: float = 0.1,
+                 logger: Logger = None,
+                 ) -> None:
+        """
+        Pacing policy for the delays between bot actions.  \n
+        In fast mode a delay is replaced by a wait for the condition it was covering, capped at the
+        delay's upper bound (or skipped if there is no condition). In human mode the delay is drawn
+        from the configured distribution.
+
+        :param mode: Pacing enum
+        :param distribution: uniform, normal, lognormal or a function of (low, high) returning seconds
+        :param scale: Multiplier applied to human mode delays
+        :param poll_frequency: Seconds between condition checks in fast mode
+        :param logger: Logger instance
+        """
+        if isinstance(distribution, str) and distribution not in self.DISTRIBUTIONS:
+            raise Exception(f'Unknown pacing distribution {distribution}, expected one of {self.DISTRIBUTIONS}')
+        self.mode = Pacing(mode)
+        self.distribution = distribution
+        self.scale = scale
+        self.poll_frequency = poll_frequency
+        self.logger = logger or DummyLogger()
+        self.pauses = 0
+        self.total_time = 0.0
+        self.waits = 0
+        self.wait_time = 0.0
+
+
+
+    @property
+    def is_fast(self) -> bool:
+        return self.mode == Pacing.FAST
+
+
+
+    def pause(self, low: float, high: float = None, condition: Callable = None, driver=None):
+        """
+        Pause between actions
+
+        :param low: Lower bound of the delay in seconds
+        :param high: Upper bound of the delay in seconds, defaults to low
+        :param condition: Expected condition the delay is waiting for, used in fast mode
+        :param driver: Driver to evaluate the condition with
+        :return: condition result in fast mode, None otherwise
+        """
+        high = low if high is None else high
+        start_time = time.time()
+        result = None
+        try:
+            if self.mode == Pacing.FAST:
+                if condition and driver:
+                    try:
+                        result = WebDriverWait(driver, high, poll_frequency=self.poll_frequency).until(condition)
+                    except TimeoutException:
+                        result = False
+            else:
+                time.sleep(self.get_delay(low, high))
+        finally:
+            self.pauses += 1
+            self.total_time += time.time() - start_time
+        return result
+
+
+
+    def wait(self, seconds: float):
+        """
+        Fixed wait that is not a pacing delay, e.g. a poll interval or a retry backoff.
+        Kept in both modes and not scaled, but counted in the stats.
+
+        :param seconds: Seconds to wait
+        """
+        start_time = time.time()
+        try:
+            if seconds > 0:
+                time.sleep(seconds)
+        finally:
+            self.waits += 1
+            self.wait_time += time.time() - start_time
+
+
+
+    def get_delay(self, low: float, high: float) -> float:
+        """
+        Draw a human mode delay
+
+        :param low: Lower bound in seconds
+        :param high: Upper bound in seconds
+        :return: delay in seconds
+        """
+        if callable(self.distribution):
+            delay = self.distribution(low, high)
+        elif self.distribution == 'normal':
+            delay = random.gauss((low + high) / 2, (high - low) / 4)
+        elif self.distribution == 'lognormal':
+            delay = low + random.lognormvariate(0, 0.5) * (high - low) / 2
+        else:
+            delay = random.uniform(low, high)
+        return max(min(delay, high), low) * self.scale
+
+
+
+    def get_stats(self) -> dict:
+        """
+        Get the time spent pacing
+
+        :return: dict of {mode, pauses, seconds, waits, wait_seconds}
+        """
+        return {
+            'mode': self.mode.value,
+            'pauses': self.pauses,
+            'seconds': self.total_time,
+            'waits': self.waits,
+            'wait_seconds': self.wait_time,
+        }
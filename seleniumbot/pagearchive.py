@@ -0,0 +1,268 @@
+from logging import Logger
+
+from .dummylogger import DummyLogger
+
+from typing import Iterator, Union
+
+import hashlib
+import json
+import lzma
+import os
+import threading
+import time
+import zlib
+
+
+class PageArchiveError(Exception):
+    """
+    Raised when a snapshot can not be read from the archive
+    """
+
+
+class PageArchive:
+    COMPRESSIONS = ('zlib', 'lzma')
+    INDEX_FILE = 'index.jsonl'
+
+
+    def __init__(self,
+                 directory: str,
+                 compression: str = 'zlib',
+                 level: int = 6,
+                 segment_size: int = 64 * 1024 * 1024,
+                 chunk_size: int = 1024 * 1024,
+                 logger: Logger = None,
+                 ) -> None:
+        """
+        Append-only archive of page sources, compressed and deduplicated by content hash.  \n
+        Snapshots are compressed into segment files that roll over at `segment_size`, and every
+        snapshot gets a line in a json lines index with the segment, offset and length of its content,
+        so any snapshot can be read back without scanning the segments. Identical snapshots share
+        the stored content. Pages are encoded, hashed and compressed `chunk_size` at a time,
+        so a large page is never copied whole in memory.
+
+        :param directory: Archive directory, e.g. per trace id
+        :param compression: zlib or lzma
+        :param level: Compression level (zlib 0-9, lzma preset 0-9)
+        :param segment_size: Bytes after which a new segment file is started
+        :param chunk_size: Bytes encoded and compressed at a time
+        :param logger: Logger instance
+        """
+        if compression not in self.COMPRESSIONS:
+            raise Exception(f'Unknown compression {compression}, expected one of {self.COMPRESSIONS}')
+        self.directory = directory
+        self.compression = compression
+        self.level = level
+        self.segment_size = segment_size
+        self.chunk_size = chunk_size
+        self.logger = logger or DummyLogger()
+        self.entries = []
+        self.objects = {}
+        self.stats = {
+            'snapshots': 0,
+            'duplicates': 0,
+            'bytes': 0,
+            'stored_bytes': 0,
+        }
+        self._segment = 0
+        self._lock = threading.Lock()
+        self.__load_index()
+
+
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, self.INDEX_FILE)
+
+
+
+    def add(self, source: Union[str, bytes], url: str = None, label: str = None) -> dict:
+        """
+        Archive a page source.
+        The content is hashed first, and only compressed and written if it is not already archived.
+
+        :param source: Page source
+        :param url: Page url
+        :param label: Free label, e.g. the step of the bot
+        :return: index entry of the snapshot
+        """
+        with self._lock:
+            hasher = hashlib.sha256()
+            size = 0
+            for chunk in self.__encoded_chunks(source):
+                hasher.update(chunk)
+                size += len(chunk)
+            digest = hasher.hexdigest()
+
+            stored = self.objects.get(digest)
+            duplicate = stored is not None
+            if not duplicate:
+                stored = self.__write_object(source, digest, size)
+                self.objects[digest] = stored
+            entry = dict(
+                stored,
+                id=len(self.entries),
+                url=url,
+                label=label,
+                saved_at=time.time(),
+                duplicate=duplicate,
+            )
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.index_path, 'a') as file:
+                file.write(json.dumps(entry) + '\n')
+            self.entries.append(entry)
+
+            self.stats['snapshots'] += 1
+            self.stats['bytes'] += size
+            if duplicate:
+                self.stats['duplicates'] += 1
+            else:
+                self.stats['stored_bytes'] += stored['length']
+        self.logger.debug(f'Archived snapshot {entry["id"]} of {url} ({size} bytes, {"duplicate" if duplicate else stored["length"]})')
+        return entry
+
+
+
+    def iter_chunks(self, id: int) -> Iterator[bytes]:
+        """
+        Read a snapshot back as decompressed utf-8 chunks, without loading it whole
+
+        :param id: Snapshot id
+        :return: Iterator of bytes
+        :raises: PageArchiveError for an unknown id or a corrupt snapshot
+        """
+        if not 0 <= id < len(self.entries):
+            raise PageArchiveError(f'No snapshot {id} in {self.directory}')
+        entry = self.entries[id]
+        if entry['compression'] == 'lzma':
+            decompressor = lzma.LZMADecompressor()
+        else:
+            decompressor = zlib.decompressobj()
+        hasher = hashlib.sha256()
+        with open(os.path.join(self.directory, entry['segment']), 'rb') as file:
+            file.seek(entry['offset'])
+            remaining = entry['length']
+            while remaining > 0:
+                data = file.read(min(self.chunk_size, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                chunk = decompressor.decompress(data)
+                hasher.update(chunk)
+                yield chunk
+            if entry['compression'] == 'zlib':
+                chunk = decompressor.flush()
+                hasher.update(chunk)
+                yield chunk
+        if remaining > 0 or hasher.hexdigest() != entry['sha256']:
+            raise PageArchiveError(f'Snapshot {id} in {self.directory} is corrupt')
+
+
+
+    def read(self, id: int) -> str:
+        """
+        Read a snapshot back
+
+        :param id: Snapshot id
+        :return: page source
+        :raises: PageArchiveError for an unknown id or a corrupt snapshot
+        """
+        return b''.join(self.iter_chunks(id)).decode('utf-8', 'surrogatepass')
+
+
+
+    def find(self, url: str = None, label: str = None) -> list[dict]:
+        """
+        Find snapshots by url and/or label
+
+        :param url: Page url
+        :param label: Snapshot label
+        :return: list of index entries
+        """
+        return [
+            entry for entry in self.entries
+            if (url is None or entry['url'] == url) and (label is None or entry['label'] == label)
+        ]
+
+
+
+    def get_stats(self) -> dict:
+        """
+        Get the archive stats of this run
+
+        :return: dict of snapshots, duplicates, bytes (uncompressed), stored_bytes and ratio
+        """
+        stats = dict(self.stats)
+        stats['ratio'] = stats['stored_bytes'] / stats['bytes'] if stats['bytes'] else 0.0
+        return stats
+
+
+
+    def __write_object(self, source: Union[str, bytes], digest: str, size: int) -> dict:
+        """
+        Compress a page source to the end of the current segment
+
+        :return: dict of sha256, size, compression, segment, offset and length
+        """
+        if self.compression == 'lzma':
+            compressor = lzma.LZMACompressor(preset=self.level)
+        else:
+            compressor = zlib.compressobj(self.level)
+        os.makedirs(self.directory, exist_ok=True)
+        segment = self.__segment_name(self._segment)
+        path = os.path.join(self.directory, segment)
+        if os.path.exists(path) and os.path.getsize(path) >= self.segment_size:
+            self._segment += 1
+            segment = self.__segment_name(self._segment)
+            path = os.path.join(self.directory, segment)
+        with open(path, 'ab') as file:
+            offset = file.tell()
+            for chunk in self.__encoded_chunks(source):
+                file.write(compressor.compress(chunk))
+            file.write(compressor.flush())
+            length = file.tell() - offset
+        return {
+            'sha256': digest,
+            'size': size,
+            'compression': self.compression,
+            'segment': segment,
+            'offset': offset,
+            'length': length,
+        }
+
+
+
+    def __encoded_chunks(self, source: Union[str, bytes]) -> Iterator[bytes]:
+        for start in range(0, len(source), self.chunk_size):
+            chunk = source[start:start + self.chunk_size]
+            yield chunk.encode('utf-8', 'surrogatepass') if isinstance(chunk, str) else chunk
+
+
+
+    def __load_index(self):
+        """
+        Load the index of an existing archive, to append to it and deduplicate against it
+        """
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, 'r') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # a line cut short by a crash, the snapshot it described is lost
+                    self.logger.warning(f'Skipping a corrupt line of {self.index_path}')
+                    continue
+                entry['id'] = len(self.entries)
+                self.entries.append(entry)
+                self.objects.setdefault(entry['sha256'], {
+                    key: entry[key] for key in ('sha256', 'size', 'compression', 'segment', 'offset', 'length')
+                })
+        segments = [entry['segment'] for entry in self.entries]
+        if segments:
+            self._segment = int(max(segments).split('-')[1].split('.')[0])
+
+
+
+    @staticmethod
+    def __segment_name(number: int) -> str:
+        return f'segment-{number:05d}.bin'
@@ -0,0 +1,69 @@
+from logging import Logger
+
+from .dummylogger import DummyLogger
+
+import statistics
+
+
+class PageTimings:
+    METRICS = ('dns', 'connect', 'tls', 'ttfb', 'dom_content_loaded', 'load')
+
+
+    def __init__(self, top: int = 10, logger: Logger = None) -> None:
+        """
+        Collect the Navigation and Resource Timing of each page a bot loads, and aggregate them per run.  \n
+        Times are in milliseconds.
+
+        :param top: Number of hosts and resources kept per page and in the summary
+        :param logger: Logger instance
+        """
+        self.top = top
+        self.logger = logger or DummyLogger()
+        self.pages = []
+        self._hosts = {}
+        self._slowest = []
+
+
+
+    def record(self, timing: dict):
+        """
+        Add the timing of a page, as returned by the PAGE_TIMING script
+
+        :param timing: Page timing dict
+        """
+        if not timing:
+            return
+        self.pages.append({key: timing.get(key) for key in ('url', 'resources', 'bytes') + self.METRICS})
+        for host in timing.get('hosts', []):
+            total = self._hosts.setdefault(host['host'], {'host': host['host'], 'count': 0, 'duration': 0, 'max': 0, 'bytes': 0})
+            total['count'] += host['count']
+            total['duration'] += host['duration']
+            total['max'] = max(total['max'], host['max'])
+            total['bytes'] += host['bytes']
+        self._slowest = sorted(self._slowest + timing.get('slowest', []), key=lambda resource: resource['duration'], reverse=True)[:self.top]
+        self.logger.debug(f'Page timing of {timing.get("url")}: ttfb {timing.get("ttfb")}ms, load {timing.get("load")}ms')
+
+
+
+    def get_summary(self) -> dict:
+        """
+        Aggregate the recorded pages
+
+        :return: dict of navigations, per metric mean/median/max, slowest pages, hosts by total resource time and slowest resources
+        """
+        metrics = {}
+        for metric in self.METRICS:
+            values = [page[metric] for page in self.pages if page.get(metric) is not None]
+            if values:
+                metrics[metric] = {
+                    'mean': round(statistics.mean(values)),
+                    'median': round(statistics.median(values)),
+                    'max': max(values),
+                }
+        return {
+            'navigations': len(self.pages),
+            'metrics': metrics,
+            'slowest_pages': sorted(self.pages, key=lambda page: page.get('load') or 0, reverse=True)[:self.top],
+            'hosts': sorted(self._hosts.values(), key=lambda host: host['duration'], reverse=True)[:self.top],
+            'slowest_resources': self._slowest,
+        }
@@ -10,6 +10,16 @@ import requests
 class ProxyFactory:
     PROXYMESH_USERNAME = ''
     PROXYMESH_PASSWORD = ''
+    FREE_PROXY_FILTERS = {
+        BotProxy.FREE: {},
+        BotProxy.FREE_GOOGLE: {'only_google': True},
+        BotProxy.FREE_HTTPS: {'only_https': True},
+        BotProxy.FREE_GOOGLE_HTTPS: {'only_google': True, 'only_https': True},
+        BotProxy.FREE_US: {'country': 'United States'},
+        BotProxy.FREE_US_GOOGLE: {'country': 'United States', 'only_google': True},
+        BotProxy.FREE_US_HTTPS: {'country': 'United States', 'only_https': True},
+        BotProxy.FREE_US_GOOGLE_HTTPS: {'country': 'United States', 'only_google': True, 'only_https': True},
+    }
 
 
     def __init__(self, logger: Logger = None) -> None:
@@ -40,40 +50,47 @@ class ProxyFactory:
     def get_proxy(self, proxy: BotProxy) -> str:
         if proxy is None: 
             return None
-        if proxy == BotProxy.FREE:
-            return self.__get_free_proxy()
-        elif proxy == BotProxy.FREE_GOOGLE:
-            return self.__get_free_proxy(only_google=True)
-        elif proxy == BotProxy.FREE_HTTPS:
-            return self.__get_free_proxy(only_https=True)
-        elif proxy == BotProxy.FREE_GOOGLE_HTTPS:
-            return self.__get_free_proxy(only_google=True, only_https=True)
-        elif proxy == BotProxy.FREE_US:
-            return self.__get_free_proxy(country='United States')
-        elif proxy == BotProxy.FREE_US_GOOGLE:
-            return self.__get_free_proxy(country='United States', only_google=True)
-        elif proxy == BotProxy.FREE_US_HTTPS:
-            return self.__get_free_proxy(country='United States', only_https=True)
-        elif proxy == BotProxy.FREE_US_GOOGLE_HTTPS:
-            return self.__get_free_proxy(country='United States', only_google=True, only_https=True)
+        if proxy in self.FREE_PROXY_FILTERS:
+            proxies = self.__get_free_proxies(**self.FREE_PROXY_FILTERS[proxy])
+            if not proxies:
+                raise Exception('Got no proxy')
+            self.logger.info(f'Got proxy: {proxies[0]}')
+            return proxies[0]
         elif 'proxymesh' in proxy.value:
             return self.__get_proxymesh_proxy(proxy)
 
 
 
-    def __get_free_proxy(self, country: str = 'all', only_google: bool = False, only_https: bool = False) -> str:
+    def get_proxies(self, proxy: BotProxy) -> list[str]:
         """
-        Get a free proxy from `https://free-proxy-list.net/`
+        Get every proxy available for a bot proxy, e.g. to rotate between them
+
+        :param proxy: Bot proxy
+        :return: list of proxy urls, a single one for proxymesh
+        """
+        if proxy is None:
+            return []
+        if proxy in self.FREE_PROXY_FILTERS:
+            return self.__get_free_proxies(**self.FREE_PROXY_FILTERS[proxy])
+        elif 'proxymesh' in proxy.value:
+            return [self.__get_proxymesh_proxy(proxy)]
+        return []
+
+
+
+    def __get_free_proxies(self, country: str = 'all', only_google: bool = False, only_https: bool = False) -> list[str]:
+        """
+        Get free proxies from `https://free-proxy-list.net/`
 
         :param country: country to get proxy from, if 'all' get anything. Defaults to all.
         :param only_google: Only google allowed
         :param only_https: Only https enabled
-        :return: proxy
-        :raises: Exception if no proxy is returned
+        :return: list of proxies, in the order listed
         """
         response = requests.get('https://free-proxy-list.net/')
         soup = BeautifulSoup(response.text, 'lxml')
         rows = soup.select('table > tbody > tr')
+        proxies = []
         for i in range(len(rows)):
             ip_address = soup.select_one(f'table > tbody > tr:nth-child({i+1}) > td:nth-child(1)').text
             port = soup.select_one(f'table > tbody > tr:nth-child({i+1}) > td:nth-child(2)').text
@@ -86,10 +103,9 @@ class ProxyFactory:
                 continue
             if only_https and https_value.lower() == 'no':
                 continue
-            self.logger.info(f'Got proxy: {ip_address}:{port}')
-            return f'{ip_address}:{port}'
-        raise Exception('Got no proxy')
-    
+            proxies.append(f'http://{ip_address}:{port}')
+        return proxies
+
 
 
     def __get_proxymesh_proxy(self, bot_proxy: BotProxy) -> str:
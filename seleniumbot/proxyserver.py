@@ -235,6 +235,43 @@ class ProxyServer:
 
 
 
+    def set_upstream(self, url: str):
+        """
+        Switch the upstream proxy. New connections use it right away, open tunnels finish on the previous one.
+
+        :param url: proxy url
+        """
+        proxy_info = stringutil.decompose_proxy_url(url)
+        self.proxy_host = proxy_info['host']
+        self.proxy_port = proxy_info['port']
+        self.proxy_username = proxy_info['username']
+        self.proxy_password = proxy_info['password']
+        self.logger.info(f'Proxy server upstream set to {self.proxy_host}:{self.proxy_port}')
+
+
+
+    def rotate_upstream(self, urls: list[str]) -> bool:
+        """
+        Switch to the candidate upstream proxy that follows the current one,
+        so repeated rotations cycle through every candidate
+
+        :param urls: Candidate proxy urls
+        :return: switched, False if every candidate is the current upstream
+        """
+        current = (self.proxy_host, self.proxy_port)
+        upstreams = []
+        for url in urls:
+            proxy_info = stringutil.decompose_proxy_url(url)
+            upstreams.append((proxy_info['host'], proxy_info['port']))
+        start = upstreams.index(current) + 1 if current in upstreams else 0
+        for index in range(start, start + len(urls)):
+            if upstreams[index % len(urls)] != current:
+                self.set_upstream(urls[index % len(urls)])
+                return True
+        return False
+
+
+
     def start(self, port=0):
         """
         Start proxy server
@@ -267,6 +304,17 @@ class ProxyServer:
 
 
 
+    @property
+    def local_url(self) -> str:
+        """
+        Url of the running proxy server for clients in this process, None when stopped
+        """
+        if not self.httpd:
+            return None
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+
+
     def stop(self, wait: bool = True):
         """
         Stop proxy server
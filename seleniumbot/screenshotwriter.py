@@ -0,0 +1,167 @@
+from logging import Logger
+
+from .dummylogger import DummyLogger
+
+import base64
+import hashlib
+import io
+import os
+import queue
+import threading
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class ScreenshotWriter:
+    FORMATS = ('png', 'jpeg')
+
+
+    def __init__(self,
+                 directory: str,
+                 max_queue: int = 16,
+                 max_width: int = None,
+                 image_format: str = 'png',
+                 quality: int = 85,
+                 skip_duplicates: bool = False,
+                 logger: Logger = None,
+                 ) -> None:
+        """
+        Write screenshots from a background thread so the bot only pays for the capture.  \n
+        Downscaling and recompression need Pillow; without it screenshots are written as captured.
+
+        :param directory: Directory relative file names are written to
+        :param max_queue: Screenshots waiting to be written before `submit` blocks
+        :param max_width: Downscale screenshots wider than this
+        :param image_format: png or jpeg
+        :param quality: Jpeg quality
+        :param skip_duplicates: Skip a screenshot identical to the previous one in the same directory (the skip is logged)
+        :param logger: Logger instance
+        """
+        if image_format not in self.FORMATS:
+            raise Exception(f'Unknown screenshot format {image_format}, expected one of {self.FORMATS}')
+        self.directory = directory
+        self.max_width = max_width
+        self.image_format = image_format
+        self.quality = quality
+        self.skip_duplicates = skip_duplicates
+        self.logger = logger or DummyLogger()
+        self.stats = {
+            'written': 0,
+            'skipped': 0,
+            'failed': 0,
+            'bytes': 0,
+        }
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread = None
+        self._last_written = {}
+        self._lock = threading.Lock()
+
+        if (max_width or image_format != 'png') and Image is None:
+            self.logger.warning('Pillow is not installed, screenshots are written as captured png')
+
+
+
+    def start(self):
+        """
+        Start the writer thread
+        """
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self.__run, name='screenshot-writer', daemon=True)
+            self._thread.start()
+
+
+
+    def submit(self, screenshot: str, file_name: str, block: bool = True) -> bool:
+        """
+        Queue a screenshot for writing
+
+        :param screenshot: Base64 encoded png, as returned by the driver
+        :param file_name: File name, relative to the writer directory unless absolute
+        :param block: Wait for room in the queue instead of dropping the screenshot
+        :return: queued
+        """
+        self.start()
+        path = os.path.join(self.directory, file_name)
+        if self.image_format == 'jpeg' and Image is not None:
+            path = f'{os.path.splitext(path)[0]}.jpg'
+        try:
+            self._queue.put((screenshot, path), block=block)
+            return True
+        except queue.Full:
+            self.logger.warning(f'Screenshot queue full, dropping {path}')
+            return False
+
+
+
+    def close(self, timeout: float = 30):
+        """
+        Write the queued screenshots and stop the writer thread
+
+        :param timeout: Seconds to wait for pending writes
+        """
+        if not self._thread:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+        self.logger.info(f'Screenshot writer stats: {self.stats}')
+
+
+
+    def __run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            screenshot, path = item
+            try:
+                self.__write(base64.b64decode(screenshot), path)
+            except Exception as e:
+                self.stats['failed'] += 1
+                self.logger.warning(f'Unable to write screenshot {path}: {e}')
+
+
+
+    def __write(self, png: bytes, path: str):
+        directory = os.path.dirname(path) or '.'
+        digest = hashlib.sha1(png).hexdigest()
+        last_digest, last_path = self._last_written.get(directory, (None, None))
+        if self.skip_duplicates and last_digest == digest:
+            self.stats['skipped'] += 1
+            self.logger.info(f'Screenshot {path} not written, identical to {last_path}')
+            return
+        self._last_written[directory] = (digest, path)
+
+        data = self.__process(png)
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(data)
+        self.stats['written'] += 1
+        self.stats['bytes'] += len(data)
+
+
+
+    def __process(self, png: bytes) -> bytes:
+        """
+        Downscale and recompress a screenshot, if configured and Pillow is installed
+
+        :param png: Captured png
+        :return: image bytes
+        """
+        if Image is None or (not self.max_width and self.image_format == 'png'):
+            return png
+        image = Image.open(io.BytesIO(png))
+        if self.max_width and image.width > self.max_width:
+            height = round(image.height * self.max_width / image.width)
+            image = image.resize((self.max_width, height))
+        output = io.BytesIO()
+        if self.image_format == 'jpeg':
+            image.convert('RGB').save(output, format='JPEG', quality=self.quality, optimize=True)
+        else:
+            image.save(output, format='PNG', optimize=True)
+        return output.getvalue()
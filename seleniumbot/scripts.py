@@ -0,0 +1,567 @@
+"""
+JavaScript snippets run in the browser by SeleniumBot
+"""
+
+# Shared helper: `find(by, value, root)` returns the elements matching a
+# locator as an array. `by` is a selenium `By` value.
+FIND_ELEMENTS = """
+function find(by, value, root) {
+    root = root || document;
+    if (by === 'xpath') {
+        var result = document.evaluate(value, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        var elements = [];
+        for (var i = 0; i < result.snapshotLength; i++) {
+            elements.push(result.snapshotItem(i));
+        }
+        return elements;
+    }
+    return Array.prototype.slice.call(root.querySelectorAll(value));
+}
+function textOf(el) {
+    var text = el.innerText !== undefined ? el.innerText : el.textContent;
+    return (text || '').trim();
+}
+"""
+
+# arguments: by, value, root, kind ('text', 'attribute', 'property'), names (string or list)
+BULK_EXTRACT = FIND_ELEMENTS + """
+var by = arguments[0], value = arguments[1], root = arguments[2], kind = arguments[3], names = arguments[4];
+function read(el, name) {
+    if (kind === 'attribute') {
+        return el.getAttribute(name);
+    }
+    var property = el[name];
+    if (property === undefined || typeof property === 'function') {
+        return null;
+    }
+    if (property !== null && typeof property === 'object') {
+        return String(property);
+    }
+    return property;
+}
+return find(by, value, root).map(function (el) {
+    if (kind === 'text') {
+        return textOf(el);
+    }
+    if (typeof names === 'string') {
+        return read(el, names);
+    }
+    var values = {};
+    names.forEach(function (name) {
+        values[name] = read(el, name);
+    });
+    return values;
+});
+"""
+
+# Async. arguments: by, value, seen key, scroll, idle ms, timeout ms, callback
+# Scrolls to the bottom and waits until the page is quiet: no fetch/XHR in flight and
+# no DOM mutation for `idle ms`. While requests are in flight only `timeout ms` ends
+# the wait. Returns matching elements not returned before.
+SCROLL_STEP = FIND_ELEMENTS + """
+var by = arguments[0], value = arguments[1], key = arguments[2], scroll = arguments[3];
+var idleMs = arguments[4], timeoutMs = arguments[5], done = arguments[arguments.length - 1];
+var seen = window[key] = window[key] || new WeakSet();
+function collect() {
+    return find(by, value).filter(function (el) {
+        if (seen.has(el)) {
+            return false;
+        }
+        seen.add(el);
+        return true;
+    });
+}
+if (!scroll) {
+    done(collect());
+    return;
+}
+var requests = window.__seleniumbotRequests;
+if (!requests) {
+    requests = window.__seleniumbotRequests = {pending: 0, onchange: null};
+    var changed = function (delta) {
+        requests.pending = Math.max(0, requests.pending + delta);
+        if (requests.onchange) {
+            requests.onchange();
+        }
+    };
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function () {
+            changed(1);
+            try {
+                return originalFetch.apply(this, arguments).then(function (response) {
+                    changed(-1);
+                    return response;
+                }, function (error) {
+                    changed(-1);
+                    throw error;
+                });
+            } catch (error) {
+                changed(-1);
+                throw error;
+            }
+        };
+    }
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        changed(1);
+        this.addEventListener('loadend', function () {
+            changed(-1);
+        });
+        try {
+            return originalSend.apply(this, arguments);
+        } catch (error) {
+            changed(-1);
+            throw error;
+        }
+    };
+}
+var idleTimer = null, deadline = null, finished = false;
+function waitQuiet() {
+    clearTimeout(idleTimer);
+    if (!requests.pending) {
+        idleTimer = setTimeout(finish, idleMs);
+    }
+}
+var observer = new MutationObserver(waitQuiet);
+function finish() {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    observer.disconnect();
+    requests.onchange = null;
+    clearTimeout(idleTimer);
+    clearTimeout(deadline);
+    done(collect());
+}
+requests.onchange = waitQuiet;
+observer.observe(document.body, {childList: true, subtree: true});
+deadline = setTimeout(finish, timeoutMs);
+var scroller = document.scrollingElement || document.documentElement;
+window.scrollTo(0, scroller.scrollHeight);
+waitQuiet();
+"""
+
+# Async. arguments: timeout ms, callback. Scrolls to the bottom and returns true as
+# soon as the page grows, false if it did not grow within `timeout ms`.
+SCROLL_TO_BOTTOM = """
+var timeoutMs = arguments[0], done = arguments[arguments.length - 1];
+var scroller = document.scrollingElement || document.documentElement;
+var height = scroller.scrollHeight, start = Date.now();
+window.scrollTo(0, height);
+(function poll() {
+    if (scroller.scrollHeight !== height) {
+        done(true);
+    } else if (Date.now() - start >= timeoutMs) {
+        done(false);
+    } else {
+        setTimeout(poll, 50);
+    }
+})();
+"""
+
+# Async. arguments: conditions [{by, value, state}], mode ('any' or 'all'), timeout ms, callback
+# Checks the conditions on every DOM mutation (batched per animation frame) and on a
+# slow interval for style-only changes, and resolves as soon as they hold.
+# Returns {ok, elements} with one element (or null) per condition.
+WAIT_FOR = FIND_ELEMENTS + """
+var conditions = arguments[0], mode = arguments[1], timeoutMs = arguments[2];
+var done = arguments[arguments.length - 1];
+function isDisplayed(el) {
+    if (!el.getClientRects().length) {
+        return false;
+    }
+    var style = window.getComputedStyle(el);
+    return style.visibility !== 'hidden' && style.visibility !== 'collapse' && parseFloat(style.opacity) !== 0;
+}
+function evaluate(condition) {
+    var el = find(condition.by, condition.value)[0] || null;
+    switch (condition.state) {
+        case 'present': return el;
+        case 'absent': return el ? false : true;
+        case 'visible': return el && isDisplayed(el) ? el : false;
+        case 'invisible': return !el || !isDisplayed(el) ? (el || true) : false;
+        case 'clickable': return el && isDisplayed(el) && !el.disabled ? el : false;
+        case 'selected': return el && (el.selected || el.checked) ? el : false;
+    }
+    return false;
+}
+function check() {
+    var results = conditions.map(evaluate);
+    var met = results.filter(function (result) { return !!result; }).length;
+    if (mode === 'all' ? met === results.length : met > 0) {
+        return results.map(function (result) { return result && result !== true ? result : null; });
+    }
+    return null;
+}
+var finished = false, frame = null, interval = null, deadline = null, observer = null;
+function finish(ok, elements) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    if (observer) {
+        observer.disconnect();
+    }
+    cancelAnimationFrame(frame);
+    clearInterval(interval);
+    clearTimeout(deadline);
+    done({ok: ok, elements: elements || []});
+}
+function poll() {
+    var elements = check();
+    if (elements) {
+        finish(true, elements);
+    }
+}
+function onChange() {
+    if (frame !== null) {
+        return;
+    }
+    frame = requestAnimationFrame(function () {
+        frame = null;
+        poll();
+    });
+}
+try {
+    conditions.forEach(function (condition) { find(condition.by, condition.value); });
+} catch (e) {
+    // invalid selector or xpath, reported instead of waiting on it
+    return done({ok: false, error: String(e && e.message || e), elements: []});
+}
+var elements = check();
+if (elements) {
+    finish(true, elements);
+} else {
+    observer = new MutationObserver(onChange);
+    observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+    interval = setInterval(poll, 100);
+    deadline = setTimeout(function () { finish(false); }, timeoutMs);
+}
+"""
+
+# arguments: url. Starts loading a url without waiting for it; the current
+# document is flagged so TAB_READY ignores it until the new one replaces it.
+TAB_NAVIGATE = """
+window.__seleniumbotStale = true;
+window.location.href = arguments[0];
+"""
+
+TAB_READY = """
+return !window.__seleniumbotStale && document.readyState === 'complete';
+"""
+
+# arguments: url patterns (regex sources), buffer size. Wraps fetch and XMLHttpRequest
+# to keep the responses of matching urls in a bounded page buffer, drained by
+# NETWORK_DRAIN. Installed once per document.
+NETWORK_HOOK = """
+var patterns = arguments[0].map(function (source) { return new RegExp(source); });
+var maxBuffer = arguments[1];
+var state = window.__seleniumbotCapture;
+if (state) {
+    state.patterns = patterns;
+    state.maxBuffer = maxBuffer;
+    return false;
+}
+state = window.__seleniumbotCapture = {patterns: patterns, maxBuffer: maxBuffer, buffer: [], dropped: 0};
+function matches(url) {
+    return state.patterns.some(function (pattern) { return pattern.test(url); });
+}
+function keep(url, status, mimeType, body) {
+    if (state.buffer.length >= state.maxBuffer) {
+        state.buffer.shift();
+        state.dropped++;
+    }
+    state.buffer.push({url: url, status: status, mimeType: mimeType, body: body});
+}
+if (window.fetch) {
+    var fetch = window.fetch;
+    window.fetch = function () {
+        return fetch.apply(this, arguments).then(function (response) {
+            if (matches(response.url)) {
+                response.clone().text().then(function (body) {
+                    keep(response.url, response.status, response.headers.get('content-type') || '', body);
+                }, function () {});
+            }
+            return response;
+        });
+    };
+}
+var send = XMLHttpRequest.prototype.send;
+XMLHttpRequest.prototype.send = function () {
+    var xhr = this;
+    xhr.addEventListener('load', function () {
+        if (!matches(xhr.responseURL)) {
+            return;
+        }
+        var body = null;
+        if (xhr.responseType === '' || xhr.responseType === 'text') {
+            body = xhr.responseText;
+        } else if (xhr.responseType === 'json') {
+            body = JSON.stringify(xhr.response);
+        }
+        keep(xhr.responseURL, xhr.status, xhr.getResponseHeader('content-type') || '', body);
+    });
+    return send.apply(this, arguments);
+};
+return true;
+"""
+
+# Returns {installed, responses, dropped} and empties the NETWORK_HOOK buffer
+NETWORK_DRAIN = """
+var state = window.__seleniumbotCapture;
+if (!state) {
+    return {installed: false, responses: [], dropped: 0};
+}
+var drained = {installed: true, responses: state.buffer, dropped: state.dropped};
+state.buffer = [];
+state.dropped = 0;
+return drained;
+"""
+
+# arguments: fields [{by, value, data, checked, match, additive, keys}], root
+# Sets each field the way a user would (native value setter, then input and change
+# events; clicks for checkboxes and radios). Returns one result per field:
+# {status: 'ok' | 'missing' | 'option' | 'keys', element, clear}. 'keys' fields need
+# real keystrokes: file inputs, contenteditable, fields marked keys, and inputs that
+# rejected the scripted value (masks, custom widgets).
+FILL_FORM = FIND_ELEMENTS + """
+var fields = arguments[0], root = arguments[1];
+function setValue(el, value) {
+    var descriptor = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value');
+    if (descriptor && descriptor.set) {
+        descriptor.set.call(el, value);
+    } else {
+        el.value = value;
+    }
+}
+function fire(el) {
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+}
+function optionText(option) {
+    return (option.text || '').replace(/\\s+/g, ' ').trim();
+}
+function findOption(options, wanted, match) {
+    var i;
+    if (match !== 'label') {
+        for (i = 0; i < options.length; i++) {
+            if (options[i].value === wanted) {
+                return options[i];
+            }
+        }
+    }
+    if (match !== 'value') {
+        for (i = 0; i < options.length; i++) {
+            if (optionText(options[i]) === wanted) {
+                return options[i];
+            }
+        }
+    }
+    return null;
+}
+function fillSelect(el, field) {
+    var wanted = Array.isArray(field.data) ? field.data : [field.data];
+    var chosen = [];
+    for (var i = 0; i < wanted.length; i++) {
+        var option = findOption(el.options, String(wanted[i]), field.match);
+        if (!option) {
+            return {status: 'option', missing: String(wanted[i])};
+        }
+        chosen.push(option);
+    }
+    if (el.multiple) {
+        Array.prototype.forEach.call(el.options, function (option) {
+            option.selected = chosen.indexOf(option) !== -1 || (field.additive && option.selected);
+        });
+    } else if (chosen.length) {
+        chosen[chosen.length - 1].selected = true;
+    }
+    fire(el);
+    return {status: 'ok'};
+}
+function fillRadio(elements, el, field) {
+    var target = null;
+    if (typeof field.data === 'boolean') {
+        target = field.data ? el : null;
+    } else {
+        var group = elements.length > 1 || !el.name ? elements : Array.prototype.slice.call(
+            (el.form || document).querySelectorAll('input[type="radio"]')
+        ).filter(function (radio) { return radio.name === el.name; });
+        target = group.filter(function (radio) { return radio.value === String(field.data); })[0];
+        if (!target) {
+            return {status: 'option', missing: String(field.data)};
+        }
+    }
+    if (target && !target.checked) {
+        target.click();
+    }
+    return {status: 'ok'};
+}
+function fill(field) {
+    var elements = find(field.by, field.value, root);
+    if (!elements.length) {
+        return {status: 'missing'};
+    }
+    var el = elements[0];
+    var tag = el.tagName.toLowerCase(), type = (el.type || '').toLowerCase();
+    if (type === 'file') {
+        return {status: 'keys', element: el, clear: false};
+    }
+    if (field.keys || el.isContentEditable) {
+        return {status: 'keys', element: el, clear: true};
+    }
+    if (tag === 'select') {
+        return fillSelect(el, field);
+    }
+    if (type === 'checkbox') {
+        if (el.checked !== field.checked) {
+            el.click();
+        }
+        return {status: 'ok'};
+    }
+    if (type === 'radio') {
+        return fillRadio(elements, el, field);
+    }
+    var value = String(field.data);
+    setValue(el, value);
+    fire(el);
+    if (el.value !== value) {
+        return {status: 'keys', element: el, clear: true};
+    }
+    return {status: 'ok'};
+}
+return fields.map(fill);
+"""
+
+# arguments: by, value. Reads the "next page" control: {found, disabled, href}.
+# href is null for controls that are not plain links (buttons, javascript: and # links).
+PAGE_NEXT = FIND_ELEMENTS + """
+var el = find(arguments[0], arguments[1])[0];
+if (!el) {
+    return {found: false, disabled: false, href: null};
+}
+var disabled = !!el.disabled || el.getAttribute('aria-disabled') === 'true'
+    || /(^|\\s)disabled(\\s|$)/.test(el.getAttribute('class') || '');
+var link = el.closest ? el.closest('a[href]') : null;
+var href = link ? link.getAttribute('href') : null;
+if (!href || href === '#' || /^javascript:/i.test(href)) {
+    return {found: true, disabled: disabled, href: null};
+}
+return {found: true, disabled: disabled, href: link.href};
+"""
+
+# Returns {local_storage, session_storage} of the current origin
+SESSION_STATE = """
+function dump(storage) {
+    var items = {};
+    for (var i = 0; i < storage.length; i++) {
+        var key = storage.key(i);
+        items[key] = storage.getItem(key);
+    }
+    return items;
+}
+return {local_storage: dump(window.localStorage), session_storage: dump(window.sessionStorage)};
+"""
+
+# arguments: local storage items, session storage items
+SESSION_RESTORE = """
+var local = arguments[0] || {}, session = arguments[1] || {};
+Object.keys(local).forEach(function (key) { window.localStorage.setItem(key, local[key]); });
+Object.keys(session).forEach(function (key) { window.sessionStorage.setItem(key, session[key]); });
+"""
+
+# arguments: top. Navigation Timing of the current document and its Resource Timing
+# summarized per host, in milliseconds. Returns null before the document has a
+# navigation entry (e.g. about:blank).
+PAGE_TIMING = """
+var top = arguments[0];
+function ms(value) {
+    return value > 0 ? Math.round(value) : 0;
+}
+var nav = performance.getEntriesByType ? performance.getEntriesByType('navigation')[0] : null;
+var timing;
+if (nav) {
+    timing = {
+        dns: ms(nav.domainLookupEnd - nav.domainLookupStart),
+        connect: ms(nav.connectEnd - nav.connectStart),
+        tls: nav.secureConnectionStart > 0 ? ms(nav.connectEnd - nav.secureConnectionStart) : 0,
+        ttfb: ms(nav.responseStart),
+        dom_content_loaded: ms(nav.domContentLoadedEventEnd),
+        load: ms(nav.loadEventEnd),
+        bytes: nav.transferSize || 0
+    };
+} else if (performance.timing && performance.timing.navigationStart) {
+    var legacy = performance.timing, start = legacy.navigationStart;
+    timing = {
+        dns: ms(legacy.domainLookupEnd - legacy.domainLookupStart),
+        connect: ms(legacy.connectEnd - legacy.connectStart),
+        tls: legacy.secureConnectionStart > 0 ? ms(legacy.connectEnd - legacy.secureConnectionStart) : 0,
+        ttfb: ms(legacy.responseStart - start),
+        dom_content_loaded: ms(legacy.domContentLoadedEventEnd - start),
+        load: ms(legacy.loadEventEnd - start),
+        bytes: 0
+    };
+} else {
+    return null;
+}
+var hosts = {}, resources = [];
+performance.getEntriesByType('resource').forEach(function (entry) {
+    var host = '';
+    try {
+        host = new URL(entry.name).host;
+    } catch (e) {}
+    var item = hosts[host] = hosts[host] || {host: host, count: 0, duration: 0, max: 0, bytes: 0};
+    item.count++;
+    item.duration += entry.duration;
+    item.max = Math.max(item.max, entry.duration);
+    item.bytes += entry.transferSize || 0;
+    resources.push({url: entry.name.slice(0, 200), host: host, type: entry.initiatorType, duration: ms(entry.duration), bytes: entry.transferSize || 0});
+});
+timing.url = location.href;
+timing.resources = resources.length;
+timing.hosts = Object.keys(hosts).map(function (host) {
+    var item = hosts[host];
+    return {host: item.host, count: item.count, duration: ms(item.duration), max: ms(item.max), bytes: item.bytes};
+}).sort(function (a, b) { return b.duration - a.duration; }).slice(0, top);
+timing.slowest = resources.sort(function (a, b) { return b.duration - a.duration; }).slice(0, top);
+return timing;
+"""
+
+# arguments: entries, repeat. Times each entry {by, value, scope} `repeat` times, where
+# scope is the list of [by, value] parent locators the entry is relative to. Returns per
+# entry the median milliseconds, total matches, most matches under one parent and parents.
+TIME_LOCATORS = FIND_ELEMENTS + """
+var entries = arguments[0], repeat = arguments[1];
+function rootsOf(scope) {
+    var roots = [document];
+    for (var i = 0; i < scope.length; i++) {
+        var next = [];
+        for (var j = 0; j < roots.length; j++) {
+            next = next.concat(find(scope[i][0], scope[i][1], roots[j]));
+        }
+        roots = next;
+    }
+    return roots;
+}
+return entries.map(function (entry) {
+    try {
+        var roots = rootsOf(entry.scope || []), durations = [], counts = [];
+        for (var i = 0; i < repeat; i++) {
+            var start = performance.now();
+            counts = roots.map(function (root) { return find(entry.by, entry.value, root).length; });
+            durations.push(performance.now() - start);
+        }
+        durations.sort(function (a, b) { return a - b; });
+        return {
+            median: durations[Math.floor(durations.length / 2)],
+            count: counts.reduce(function (a, b) { return a + b; }, 0),
+            max: counts.length ? Math.max.apply(null, counts) : 0,
+            roots: roots.length
+        };
+    } catch (e) {
+        return {error: String(e)};
+    }
+});
+"""
@@ -0,0 +1,106 @@
+from cryptography.fernet import Fernet, InvalidToken
+from logging import Logger
+
+from .dummylogger import DummyLogger
+
+import base64
+import hashlib
+import json
+import os
+import time
+
+
+class SessionStoreError(Exception):
+    """
+    Raised when the session store can not be used
+    """
+
+
+class SessionStore:
+    def __init__(self, directory: str, key: str, logger: Logger = None) -> None:
+        """
+        Encrypted local store of browser session state (cookies, localStorage, sessionStorage),
+        kept per account and domain so a bot can skip its login flow.  \n
+        File names are hashes of the account and domain, and contents are encrypted with a key derived from `key`.
+
+        :param directory: Directory the session files are kept in
+        :param key: Secret the encryption key is derived from
+        :param logger: Logger instance
+        :raises: SessionStoreError if no key is given
+        """
+        if not key:
+            raise SessionStoreError('A key is required to encrypt saved sessions')
+        self.directory = directory
+        self.logger = logger or DummyLogger()
+        self._fernet = Fernet(base64.urlsafe_b64encode(hashlib.sha256(key.encode('utf-8')).digest()))
+
+
+
+    def save(self, account: str, domain: str, state: dict):
+        """
+        Save the session state of an account on a domain
+
+        :param account: Account name
+        :param domain: Domain name
+        :param state: dict of cookies, local_storage and session_storage
+        """
+        state = dict(state, account=account, domain=domain, saved_at=time.time())
+        token = self._fernet.encrypt(json.dumps(state).encode('utf-8'))
+        path = self.__get_path(account, domain)
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(token)
+        os.replace(temp_path, path)
+        self.logger.info(f'Saved session of {account} on {domain} ({len(state.get("cookies", []))} cookies)')
+
+
+
+    def load(self, account: str, domain: str, max_age: float = None) -> dict:
+        """
+        Load the session state of an account on a domain.
+        Expired cookies are dropped; a state without any live cookie or storage counts as expired.
+
+        :param account: Account name
+        :param domain: Domain name
+        :param max_age: Seconds a saved session stays usable
+        :return: state dict, None if there is no usable state
+        """
+        path = self.__get_path(account, domain)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as file:
+                state = json.loads(self._fernet.decrypt(file.read()))
+        except (OSError, ValueError, InvalidToken) as e:
+            self.logger.warning(f'Unable to read saved session of {account} on {domain}: {e}')
+            return None
+
+        now = time.time()
+        if max_age is not None and now - state.get('saved_at', 0) > max_age:
+            self.logger.info(f'Saved session of {account} on {domain} is older than {max_age}s')
+            return None
+        state['cookies'] = [cookie for cookie in state.get('cookies', []) if cookie.get('expiry', now + 1) > now]
+        if not (state['cookies'] or state.get('local_storage') or state.get('session_storage')):
+            self.logger.info(f'Saved session of {account} on {domain} has expired')
+            return None
+        return state
+
+
+
+    def delete(self, account: str, domain: str):
+        """
+        Delete the saved session state of an account on a domain
+
+        :param account: Account name
+        :param domain: Domain name
+        """
+        path = self.__get_path(account, domain)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+
+    def __get_path(self, account: str, domain: str) -> str:
+        name = hashlib.sha256(f'{account}\n{domain}'.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.directory, f'{name}.session')
@@ -0,0 +1,278 @@
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+from cssselect import HTMLTranslator
+from lxml import html
+from typing import Union
+
+from .locator import Locator
+
+from functools import lru_cache
+
+import re
+
+
+@lru_cache(maxsize=512)
+def css_to_xpath(selector: str) -> str:
+    """
+    Translate a CSS selector to an equivalent xpath
+
+    :param selector: CSS selector
+    :return: xpath
+    """
+    return HTMLTranslator().css_to_xpath(selector)
+
+
+class DomSnapshot:
+    WHITESPACE = re.compile(r'\s+')
+    SKIPPED_TAGS = frozenset(('script', 'style', 'noscript', 'template', 'head'))
+    PREFORMATTED_TAGS = frozenset(('pre', 'textarea', 'listing', 'xmp', 'plaintext'))
+    PREFORMATTED_STYLE = re.compile(r'white-space\s*:\s*(pre|pre-wrap|break-spaces)\b')
+    BLOCK_TAGS = frozenset((
+        'address', 'article', 'aside', 'blockquote', 'dd', 'details', 'dialog', 'div', 'dl', 'dt',
+        'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+        'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'summary', 'table',
+        'tbody', 'thead', 'tfoot', 'tr', 'ul', 'caption', 'option',
+    ))
+
+
+    def __init__(self, source: str) -> None:
+        """
+        A parsed copy of the page (or of an element subtree) that can be queried locally,
+        with the same selector/xpath API as SeleniumBot. The source is parsed on first use.
+
+        :param source: Page source or element outerHTML
+        """
+        self.source = source
+        self._tree = None
+
+
+
+    @property
+    def tree(self) -> html.HtmlElement:
+        """
+        Parsed document root
+        """
+        if self._tree is None:
+            source = self.source or '<html></html>'
+            if source.lstrip().startswith('<?xml'):
+                # lxml rejects str input with an encoding declaration
+                source = source.encode('utf-8')
+            self._tree = html.fromstring(source)
+        return self._tree
+
+
+
+    def get_elements(self, selector: Union[str, Locator] = None, xpath: str = None, dom: html.HtmlElement = None) -> list[html.HtmlElement]:
+        """
+        Gets every matching element
+        Selector or xpath must be supplied (selector takes precendence)
+
+        :param selector: CSS selector or Locator
+        :param xpath: Element xpath
+        :param dom: the base element, defaults to the document
+        :return: list of elements
+        """
+        locator = Locator.resolve(selector, xpath)
+        root = self.tree if dom is None else dom
+        query = css_to_xpath(locator.value) if locator.by == By.CSS_SELECTOR else locator.value
+        return [element for element in root.xpath(query) if isinstance(element, html.HtmlElement)]
+
+
+
+    def get_element(self, selector: Union[str, Locator] = None, xpath: str = None, dom: html.HtmlElement = None) -> html.HtmlElement:
+        """
+        Gets the first matching element
+        Selector or xpath must be supplied (selector takes precendence)
+
+        :param selector: CSS selector or Locator
+        :param xpath: Element xpath
+        :param dom: the base element, defaults to the document
+        :return: element
+        :raises: NoSuchElementException if nothing matches
+        """
+        elements = self.get_elements(selector, xpath, dom)
+        if not elements:
+            raise NoSuchElementException(f'No element matching {Locator.resolve(selector, xpath)} in snapshot')
+        return elements[0]
+
+
+
+    def does_element_exist(self, selector: Union[str, Locator] = None, xpath: str = None, dom: html.HtmlElement = None) -> bool:
+        """
+        Checks if a matching element exists
+        Selector or xpath must be supplied (selector takes precendence)
+
+        :param selector: CSS selector or Locator
+        :param xpath: Element xpath
+        :param dom: the base element, defaults to the document
+        """
+        return len(self.get_elements(selector, xpath, dom)) > 0
+
+
+
+    def get_inner_text(self, selector: Union[str, Locator] = None, xpath: str = None, dom: html.HtmlElement = None) -> str:
+        """
+        Gets an element text, with whitespace collapsed
+        Selector or xpath must be supplied (selector takes precendence)
+
+        :param selector: CSS selector or Locator
+        :param xpath: Element xpath
+        :param dom: the base element, defaults to the document
+        """
+        return self.text_of(self.get_element(selector, xpath, dom))
+
+
+
+    def get_attribute(self, attribute: str, selector: Union[str, Locator] = None, xpath: str = None, dom: html.HtmlElement = None) -> str:
+        """
+        Gets an element attribute
+        Selector or xpath must be supplied (selector takes precendence)
+
+        :param attribute: Element attribute to retrieve
+        :param selector: CSS selector or Locator
+        :param xpath: Element xpath
+        :param dom: the base element, defaults to the document
+        """
+        return self.get_element(selector, xpath, dom).get(attribute)
+
+
+
+    def get_texts(self, selector: Union[str, Locator] = None, xpath: str = None, dom: html.HtmlElement = None) -> list[str]:
+        """
+        Gets the text of every matching element
+        Selector or xpath must be supplied (selector takes precendence)
+
+        :param selector: CSS selector or Locator
+        :param xpath: Element xpath
+        :param dom: the base element, defaults to the document
+        """
+        return [self.text_of(element) for element in self.get_elements(selector, xpath, dom)]
+
+
+
+    def get_attributes(self, attribute: str, selector: Union[str, Locator] = None, xpath: str = None, dom: html.HtmlElement = None) -> list[str]:
+        """
+        Gets an attribute of every matching element
+        Selector or xpath must be supplied (selector takes precendence)
+
+        :param attribute: Element attribute to retrieve
+        :param selector: CSS selector or Locator
+        :param xpath: Element xpath
+        :param dom: the base element, defaults to the document
+        """
+        return [element.get(attribute) for element in self.get_elements(selector, xpath, dom)]
+
+
+
+    def query(self, queries: dict) -> dict:
+        """
+        Run a batch of lookups
+
+        Each query is a CSS selector or Locator, read as text, or a dict of {selector/xpath, attribute, many}.
+        Missing elements read as None, or as an empty list with many.
+
+        :param queries: dict of {name: query}
+        :return: dict of {name: value}
+        """
+        results = {}
+        for name, query in queries.items():
+            if isinstance(query, (str, Locator)):
+                query = {'selector': query}
+            locator = Locator.resolve(query.get('selector'), query.get('xpath'))
+            attribute = query.get('attribute')
+            elements = self.get_elements(locator)
+            values = [element.get(attribute) if attribute else self.text_of(element) for element in elements]
+            if query.get('many'):
+                results[name] = values
+            else:
+                results[name] = values[0] if values else None
+        return results
+
+
+
+    @classmethod
+    def text_of(cls, element: html.HtmlElement) -> str:
+        """
+        Gets the text of an element the way the browser innerText reads it: script, style and
+        hidden subtrees are left out, whitespace is collapsed (except in pre, textarea and inline
+        white-space: pre styles) and block elements are on their own lines.
+        Without styles, only elements hidden by the hidden attribute or an inline style are detected.
+
+        :param element: Snapshot element
+        :return: text
+        """
+        parts = []
+        cls.__collect_text(element, parts, cls.__is_preformatted(element), root=True)
+        lines = [[]]
+        for part, preserved in parts:
+            if part is None:
+                lines.append([])
+            elif preserved:
+                # every line of preformatted text is kept, even an empty one
+                for index, piece in enumerate(part.split('\n')):
+                    if index:
+                        lines.append([])
+                    lines[-1].append((piece, True))
+            else:
+                lines[-1].append((part, False))
+
+        text = []
+        for line in lines:
+            value = ''
+            for part, preserved in line:
+                if not preserved:
+                    part = cls.WHITESPACE.sub(' ', part)
+                    if not value or value.endswith(' '):
+                        part = part.lstrip(' ')
+                value += part
+            if line and not line[-1][1]:
+                value = value.rstrip(' ')
+            if value or any(preserved for _, preserved in line):
+                text.append(value)
+        return '\n'.join(text)
+
+
+
+    @classmethod
+    def __collect_text(cls, element: html.HtmlElement, parts: list[tuple], preserve: bool, root: bool = False):
+        """
+        Collect the text parts of an element: (text, preserve whitespace), or (None, False) for a line break
+        """
+        if not isinstance(element.tag, str) or element.tag in cls.SKIPPED_TAGS:
+            return
+        if not root and cls.__is_hidden(element):
+            return
+        preserve = preserve or cls.__is_preformatted(element)
+        block = element.tag in cls.BLOCK_TAGS
+        if block or element.tag == 'br':
+            parts.append((None, False))
+        elif element.tag in ('td', 'th'):
+            parts.append((' ', False))
+        if element.text:
+            parts.append((element.text, preserve))
+        for child in element:
+            cls.__collect_text(child, parts, preserve)
+            if child.tail:
+                parts.append((child.tail, preserve))
+        if block:
+            parts.append((None, False))
+
+
+
+    @classmethod
+    def __is_preformatted(cls, element: html.HtmlElement) -> bool:
+        if not isinstance(element.tag, str):
+            return False
+        if element.tag in cls.PREFORMATTED_TAGS:
+            return True
+        style = (element.get('style') or '').lower()
+        return bool(cls.PREFORMATTED_STYLE.search(style))
+
+
+
+    @staticmethod
+    def __is_hidden(element: html.HtmlElement) -> bool:
+        if element.get('hidden') is not None:
+            return True
+        style = ''.join((element.get('style') or '').split()).lower()
+        return 'display:none' in style or 'visibility:hidden' in style
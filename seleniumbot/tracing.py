@@ -0,0 +1,224 @@
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from .dummylogger import DummyLogger
+
+from collections import defaultdict
+from logging import Logger
+
+import itertools
+import json
+import os
+import sys
+import selenium
+import threading
+import time
+
+
+class CommandTracer:
+    PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+    BOT_FILE = os.path.join(PACKAGE_DIR, 'bot.py')
+    SELENIUM_DIR = os.path.dirname(os.path.abspath(selenium.__file__))
+    SIZE_DEPTH = 3
+    SIZE_ITEMS = 1000
+
+
+    def __init__(self, driver: WebDriver, max_records: int = 100000, logger: Logger = None) -> None:
+        """
+        Time every WebDriver command sent by a driver.  \n
+        Each command is recorded with its locator or script, duration, request and response sizes,
+        the SeleniumBot method it came from and the first caller line outside seleniumbot.
+        Nothing is patched until `install`, so an untraced driver runs at full speed.
+
+        :param driver: Remote driver
+        :param max_records: Commands kept, later commands are only counted
+        :param logger: Logger instance
+        """
+        self.driver = driver
+        self.max_records = max_records
+        self.logger = logger or DummyLogger()
+        self.records = []
+        self.dropped = 0
+        self._execute = None
+        self._origin = time.perf_counter()
+
+
+
+    def install(self) -> 'CommandTracer':
+        """
+        Start tracing the driver commands
+
+        :return: self
+        """
+        if self._execute is not None:
+            return self
+        self._execute = self.driver.execute
+        self._origin = time.perf_counter()
+        self.driver.execute = self.__traced_execute
+        return self
+
+
+
+    def uninstall(self):
+        """
+        Stop tracing the driver commands
+        """
+        if self._execute is None:
+            return
+        self.driver.execute = self._execute
+        self._execute = None
+
+
+
+    def get_profile(self, top: int = 10) -> dict:
+        """
+        Summarize the traced commands
+
+        :param top: Number of slowest commands to list
+        :return: dict of round trips, wire time, totals per command and per bot method, failed commands per
+            exception type, and the slowest commands
+        """
+        by_command = defaultdict(lambda: {'count': 0, 'seconds': 0.0})
+        by_method = defaultdict(lambda: {'count': 0, 'seconds': 0.0})
+        errors = defaultdict(int)
+        for record in self.records:
+            for totals, key in ((by_command, record['command']), (by_method, record['method'] or '(direct)')):
+                totals[key]['count'] += 1
+                totals[key]['seconds'] += record['duration']
+            if record['error']:
+                errors[record['error']] += 1
+        slowest = sorted(self.records, key=lambda record: record['duration'], reverse=True)[:top]
+        return {
+            'round_trips': len(self.records) + self.dropped,
+            'wire_time': sum(record['duration'] for record in self.records),
+            'request_bytes': sum(record['request_bytes'] for record in self.records),
+            'response_bytes': sum(record['response_bytes'] for record in self.records),
+            'by_command': self.__sorted_totals(by_command),
+            'by_method': self.__sorted_totals(by_method),
+            'errors': dict(sorted(errors.items(), key=lambda item: item[1], reverse=True)),
+            'slowest': [
+                {key: record[key] for key in ('command', 'locator', 'duration', 'method', 'caller', 'error')}
+                for record in slowest
+            ],
+        }
+
+
+
+    def write_chrome_trace(self, path: str) -> str:
+        """
+        Write the traced commands in the Chrome trace event format (chrome://tracing, Perfetto)
+
+        :param path: Trace file path
+        :return: path
+        """
+        events = []
+        for record in self.records:
+            events.append({
+                'name': record['command'],
+                'cat': 'webdriver',
+                'ph': 'X',
+                'ts': round(record['start'] * 1e6),
+                'dur': round(record['duration'] * 1e6),
+                'pid': os.getpid(),
+                'tid': record['thread'],
+                'args': {key: record[key] for key in ('locator', 'method', 'caller', 'request_bytes', 'response_bytes', 'error')},
+            })
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+        return path
+
+
+
+    def __traced_execute(self, driver_command: str, params: dict = None):
+        start = time.perf_counter()
+        error = None
+        try:
+            response = self._execute(driver_command, params)
+            return response
+        except Exception as e:
+            error = type(e).__name__
+            response = None
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            if len(self.records) < self.max_records:
+                method, caller = self.__get_callers()
+                self.records.append({
+                    'command': driver_command,
+                    'locator': self.__get_locator(driver_command, params),
+                    'start': start - self._origin,
+                    'duration': duration,
+                    'request_bytes': self.__size(params),
+                    'response_bytes': self.__size(response.get('value') if response else None),
+                    'method': method,
+                    'caller': caller,
+                    'thread': threading.get_ident(),
+                    'error': error,
+                })
+            else:
+                self.dropped += 1
+
+
+
+    def __get_callers(self) -> tuple[str, str]:
+        """
+        Find the outermost SeleniumBot method and the first bot line on the stack
+
+        :return: (SeleniumBot method name, file:line of the calling bot code)
+        """
+        method = None
+        caller = None
+        frame = sys._getframe(2)
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename == self.BOT_FILE:
+                method = frame.f_code.co_name
+            elif not filename.startswith((self.PACKAGE_DIR, self.SELENIUM_DIR)):
+                caller = f'{os.path.relpath(filename)}:{frame.f_lineno}'
+                break
+            frame = frame.f_back
+        return method, caller
+
+
+
+    @staticmethod
+    def __get_locator(driver_command: str, params: dict) -> str:
+        if not params:
+            return None
+        if 'using' in params and 'value' in params:
+            return f'{params["using"]}={params["value"]}'
+        if 'script' in params:
+            return ' '.join(params['script'].split())[:80]
+        if 'url' in params:
+            return params['url']
+        return None
+
+
+
+    @classmethod
+    def __size(cls, value, depth: int = 0) -> int:
+        """
+        Approximate a payload size from its str and bytes lengths, without serializing it,
+        so page sources and screenshots are not copied again on every command
+
+        :param value: Command params or response value
+        :param depth: Container nesting level, lengths are only summed 3 levels deep and over the first items
+        :return: size in characters
+        """
+        if isinstance(value, (str, bytes)):
+            return len(value)
+        if depth >= cls.SIZE_DEPTH:
+            return 0
+        if isinstance(value, dict):
+            value = value.values()
+        elif not isinstance(value, (list, tuple)):
+            return 0
+        return sum(cls.__size(item, depth + 1) for item in itertools.islice(value, cls.SIZE_ITEMS))
+
+
+
+    @staticmethod
+    def __sorted_totals(totals: dict) -> dict:
+        return dict(sorted(totals.items(), key=lambda item: item[1]['seconds'], reverse=True))